@@ -1,27 +1,178 @@
 """
 DI-2D Analysis API Endpoints
 """
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Awaitable, TypeVar
 
-from app.services.analyzer import analyzer
+from app.services.analyzer import analyzer, ANALYSIS_MODES
 from app.services.werk24_analyzer import werk24_analyzer
+from app.services.preprocess_pool import preprocess_pool
+from app.services.cache import result_cache, page_cache
+from app.services.singleflight import analysis_flights
+from app.services.rate_limit import provider_limiters
+from app.services.resilience import circuit_breakers
+from app.services.deadline import Deadline, deadline_from_request, record_cancelled, cancellation_stats
+from app.services.uploads import DrawingSource, spool_upload
+from app.services.progress import AnalysisProgress, format_sse, format_heartbeat
+from app.services import metrics
+from app.services.comparison import (
+    compare_models,
+    build_comparison_notes,
+    parse_model_specs,
+    stream_comparison,
+)
 from app.models.analysis import DrawingAnalysisResult, AnalysisRequest
-from app.core.exceptions import AIKeyError, FileProcessingError, AnalysisError
+from app.core.exceptions import (
+    DI2DException,
+    AIKeyError,
+    FileProcessingError,
+    AnalysisError,
+    CapacityError,
+    DeadlineExceededError,
+    ClientDisconnectedError,
+)
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+
+def _parse_pages(pages: str) -> List[int]:
+    """
+    Sayfa seçimini çöz ("1", "1,3", "2-4,7")
+    
+    Returns:
+        Sıralı, tekrarsız sayfa numaraları
+    """
+    selected = set()
+    try:
+        for part in pages.replace(" ", "").split(","):
+            if not part:
+                continue
+            if "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+                selected.update(range(start, end + 1))
+            else:
+                selected.add(int(part))
+    except ValueError:
+        raise FileProcessingError(f"Geçersiz sayfa seçimi: {pages}")
+    
+    if not selected or min(selected) < 1:
+        raise FileProcessingError(f"Geçersiz sayfa seçimi: {pages}")
+    if len(selected) > settings.max_pages_per_analysis:
+        raise FileProcessingError(f"En fazla {settings.max_pages_per_analysis} sayfa analiz edilebilir")
+    
+    return sorted(selected)
+
+
+def _check_analysis_mode(analysis_mode: str) -> None:
+    """Form'daki analiz modunu yükleme okunmadan doğrula"""
+    if analysis_mode not in ANALYSIS_MODES:
+        raise FileProcessingError(f"Desteklenmeyen analiz modu: {analysis_mode} ({' | '.join(ANALYSIS_MODES)})")
+
+
+async def _read_upload(file: UploadFile, model: str, reasoning_level: str = "", enhance_mode: str = "") -> DrawingSource:
+    """Yüklemeyi spool et, okuma süresini upload_read aşaması olarak kaydet"""
+    source = await spool_upload(file)
+    metrics.observe_stage("upload_read", source.read_time, model, reasoning_level, enhance_mode)
+    return source
+
+
+async def _run_analysis(
+    source: DrawingSource,
+    filename: str,
+    model: str,
+    max_tokens: int,
+    reasoning_level: str,
+    enhance_mode: str,
+    use_cache: bool,
+    invalidate_cache: bool,
+    pages: List[int],
+    analysis_mode: str,
+    progress: Optional[AnalysisProgress] = None,
+    deadline: Optional[Deadline] = None
+) -> DrawingAnalysisResult:
+    """Model seçimine göre Werk24 veya AI analizini çalıştır"""
+    if model == "werk24-professional":
+        # Werk24 ile analiz
+        logger.info("🔧 Using Werk24 Professional API")
+        return await werk24_analyzer.analyze(
+            file_bytes=source,
+            filename=filename,
+            confidence_threshold=0.7,
+            use_cache=use_cache,
+            invalidate_cache=invalidate_cache,
+            progress=progress,
+            deadline=deadline
+        )
+    
+    # Standart AI modelleri ile analiz
+    return await analyzer.analyze(
+        file_bytes=source,
+        filename=filename,
+        model=model,
+        max_tokens=max_tokens,
+        reasoning_level=reasoning_level,
+        enhance_mode=enhance_mode,
+        use_cache=use_cache,
+        invalidate_cache=invalidate_cache,
+        pages=pages,
+        analysis_mode=analysis_mode,
+        progress=progress,
+        deadline=deadline
+    )
+
+
+async def _cancel_on_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """
+    İşi çalıştır, istemci koparsa iptal et
+    
+    Starlette normal (akışsız) isteklerde istemci kopsa da endpoint'i
+    çalıştırmaya devam eder; bağlantı disconnect_poll_interval aralıkla
+    kontrol edilir.
+    
+    Raises:
+        ClientDisconnectedError: İstemci iş bitmeden koptu
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=settings.disconnect_poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.warning("🔌 Client disconnected, cancelling analysis")
+                record_cancelled("request", "disconnect")
+                raise ClientDisconnectedError()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 @router.post("/analyze", response_model=DrawingAnalysisResult)
 async def analyze_drawing(
+    request: Request,
     file: UploadFile = File(..., description="2D teknik resim dosyası (PDF, PNG, JPG)"),
     model: str = Form("gpt-5.2", description="AI modeli"),
     max_tokens: int = Form(150000, description="Maksimum token"),
     reasoning_level: str = Form("high", description="Düşünme seviyesi (medium|high|xhigh)"),
-    enhance_mode: str = Form("balanced", description="Görüntü iyileştirme (fast|balanced|aggressive)")
+    enhance_mode: str = Form("balanced", description="Görüntü iyileştirme (fast|balanced|aggressive)"),
+    use_cache: bool = Form(True, description="Önbelleği kullan (False = bypass)"),
+    invalidate_cache: bool = Form(False, description="Önbellek kaydını sil ve yeniden analiz et"),
+    pages: str = Form("1", description="Analiz edilecek sayfalar (örn. 1, 1,3 veya 2-4)"),
+    analysis_mode: str = Form("standard", description="Analiz modu (standard|tiled)"),
+    timeout_seconds: Optional[float] = Form(None, description="Analiz deadline'ı (saniye)"),
+    request_deadline: Optional[str] = Header(None, alias="X-Request-Deadline", description="Mutlak deadline (Unix zamanı)"),
+    request_timeout: Optional[str] = Header(None, alias="X-Request-Timeout", description="Deadline (saniye)")
 ):
     """
     2D teknik resim analizi
@@ -41,53 +192,49 @@ async def analyze_drawing(
     - `xhigh`: En derin analiz (~10-15 dk) - Karmaşık resimler için
     
     **Enhance Mode:**
-    - `fast`: Minimal işleme
-    - `balanced`: Dengeli iyileştirme - Önerilen
-    - `aggressive`: Maksimum keskinleştirme
+    - `fast`: Minimal işleme (median denoise, en hızlı)
+    - `balanced`: Dengeli iyileştirme (yarım çözünürlükte NL-means) - Önerilen
+    - `aggressive`: Maksimum keskinleştirme (tam çözünürlükte NL-means, en yavaş)
+    
+    **Önbellek:**
+    - Aynı dosya + aynı parametreler önbellekten milisaniyeler içinde döner
+    - `use_cache=false`: Önbelleği tamamen atla
+    - `invalidate_cache=true`: Kaydı sil ve analizi yeniden yap
+    
+    **Sayfa Seçimi (PDF):**
+    - Sadece seçilen sayfalar rasterize edilir ve modele gönderilir (varsayılan: `1`)
+    
+    **Analiz Modu:**
+    - `standard`: Sayfa tek görüntü olarak gönderilir
+    - `tiled`: Sayfa örtüşen karolara bölünüp eşzamanlı analiz edilir (A0/A1 montaj resimleri için)
+    
+    **Deadline:**
+    - `X-Request-Deadline` (Unix zamanı), `X-Request-Timeout` veya `timeout_seconds` (saniye); en erkeni geçerli
+    - Süre dolarsa 504 döner; istemci koparsa ön işleme ve model çağrısı iptal edilir
     """
+    source = None
     try:
-        # Dosya kontrolü
-        if not file.filename:
-            raise FileProcessingError("Dosya adı bulunamadı")
-        
-        # Uzantı kontrolü
-        allowed_extensions = ['.pdf', '.png', '.jpg', '.jpeg']
-        file_ext = file.filename.lower()[-4:]
-        if not any(file_ext.endswith(ext) for ext in allowed_extensions):
-            raise FileProcessingError(f"Desteklenmeyen dosya formatı. İzin verilenler: {', '.join(allowed_extensions)}")
-        
-        # Dosyayı oku
-        file_bytes = await file.read()
-        
-        if len(file_bytes) == 0:
-            raise FileProcessingError("Boş dosya")
-        
-        if len(file_bytes) > 20 * 1024 * 1024:  # 20MB limit
-            raise FileProcessingError("Dosya çok büyük (max 20MB)")
+        page_list = _parse_pages(pages)
+        _check_analysis_mode(analysis_mode)
+        deadline = deadline_from_request(request_deadline, request_timeout, timeout_seconds)
         
-        logger.info(f"📄 Received file: {file.filename} ({len(file_bytes)} bytes)")
+        # Dosyayı doğrulayarak parça parça oku (büyük dosyalar diske spool edilir)
+        source = await _read_upload(file, model, reasoning_level, enhance_mode)
         
         # Model seçimine göre analiz yap
-        if model == "werk24-professional":
-            # Werk24 ile analiz
-            logger.info("🔧 Using Werk24 Professional API")
-            result = await werk24_analyzer.analyze(
-                file_bytes=file_bytes,
-                filename=file.filename,
-                confidence_threshold=0.7
-            )
-        else:
-            # Standart AI modelleri ile analiz
-            result = await analyzer.analyze(
-                file_bytes=file_bytes,
-                filename=file.filename,
-                model=model,
-                max_tokens=max_tokens,
-                reasoning_level=reasoning_level,
-                enhance_mode=enhance_mode
-            )
-        
-        return result
+        return await _cancel_on_disconnect(request, _run_analysis(
+            source,
+            file.filename,
+            model=model,
+            max_tokens=max_tokens,
+            reasoning_level=reasoning_level,
+            enhance_mode=enhance_mode,
+            use_cache=use_cache,
+            invalidate_cache=invalidate_cache,
+            pages=page_list,
+            analysis_mode=analysis_mode,
+            deadline=deadline
+        ))
         
     except AIKeyError as e:
         logger.error(f"❌ AI Key Error: {e.detail}")
@@ -98,9 +245,117 @@ async def analyze_drawing(
     except AnalysisError as e:
         logger.error(f"❌ Analysis Error: {e.detail}")
         raise HTTPException(status_code=500, detail=e.detail)
+    except CapacityError as e:
+        logger.warning(f"⚠️ Capacity Error: {e.detail}")
+        raise HTTPException(status_code=503, detail=e.detail)
+    except DeadlineExceededError as e:
+        logger.warning(f"⏱️ Deadline Exceeded: {e.detail}")
+        raise HTTPException(status_code=504, detail=e.detail)
+    except ClientDisconnectedError as e:
+        raise HTTPException(status_code=499, detail=e.detail)
     except Exception as e:
         logger.error(f"❌ Unexpected error: {e}")
         raise HTTPException(status_code=500, detail=f"Beklenmeyen hata: {str(e)}")
+    finally:
+        if source is not None:
+            source.cleanup()
+
+
+@router.post("/analyze/stream")
+async def analyze_drawing_stream(
+    file: UploadFile = File(..., description="2D teknik resim dosyası (PDF, PNG, JPG)"),
+    model: str = Form("gpt-5.2", description="AI modeli"),
+    max_tokens: int = Form(150000, description="Maksimum token"),
+    reasoning_level: str = Form("high", description="Düşünme seviyesi (medium|high|xhigh)"),
+    enhance_mode: str = Form("balanced", description="Görüntü iyileştirme (fast|balanced|aggressive)"),
+    use_cache: bool = Form(True, description="Önbelleği kullan (False = bypass)"),
+    invalidate_cache: bool = Form(False, description="Önbellek kaydını sil ve yeniden analiz et"),
+    pages: str = Form("1", description="Analiz edilecek sayfalar (örn. 1, 1,3 veya 2-4)"),
+    analysis_mode: str = Form("standard", description="Analiz modu (standard|tiled)"),
+    timeout_seconds: Optional[float] = Form(None, description="Analiz deadline'ı (saniye)"),
+    request_deadline: Optional[str] = Header(None, alias="X-Request-Deadline", description="Mutlak deadline (Unix zamanı)"),
+    request_timeout: Optional[str] = Header(None, alias="X-Request-Timeout", description="Deadline (saniye)")
+):
+    """
+    `/analyze` ile aynı analiz - aşama olayları Server-Sent Events olarak akar
+    
+    Dakikalarca süren `high`/`xhigh` analizlerde istemci hemen geri bildirim
+    alır; olay olmayan aralıklarda heartbeat yorumu bağlantıyı canlı tutar.
+    
+    Olaylar (`event:` adı, `data:` JSON; her biri `elapsed` ve `duration` saniyesi taşır):
+    - `uploaded`: Dosya alındı (boyut, SHA-256)
+    - `cache_hit`: Sonuç önbellekten geldi
+    - `rasterized` / `enhanced`: Ön işleme bitti (`stages`: aşama süreleri)
+    - `provider_call_started`: Model çağrısı başladı
+    - `first_token` / `tokens`: Model çıktı yazmaya başladı / akış ilerlemesi (`output_chars`)
+    - `section`: Kapanan üst düzey sonuç bölümü (`section` adı, `data` içeriği)
+    - `tile_analyzed` (tiled): Karo tamamlandı
+    - `parsed` / `validated`: Yanıt JSON'a ve DrawingAnalysisResult'a çevrildi
+    - `result`: Son `DrawingAnalysisResult` (`result` alanında)
+    - `error`: Analiz başarısız (`status_code`, `detail`)
+    
+    Deadline başlıkları `/analyze` ile aynıdır; bağlantı koparsa analiz iptal edilir.
+    """
+    try:
+        page_list = _parse_pages(pages)
+        _check_analysis_mode(analysis_mode)
+        deadline = deadline_from_request(request_deadline, request_timeout, timeout_seconds)
+        source = await _read_upload(file, model, reasoning_level, enhance_mode)
+    except FileProcessingError as e:
+        logger.error(f"❌ File Processing Error: {e.detail}")
+        raise HTTPException(status_code=422, detail=e.detail)
+    
+    filename = file.filename
+    progress = AnalysisProgress()
+    progress.emit("uploaded", filename=filename, size=source.size, sha256=source.sha256)
+    
+    async def _analyze():
+        try:
+            result = await _run_analysis(
+                source,
+                filename,
+                model=model,
+                max_tokens=max_tokens,
+                reasoning_level=reasoning_level,
+                enhance_mode=enhance_mode,
+                use_cache=use_cache,
+                invalidate_cache=invalidate_cache,
+                pages=page_list,
+                analysis_mode=analysis_mode,
+                progress=progress,
+                deadline=deadline
+            )
+            progress.emit("result", result=result.model_dump(mode="json"))
+        except DI2DException as e:
+            logger.error(f"❌ Streamed analysis failed: {e.detail}")
+            progress.emit("error", status_code=e.status_code, detail=e.detail)
+        except Exception as e:
+            logger.error(f"❌ Unexpected error: {e}")
+            progress.emit("error", status_code=500, detail=f"Beklenmeyen hata: {str(e)}")
+        finally:
+            progress.close()
+    
+    async def _events():
+        task = asyncio.create_task(_analyze())
+        try:
+            async for event in progress.events(settings.sse_heartbeat_interval):
+                if event is None:
+                    yield format_heartbeat(time.perf_counter() - progress.start)
+                else:
+                    yield format_sse(event)
+        finally:
+            # İstemci koptuysa analiz boşuna sürmesin
+            if not task.done():
+                record_cancelled("request", "disconnect")
+                task.cancel()
+            source.cleanup()
+    
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(source.cleanup)
+    )
 
 
 @router.get("/health")
@@ -115,10 +370,36 @@ async def health_check():
         "models_available": {
             "openai": analyzer.openai_client is not None,
             "anthropic": analyzer.anthropic_client is not None
+        },
+        "preprocess_pool": {
+            "workers": preprocess_pool.workers,
+            "pending": preprocess_pool.pending,
+            "max_queue": preprocess_pool.max_queue,
+            "cancelled": preprocess_pool.cancelled
+        },
+        "cancellations": cancellation_stats(),
+        "providers": {
+            name: {
+                **limiter.stats(),
+                "circuit": circuit_breakers[name].stats() if name in circuit_breakers else None
+            }
+            for name, limiter in provider_limiters.items()
         }
     }
 
 
+@router.get("/cache")
+async def cache_stats():
+    """
+    Önbellek istatistikleri (hit/miss sayaçları, birleştirilen eşzamanlı analizler)
+    """
+    return {
+        "results": result_cache.stats(),
+        "pages": page_cache.stats(),
+        "in_flight": analysis_flights.stats()
+    }
+
+
 @router.get("/models")
 async def list_models():
     """
@@ -197,6 +478,7 @@ async def compare_analysis(
     model1: str = Form("werk24-professional"),
     model2: str = Form("gpt-5.2"),
     reasoning_level: str = Form("medium"),
+    model_timeout: float = Form(settings.compare_model_timeout, description="Model başına zaman aşımı (saniye)"),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """
@@ -206,103 +488,41 @@ async def compare_analysis(
     - **model1**: İlk model (varsayılan: werk24-professional)
     - **model2**: İkinci model (varsayılan: gpt-5.2)
     - **reasoning_level**: GPT-5.2 için reasoning seviyesi (low/medium/high/xhigh)
+    - **model_timeout**: Her model için ayrı zaman aşımı
+    
+    Modeller eşzamanlı çalışır ve tek bir ön işleme sonucunu paylaşır.
+    Bir model başarısız olur veya zaman aşımına uğrarsa diğerinin sonucu
+    kısmi karşılaştırma olarak döner (`status`, `error` alanları).
     
     Returns:
         Karşılaştırmalı analiz sonuçları
     """
+    source = None
     try:
         logger.info(f"Karşılaştırmalı analiz başlatıldı: {model1} vs {model2}")
         
-        # Dosya kontrolü
-        if not file.filename:
-            raise FileProcessingError("Dosya adı bulunamadı")
-        
-        # Uzantı kontrolü
-        allowed_extensions = ['.pdf', '.png', '.jpg', '.jpeg']
-        file_ext = file.filename.lower()[-4:]
-        if not any(file_ext.endswith(ext) for ext in allowed_extensions):
-            raise FileProcessingError(f"Desteklenmeyen dosya formatı. İzin verilenler: {', '.join(allowed_extensions)}")
-        
-        # Dosyayı oku
-        file_bytes = await file.read()
-        
-        if len(file_bytes) == 0:
-            raise FileProcessingError("Boş dosya")
-        
-        if len(file_bytes) > 20 * 1024 * 1024:  # 20MB limit
-            raise FileProcessingError("Dosya çok büyük (max 20MB)")
-        
-        logger.info(f"📄 Received file: {file.filename} ({len(file_bytes)} bytes)")
-        
-        # Model 1 analizi
-        logger.info(f"🔍 Model 1 analizi başlıyor: {model1}")
-        if model1 == "werk24-professional":
-            result1 = await werk24_analyzer.analyze(
-                file_bytes=file_bytes,
-                filename=file.filename,
-                confidence_threshold=0.7
-            )
-        else:
-            result1 = await analyzer.analyze(
-                file_bytes=file_bytes,
-                filename=file.filename,
-                model=model1,
-                reasoning_level=reasoning_level
-            )
-        
-        # Pydantic model'i dict'e çevir
-        result1_dict = result1.model_dump() if hasattr(result1, 'model_dump') else result1
-        logger.info(f"✅ Model 1 tamamlandı ({result1_dict.get('metadata', {}).get('processing_time', 0):.2f}s)")
+        # Dosyayı doğrulayarak parça parça oku
+        source = await _read_upload(file, "compare", reasoning_level)
         
-        # Model 2 analizi
-        logger.info(f"🔍 Model 2 analizi başlıyor: {model2}")
-        if model2 == "werk24-professional":
-            result2 = await werk24_analyzer.analyze(
-                file_bytes=file_bytes,
-                filename=file.filename,
-                confidence_threshold=0.7
-            )
-        else:
-            result2 = await analyzer.analyze(
-                file_bytes=file_bytes,
-                filename=file.filename,
-                model=model2,
-                reasoning_level=reasoning_level
-            )
-        
-        # Pydantic model'i dict'e çevir
-        result2_dict = result2.model_dump() if hasattr(result2, 'model_dump') else result2
-        logger.info(f"✅ Model 2 tamamlandı ({result2_dict.get('metadata', {}).get('processing_time', 0):.2f}s)")
+        # İki modeli eşzamanlı çalıştır
+        entry1, entry2 = await compare_models(
+            [model1, model2],
+            source,
+            file.filename,
+            reasoning_level=reasoning_level,
+            timeout=model_timeout
+        )
         
         # Karşılaştırma raporu oluştur
+        timestamps = [
+            entry["result"]["metadata"].get("timestamp", "")
+            for entry in (entry1, entry2) if entry["result"]
+        ]
         comparison = {
-            "timestamp": result1_dict.get("metadata", {}).get("timestamp", ""),
-            "model1": {
-                "name": model1,
-                "provider": result1_dict.get("metadata", {}).get("model_provider", ""),
-                "processing_time": result1_dict.get("metadata", {}).get("processing_time", 0),
-                "confidence": result1_dict.get("metadata", {}).get("confidence_score", 0),
-                "result": result1_dict
-            },
-            "model2": {
-                "name": model2,
-                "provider": result2_dict.get("metadata", {}).get("model_provider", ""),
-                "processing_time": result2_dict.get("metadata", {}).get("processing_time", 0),
-                "confidence": result2_dict.get("metadata", {}).get("confidence_score", 0),
-                "result": result2_dict
-            },
-            "comparison_notes": {
-                "time_difference": abs(
-                    result1_dict.get("metadata", {}).get("processing_time", 0) - 
-                    result2_dict.get("metadata", {}).get("processing_time", 0)
-                ),
-                "confidence_difference": abs(
-                    result1_dict.get("metadata", {}).get("confidence_score", 0) - 
-                    result2_dict.get("metadata", {}).get("confidence_score", 0)
-                ),
-                "faster_model": model1 if result1_dict.get("metadata", {}).get("processing_time", 0) < result2_dict.get("metadata", {}).get("processing_time", 0) else model2,
-                "higher_confidence": model1 if result1_dict.get("metadata", {}).get("confidence_score", 0) > result2_dict.get("metadata", {}).get("confidence_score", 0) else model2
-            }
+            "timestamp": timestamps[0] if timestamps else "",
+            "model1": entry1,
+            "model2": entry2,
+            "comparison_notes": build_comparison_notes([entry1, entry2])
         }
         
         logger.info(f"Karşılaştırma tamamlandı: {comparison['comparison_notes']}")
@@ -317,6 +537,68 @@ async def compare_analysis(
     except AnalysisError as e:
         logger.error(f"❌ Analysis Error: {e.detail}")
         raise HTTPException(status_code=500, detail=e.detail)
+    except CapacityError as e:
+        logger.warning(f"⚠️ Capacity Error: {e.detail}")
+        raise HTTPException(status_code=503, detail=e.detail)
     except Exception as e:
         logger.error(f"❌ Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Karşılaştırma hatası: {str(e)}")
+    finally:
+        if source is not None:
+            source.cleanup()
+
+
+@router.post("/compare/stream")
+async def compare_analysis_stream(
+    file: UploadFile = File(...),
+    models: str = Form(
+        "werk24-professional,gpt-5.2:medium,gpt-5.2:high",
+        description="Virgülle ayrılmış model listesi, opsiyonel reasoning: model[:reasoning]"
+    ),
+    reasoning_level: str = Form("medium", description="Reasoning belirtilmeyen modeller için varsayılan"),
+    enhance_mode: str = Form("balanced"),
+    max_concurrency: int = Form(settings.compare_max_concurrency, description="Aynı anda çalışacak model sayısı"),
+    model_timeout: float = Form(settings.compare_model_timeout, description="Model başına zaman aşımı (saniye)")
+):
+    """
+    N modelli karşılaştırma - sonuçlar tamamlandıkça NDJSON akışı olarak döner
+    
+    Her satır bir JSON olayıdır:
+    - `started`: Çalışacak modeller
+    - `result`: Biten modelin sonucu (`entry`) ve o ana kadarki özet (`summary`)
+    - `done`: Son özet
+    
+    Hızlı modellerin sonuçları en yavaş modeli beklemeden kullanılabilir.
+    """
+    try:
+        specs = parse_model_specs(models, default_reasoning=reasoning_level)
+        if not specs:
+            raise FileProcessingError("En az bir model belirtilmeli")
+        if len(specs) > settings.compare_max_models:
+            raise FileProcessingError(f"En fazla {settings.compare_max_models} model karşılaştırılabilir")
+        
+        source = await _read_upload(file, "compare", reasoning_level, enhance_mode)
+        filename = file.filename
+        
+    except FileProcessingError as e:
+        logger.error(f"❌ File Processing Error: {e.detail}")
+        raise HTTPException(status_code=422, detail=e.detail)
+    
+    logger.info(f"N-model karşılaştırma başlatıldı: {specs}")
+    
+    async def _events():
+        try:
+            async for event in stream_comparison(
+                specs,
+                source,
+                filename,
+                enhance_mode=enhance_mode,
+                timeout=model_timeout,
+                max_concurrency=min(max_concurrency, settings.compare_max_concurrency)
+            ):
+                yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        finally:
+            source.cleanup()
+    
+    # İstemci akışı hiç tüketmeden koparsa da spool dosyası silinsin
+    return StreamingResponse(_events(), media_type="application/x-ndjson", background=BackgroundTask(source.cleanup))
@@ -2,7 +2,7 @@
 Configuration settings for DI-2D backend
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # Environment
@@ -16,16 +16,122 @@ class Settings(BaseSettings):
     # Werk24 API
     w24techread_auth_region: str = ""
     w24techread_auth_token: str = ""
+    werk24_hook_timeout: float = 2.0  # Okuma bittikten sonra eksik hook yanıtları için bekleme
     
     # AI Configuration
     default_model: str = "gpt-4-vision-preview"
     max_tokens: int = 150000
     temperature: float = 0.1
     
+    # Uploads
+    upload_max_bytes: int = 20 * 1024 * 1024
+    upload_chunk_size: int = 1024 * 1024
+    upload_spool_threshold: int = 1024 * 1024  # Bu boyutun üstündeki yüklemeler diske yazılır
+    upload_spool_dir: str = ""  # Boş = sistem geçici dizini
+
     # PDF Processing
     pdf_dpi: int = 400
     image_max_size: int = 4096
-    
+    max_pages_per_analysis: int = 10
+    denoiser: str = ""  # Boş = enhance_mode eşlemesi (fast: median, balanced: nlmeans_downscaled, aggressive: nlmeans)
+
+    # Provider Image Budget (sağlayıcıların efektif maksimum çözünürlükleri)
+    openai_image_max_side: int = 2048
+    openai_image_short_side: int = 768
+    anthropic_image_max_side: int = 1568
+    anthropic_image_max_megapixels: float = 1.15
+
+    # Image Encoding (png | png_gray | png_1bit | webp_lossless | jpeg)
+    image_encoder: str = "png_gray"  # Sağlayıcıya özgü olmayan varsayılan
+    openai_image_encoder: str = "png_gray"
+    anthropic_image_encoder: str = "webp_lossless"
+    png_compress_level: int = 3  # 0-9, yüksek = küçük ama yavaş
+    jpeg_quality: int = 92
+
+    # Tiled Analysis (A0/A1 montaj resimleri)
+    tile_size: int = 2048  # Hedef karo kenarı, kaynak piksel (örtüşme hariç)
+    tile_overlap: float = 0.15  # Komşu karolar arası örtüşme oranı
+    tile_max_tiles: int = 12  # Aşılırsa karolar büyütülür
+    tile_max_concurrency: int = 6  # Aynı anda analiz edilen karo sayısı
+    tile_dedupe_distance: float = 0.01  # Örtüşme tekrarları için eşleşme mesafesi (sayfa köşegenine oran)
+
+    # Preprocessing Process Pool
+    preprocess_workers: int = 0  # 0 = CPU sayısı / OpenCV thread sayısı
+    preprocess_opencv_threads: int = 2  # Her worker'daki OpenCV iç thread sayısı
+    preprocess_max_queue: int = 8  # Worker'lar doluyken bekleyebilecek iş sayısı
+    preprocess_shm_threshold: int = 1024 * 1024  # Bu boyutun üstündeki sayfalar shared memory ile döner
+    preprocess_start_method: str = "spawn"
+
+    # Provider HTTP Connection Pool
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 50
+    http_keepalive_expiry: float = 300.0  # saniye
+    http2_enabled: bool = True
+    http_connect_timeout: float = 10.0
+
+    # Provider çağrı zaman aşımları (saniye, reasoning seviyesine göre)
+    provider_timeout_medium: float = 600.0
+    provider_timeout_high: float = 1200.0
+    provider_timeout_xhigh: float = 2400.0
+
+    # Provider yanıt akışı
+    provider_streaming: bool = True  # Yanıtları akışlı al, kapanan JSON bölümlerini hemen bildir
+    stream_progress_interval: float = 1.0  # "tokens" ilerleme olayları arası en kısa süre (saniye)
+    prompt_cache_enabled: bool = True  # Anthropic cache_control + OpenAI prompt_cache_key
+
+    # Sağlayıcı kabul katmanı (eşzamanlı çağrı sınırı + dakika başı istek/token kovaları, 0 = sınırsız)
+    openai_max_in_flight: int = 8
+    openai_rpm: int = 60
+    openai_tpm: int = 2_000_000
+    anthropic_max_in_flight: int = 4
+    anthropic_rpm: int = 50
+    anthropic_tpm: int = 400_000
+    werk24_max_in_flight: int = 2
+    werk24_rpm: int = 10
+    provider_max_queue: int = 64  # Sağlayıcı başına kabul bekleyebilecek çağrı sayısı (dolunca 503)
+    rate_limit_initial_tokens: int = 30_000  # Gerçek kullanım öğrenilene kadar çağrı başı token tahmini
+    rate_limit_token_ewma: float = 0.2  # Tahminin gerçek tokens_used'a yaklaşma hızı
+
+    # Hedging: gözlenen gecikme yüzdeliği aşılınca yedek modelle paralel çağrı, ilk geçerli sonuç kazanır
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.9
+    hedge_min_samples: int = 20  # Bu kadar gözlem olmadan hedging yapılmaz
+    hedge_latency_window: int = 200  # (model, reasoning) başına tutulan son süre sayısı
+    model_alternates: Dict[str, str] = {  # Hedging ve devre açıkken yönlendirme için yedek model
+        "gpt-5.2": "claude-3-5-sonnet-20241022",
+        "claude-3-5-sonnet-20241022": "gpt-5.2"
+    }
+
+    # Sağlayıcı devre kesici
+    breaker_window: int = 20  # Değerlendirilen son çağrı sayısı
+    breaker_min_calls: int = 5
+    breaker_failure_ratio: float = 0.5  # Hatalı + yavaş çağrı oranı bu eşiği aşınca devre açılır
+    breaker_slow_ratio: float = 0.8  # Zaman aşımının bu oranını aşan çağrı yavaş sayılır
+    breaker_open_seconds: float = 120.0  # Açık kalma süresi, sonra tek deneme çağrısı
+
+    # Analiz deadline'ı (istek başlığı/form alanı yoksa, 0 = sınırsız) ve kopan istemci kontrolü
+    analysis_default_timeout: float = 2700.0  # xhigh zaman aşımından biraz uzun
+    disconnect_poll_interval: float = 2.0  # saniye
+
+    # Model Comparison
+    compare_model_timeout: float = 1800.0  # Model başına zaman aşımı (saniye)
+    compare_max_models: int = 8
+    compare_max_concurrency: int = 4
+
+    # Analiz ilerleme akışı (SSE)
+    sse_heartbeat_interval: float = 15.0  # Olay gelmezse bu aralıkla heartbeat (proxy idle timeout'undan kısa)
+
+    # Analysis Result Cache
+    result_cache_enabled: bool = True
+    result_cache_memory_entries: int = 256
+    result_cache_dir: str = ".cache/results"  # Boş = sadece bellek
+    result_cache_max_bytes: int = 512 * 1024 * 1024
+    result_cache_ttl: float = 7 * 24 * 3600  # saniye
+
+    # Preprocessed Page Image Cache
+    page_cache_enabled: bool = True
+    page_cache_max_bytes: int = 256 * 1024 * 1024
+
     # CORS
     cors_origins: List[str] = [
         "http://localhost:3001",  # DI-2D Frontend
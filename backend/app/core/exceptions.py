@@ -22,3 +22,23 @@ class AnalysisError(DI2DException):
     """Error during AI analysis"""
     def __init__(self, detail: str = "Analysis failed"):
         super().__init__(detail=detail, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class CapacityError(DI2DException):
+    """Server is at capacity (queue full)"""
+    def __init__(self, detail: str = "Server is busy, try again later"):
+        super().__init__(detail=detail, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+class DeadlineExceededError(DI2DException):
+    """Analysis deadline passed before the work finished"""
+    def __init__(self, detail: str = "Analysis deadline exceeded"):
+        super().__init__(detail=detail, status_code=status.HTTP_504_GATEWAY_TIMEOUT)
+
+class ClientDisconnectedError(DI2DException):
+    """Client went away, analysis was cancelled"""
+    def __init__(self, detail: str = "Client disconnected"):
+        super().__init__(detail=detail, status_code=499)
+
+class ProviderUnavailableError(CapacityError):
+    """AI provider circuit is open (provider failing or too slow)"""
+    def __init__(self, detail: str = "AI provider is temporarily unavailable, try again later"):
+        super().__init__(detail=detail)
@@ -45,6 +45,7 @@ class GeometryAnalysis(BaseModel):
     part_type: str = Field(..., description="Parça tipi (flanş, somun, kapak, vb.)")
     shape_type: str = Field(..., description="Genel şekil (silindirik, kutusal, karmaşık)")
     overall_dimensions: Dict[str, DimensionInfo] = Field(default_factory=dict)
+    dimensions: List[DimensionInfo] = Field(default_factory=list, description="Okunan tüm ölçüler (tiled mod)")
     features: List[FeatureInfo] = Field(default_factory=list)
     complexity_score: float = Field(..., ge=0, le=10, description="Karmaşıklık skoru (0-10)")
 
@@ -64,14 +65,52 @@ class QualityRequirements(BaseModel):
     inspection_notes: List[str] = Field(default_factory=list)
     critical_dimensions: List[str] = Field(default_factory=list)
 
+class ImageTransfer(BaseModel):
+    """Modele gönderilen tek görüntü (sayfa veya karo)"""
+    page: int
+    tile: Optional[int] = Field(None, description="Karo indeksi (tiled mod)")
+    width: int
+    height: int
+    encoded_bytes: Optional[int] = Field(None, description="Encode edilmiş boyut (bayt)")
+    encoder: Optional[str] = None
+    estimated_tokens: Optional[int] = Field(None, description="Tahmini image-token maliyeti")
+
+class AnalysisBreakdown(BaseModel):
+    """Aşama süreleri ve kaynak kullanımı - yavaş isteklerin yanıttan teşhisi için"""
+    stages: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Aşama -> süre (saniye), çalışma sırasıyla (upload_read, preprocess_queue, rasterize, ..., validate)"
+    )
+    preprocess_cached: bool = Field(False, description="Sayfalar sayfa önbelleğinden geldi (ön işleme yapılmadı)")
+    images: List[ImageTransfer] = Field(default_factory=list)
+    provider_calls: int = Field(0, description="Sağlayıcı çağrı sayısı (karolar ve hedging dahil)")
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    reasoning_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+    preprocess_cpu_time: Optional[float] = Field(None, description="Ön işleme worker'ının CPU süresi (saniye)")
+    cpu_time: Optional[float] = Field(None, description="Ön işleme + JSON parse + doğrulama CPU süresi (saniye)")
+
 class AnalysisMetadata(BaseModel):
     """Analiz metadata"""
     model_used: str
     processing_time: float = Field(..., description="İşlem süresi (saniye)")
     confidence_score: float = Field(..., ge=0, le=1, description="Güven skoru")
     tokens_used: Optional[int] = None
+    cached_tokens: Optional[int] = Field(None, description="Sağlayıcı prompt önbelleğinden okunan girdi token'ları")
+    queue_wait: Optional[float] = Field(None, description="Sağlayıcı kabul kuyruğunda bekleme süresi (saniye)")
     warnings: List[str] = Field(default_factory=list)
     timestamp: datetime = Field(default_factory=datetime.now)
+    cache_hit: bool = Field(False, description="Sonuç önbellekten mi döndü")
+    coalesced: bool = Field(False, description="Sonuç eşzamanlı aynı istekle paylaşıldı mı")
+    hedged: bool = Field(False, description="Gecikme nedeniyle yedek modelle paralel çağrı yapıldı mı")
+    image_width: Optional[int] = Field(None, description="Modele gönderilen görüntü genişliği (px)")
+    image_height: Optional[int] = Field(None, description="Modele gönderilen görüntü yüksekliği (px)")
+    estimated_image_tokens: Optional[int] = Field(None, description="Tahmini image-token maliyeti (tüm sayfalar)")
+    image_encoder: Optional[str] = Field(None, description="Görüntü encoder'ı (png_gray, webp_lossless, ...)")
+    image_bytes: Optional[int] = Field(None, description="Modele gönderilen toplam görüntü boyutu (bayt)")
+    encode_time: Optional[float] = Field(None, description="Görüntü encode süresi (saniye)")
+    breakdown: Optional[AnalysisBreakdown] = Field(None, description="Aşama süreleri, görüntüler, token ve CPU dökümü")
 
 class DrawingAnalysisResult(BaseModel):
     """Tam analiz sonucu"""
@@ -17,29 +17,76 @@ Desteklenen Modeller:
 - İmalat önerileri
 """
 import os
+import asyncio
 import base64
 import logging
-from typing import Dict, Any, Optional
-from openai import OpenAI
-from anthropic import Anthropic
+import time
+from typing import Dict, Any, Optional, List, Tuple, Union, AsyncIterator, Awaitable, Callable
+import openai
+import anthropic
+from openai import AsyncOpenAI
+from anthropic import AsyncAnthropic
 import json
 
 from app.core.config import settings
-from app.core.exceptions import AIKeyError, AnalysisError
-from app.models.analysis import DrawingAnalysisResult, AnalysisMetadata
-from .preprocessor import preprocess_drawing
-from .prompts import get_analysis_prompt
+from app.core.exceptions import (
+    AIKeyError,
+    AnalysisError,
+    CapacityError,
+    DeadlineExceededError,
+    FileProcessingError,
+    ProviderUnavailableError,
+)
+from app.models.analysis import (
+    DrawingAnalysisResult,
+    AnalysisMetadata,
+    AnalysisBreakdown,
+    ImageTransfer,
+    DimensionInfo,
+    FeatureInfo,
+    ToleranceInfo,
+)
+from .preprocess_pool import preprocess_pool
+from .http_client import get_http_client, provider_timeout, provider_timeout_seconds
+from .image_budget import image_provider
+from .prompts import get_analysis_prompt, get_tile_prompt, prompt_cache_key, PROMPT_VERSION
+from .tiling import merge_tile_items
+from .denoise import resolve_denoiser
+from .encoders import encoder_for
+from .cache import result_cache, page_cache, make_cache_key
+from .uploads import DrawingSource, as_source
+from .singleflight import analysis_flights
+from .rate_limit import provider_limiters
+from .resilience import circuit_breakers, latency_tracker
+from .deadline import Deadline, SharedDeadline, record_cancelled
+from .progress import AnalysisProgress, ProgressBroadcast, report
+from .json_stream import IncrementalJSONParser
+from . import metrics
 
 logger = logging.getLogger(__name__)
 
+ANALYSIS_MODES = ("standard", "tiled")
+
+# Hedging'de yedek model kazanınca birincil çağrının iptal mesajı
+HEDGE_LOST = "hedge_lost"
+
+
+def _check_pages(filename: str, pages: List[int]) -> None:
+    """Raster görüntüler tek sayfadır; 1 dışındaki sayfa istekleri reddedilir"""
+    if os.path.splitext(filename)[1].lower() != ".pdf" and pages != [1]:
+        raise FileProcessingError(f"Görüntü dosyalarında sadece 1. sayfa analiz edilebilir (istenen: {pages})")
+
 class DrawingAnalyzer:
     """Teknik resim analiz servisi"""
     
     def __init__(self):
-        """AI istemcilerini başlat"""
+        """AI istemcilerini başlat (paylaşılan async bağlantı havuzu üzerinde)"""
         # OpenAI
         if settings.openai_api_key:
-            self.openai_client = OpenAI(api_key=settings.openai_api_key)
+            self.openai_client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                http_client=get_http_client(openai)
+            )
             logger.info("✅ OpenAI client initialized")
         else:
             self.openai_client = None
@@ -47,7 +94,10 @@ class DrawingAnalyzer:
         
         # Anthropic
         if settings.anthropic_api_key:
-            self.anthropic_client = Anthropic(api_key=settings.anthropic_api_key)
+            self.anthropic_client = AsyncAnthropic(
+                api_key=settings.anthropic_api_key,
+                http_client=get_http_client(anthropic)
+            )
             logger.info("✅ Anthropic client initialized")
         else:
             self.anthropic_client = None
@@ -55,91 +105,763 @@ class DrawingAnalyzer:
     
     async def analyze(
         self,
-        file_bytes: bytes,
+        file_bytes: Union[bytes, DrawingSource],
         filename: str,
         model: str = "gpt-4-vision-preview",
         max_tokens: int = 150000,
         reasoning_level: str = "high",
-        enhance_mode: str = "balanced"
+        enhance_mode: str = "balanced",
+        use_cache: bool = True,
+        invalidate_cache: bool = False,
+        pages: Optional[List[int]] = None,
+        analysis_mode: str = "standard",
+        progress: Optional[AnalysisProgress] = None,
+        deadline: Optional[Deadline] = None
     ) -> DrawingAnalysisResult:
         """
         Teknik resmi analiz et
         
         Args:
-            file_bytes: Dosya baytları
+            file_bytes: Dosya baytları veya spool edilmiş yükleme (DrawingSource)
             filename: Dosya adı
             model: AI modeli
             max_tokens: Maksimum token sayısı
             reasoning_level: Düşünme seviyesi ("medium", "high", "xhigh")
             enhance_mode: Görüntü iyileştirme modu ("fast", "balanced", "aggressive")
+            use_cache: False ise önbellek okunmaz ve yazılmaz
+            invalidate_cache: True ise mevcut önbellek kaydı silinip analiz yeniden yapılır
+            pages: Analiz edilecek sayfa numaraları (varsayılan: sadece ilk sayfa)
+            analysis_mode: "standard" (tek görüntü) veya "tiled" (örtüşen karolar, A0/A1 için)
+            progress: Verilirse aşama olayları (rasterized, enhanced, provider_call_started, ...) buraya yazılır
+            deadline: Verilirse bu isteğin beklemesine uygulanır; paylaşılan iş, bekleyenlerin
+                en geç deadline'ına göre aşama kontrolü yapar ve son bekleyen ayrılınca iptal edilir
         
         Returns:
             Analiz sonucu
+        
+        Raises:
+            FileProcessingError: Görüntü (PDF olmayan) dosyada 1 dışında sayfa istendi
+                veya analysis_mode bilinmiyor
+            DeadlineExceededError: Deadline analiz bitmeden geçti
         """
-        import time
         start_time = time.time()
         
-        logger.info(f"🚀 Starting analysis: file={filename}, model={model}, reasoning={reasoning_level}")
+        # Çoğu teknik resim tek sayfa - varsayılan olarak sadece ilk sayfa işlenir
+        pages = sorted(set(pages or [1]))
+        _check_pages(filename, pages)
         
-        try:
-            # 1. Dosyayı ön işle
+        if analysis_mode not in ANALYSIS_MODES:
+            raise FileProcessingError(f"Desteklenmeyen analiz modu: {analysis_mode} ({' | '.join(ANALYSIS_MODES)})")
+        tiled = analysis_mode == "tiled"
+        
+        logger.info(
+            f"🚀 Starting analysis: file={filename}, model={model}, reasoning={reasoning_level}, "
+            f"pages={pages}, mode={analysis_mode}"
+        )
+        
+        # 0. Sonuç önbelleği
+        source = as_source(file_bytes, filename)
+        file_hash = source.sha256
+        provider = image_provider(model)
+        cache_key = make_cache_key(
+            file_hash,
+            model=model,
+            max_tokens=max_tokens,
+            reasoning_level=reasoning_level,
+            enhance_mode=enhance_mode,
+            denoiser=resolve_denoiser(enhance_mode, settings.denoiser),
+            encoder=encoder_for(provider),
+            dpi=settings.pdf_dpi,
+            prompt_version=PROMPT_VERSION,
+            confidence_threshold=None,
+            pages=pages,
+            analysis_mode=analysis_mode,
+            tiles=(settings.tile_size, settings.tile_overlap, settings.tile_max_tiles) if tiled else None
+        )
+        if invalidate_cache:
+            await result_cache.invalidate(cache_key)
+        if use_cache:
+            cached = await result_cache.get(cache_key)
+            metrics.record_cache_lookup("result", cached is not None)
+            if cached is not None:
+                cached.metadata.cache_hit = True
+                logger.info(f"⚡ Cache hit: file={filename}, model={model}")
+                report(progress, "cache_hit", model=model)
+                return cached
+        
+        def _observe(stage_name: str, seconds: Optional[float]) -> None:
+            metrics.observe_stage(stage_name, seconds, model, reasoning_level, enhance_mode)
+        
+        async def _run(
+            task_source: DrawingSource,
+            progress: AnalysisProgress,
+            deadline: Deadline
+        ) -> Tuple[DrawingAnalysisResult, bool]:
+            # Paylaşılan iş: istek başına seçenekler (use_cache, ilerleme kuyruğu, deadline) burada
+            # kullanılmaz; progress o an bekleyen tüm isteklere yayın yapar, deadline en geç olanıdır
+            stage = "preprocess"
+            # Aşama süreleri çalışma sırasıyla (metadata.breakdown)
+            stages: Dict[str, float] = {}
+            if source.read_time is not None:
+                stages["upload_read"] = source.read_time
+            try:
+                deadline.check(stage)
+                
+                # 1. Dosyayı ön işle (sadece istenen sayfalar, sağlayıcı bütçesine göre boyutlandırılmış)
+                preprocess_timings: Dict[str, float] = {}
+                page_list = await self.preprocess(
+                    task_source,
+                    filename,
+                    enhance_mode,
+                    file_hash=file_hash,
+                    pages=pages,
+                    providers=[provider],
+                    tiled=tiled,
+                    progress=progress,
+                    # Worker'a sabit deadline verilmez (sonradan katılan istek süreyi uzatabilir);
+                    # son bekleyen ayrılınca task iptal edilir ve worker iptal işaretiyle durur
+                    timings=preprocess_timings
+                )
+                preprocess_cached = not preprocess_timings
+                preprocess_cpu = preprocess_timings.pop("cpu_time", None)
+                stages.update(preprocess_timings)
+                metrics.observe_preprocess(preprocess_timings, model, reasoning_level, enhance_mode)
+                
+                # 2. Uygun modelle analiz et
+                stage = "provider_call"
+                self._check_provider_deadline(deadline, model, reasoning_level)
+                sent_images = page_list + [tile for page in page_list for tile in page.get("tiles", [])]
+                calls = 1 + len(sent_images) - len(page_list)
+                report(
+                    progress,
+                    "provider_call_started",
+                    model=model,
+                    reasoning_level=reasoning_level,
+                    images=len(sent_images),
+                    calls=calls
+                )
+                call_start = time.perf_counter()
+                if tiled:
+                    if provider in circuit_breakers and not circuit_breakers[provider].allow():
+                        raise ProviderUnavailableError(f"{provider} sağlayıcısı geçici olarak devre dışı (circuit open)")
+                    result_dict = await self._analyze_tiled(page_list, model, max_tokens, reasoning_level, progress)
+                    used_model = model
+                else:
+                    async def _pages_for(other_model: str) -> List[Dict[str, Any]]:
+                        # Yedek model farklı sağlayıcıdaysa görüntü onun bütçesine göre hazırlanır
+                        return await self.preprocess(
+                            task_source,
+                            filename,
+                            enhance_mode,
+                            file_hash=file_hash,
+                            pages=pages,
+                            providers=[image_provider(other_model)]
+                        )
+                    
+                    result_dict, used_model, page_list = await self._call_resilient(
+                        page_list, model, max_tokens, reasoning_level, _pages_for, progress
+                    )
+                    sent_images = page_list
+                    calls = 2 if result_dict.get("hedged") else 1
+                # Kabul kuyruğunda geçen süre sağlayıcı çağrısından ayrı raporlanır
+                stages["queue_wait"] = result_dict.get("queue_wait") or 0.0
+                stages["provider_call"] = max(0.0, time.perf_counter() - call_start - stages["queue_wait"])
+                parse_time = result_dict.get("parse_time")
+                if parse_time is not None:
+                    stages["json_parse"] = parse_time
+                for name in ("queue_wait", "provider_call", "json_parse"):
+                    _observe(name, stages.get(name))
+                report(progress, "parsed", tokens_used=result_dict.get("tokens_used"), sections=sorted(result_dict))
+                stage = "validate"
+                
+                # 3. Metadata ekle
+                processing_time = time.time() - start_time
+                result_dict["metadata"] = AnalysisMetadata(
+                    model_used=used_model,
+                    processing_time=processing_time,
+                    confidence_score=result_dict.get("confidence_score", 0.8),
+                    tokens_used=result_dict.get("tokens_used"),
+                    cached_tokens=result_dict.get("cached_tokens"),
+                    queue_wait=result_dict.get("queue_wait"),
+                    hedged=result_dict.get("hedged", False),
+                    warnings=result_dict.get("warnings", []),
+                    image_width=page_list[0]["width"],
+                    image_height=page_list[0]["height"],
+                    estimated_image_tokens=self._sum_image_tokens(sent_images),
+                    image_encoder=page_list[0].get("encoder"),
+                    image_bytes=sum(image.get("encoded_bytes") or 0 for image in sent_images),
+                    encode_time=sum(image.get("encode_time") or 0.0 for image in sent_images),
+                    breakdown=self._build_breakdown(
+                        stages, sent_images, result_dict, calls, preprocess_cached, preprocess_cpu
+                    )
+                )
+                
+                # 4. Pydantic modeline çevir
+                validate_start = time.perf_counter()
+                result = DrawingAnalysisResult(**result_dict)
+                validate_time = time.perf_counter() - validate_start
+                _observe("validate", validate_time)
+                # Doğrulama event loop thread'inde senkron çalışır; süresi CPU süresidir
+                result.metadata.breakdown.stages["validate"] = round(validate_time, 3)
+                result.metadata.breakdown.cpu_time = round(result.metadata.breakdown.cpu_time + validate_time, 3)
+                report(progress, "validated", processing_time=round(processing_time, 3))
+                
+                logger.info(f"✅ Analysis complete in {processing_time:.1f}s")
+                # Yedek modelin sonucu istenen modelin anahtarıyla önbelleğe yazılmaz
+                return result, used_model == model
+                
+            except (CapacityError, DeadlineExceededError) as e:
+                metrics.record_error(model, e)
+                raise
+            except asyncio.CancelledError:
+                # Son bekleyen ayrıldı (istemci koptu veya deadline doldu)
+                record_cancelled(stage, "cancelled")
+                raise
+            except Exception as e:
+                logger.error(f"❌ Analysis failed: {e}")
+                metrics.record_error(model, e)
+                raise AnalysisError(f"Analysis failed: {str(e)}")
+            finally:
+                task_source.cleanup()
+        
+        # Aynı anahtarlı eşzamanlı istekler tek analizi paylaşır (çift tıklama, yinelenen işler)
+        if cache_key in analysis_flights:
+            report(progress, "coalesced", model=model)
+        flight = analysis_flights.run(
+            cache_key,
+            lambda: _run(
+                source.share(),
+                ProgressBroadcast(lambda: [waiter[0] for waiter in analysis_flights.waiters(cache_key)]),
+                SharedDeadline(lambda: [waiter[1] for waiter in analysis_flights.waiters(cache_key)])
+            ),
+            waiter=(progress, deadline)
+        )
+        if deadline is None:
+            (result, cacheable), shared = await flight
+        else:
+            # Deadline bekleyen başına uygulanır: süresi dolan ayrılır, paylaşılan iş son bekleyenle iptal olur
+            try:
+                (result, cacheable), shared = await asyncio.wait_for(flight, timeout=max(0.0, deadline.remaining()))
+            except asyncio.TimeoutError:
+                record_cancelled("analysis", "deadline")
+                error = DeadlineExceededError(f"Analiz deadline içinde tamamlanamadı: {model}")
+                metrics.record_error(model, error)
+                raise error
+        # Önbelleğe yazma kararı her isteğin kendi use_cache seçeneğine göre verilir
+        if use_cache and cacheable:
+            await result_cache.set(cache_key, result)
+        if shared:
+            result = result.model_copy(deep=True)
+            result.metadata.coalesced = True
+        return result
+    
+    @staticmethod
+    def _check_provider_deadline(deadline: Deadline, model: str, reasoning_level: str) -> None:
+        """
+        Sağlayıcı çağrısından önce kalan süreyi kontrol et
+        
+        Kalan süre bu model/seviyenin gözlenen medyan süresinden kısaysa çağrı
+        büyük olasılıkla yarıda kesilecektir; para harcamadan hemen vazgeçilir.
+        """
+        deadline.check("provider_call")
+        typical = latency_tracker.percentile(model, reasoning_level, 0.5, settings.hedge_min_samples)
+        if typical is not None and deadline.remaining() < typical:
+            record_cancelled("provider_call", "deadline")
+            raise DeadlineExceededError(
+                f"Kalan süre ({deadline.remaining():.0f}s) {model} için tipik süreden ({typical:.0f}s) kısa"
+            )
+    
+    async def preprocess(
+        self,
+        file_bytes: Union[bytes, DrawingSource],
+        filename: str,
+        enhance_mode: str = "balanced",
+        file_hash: Optional[str] = None,
+        pages: Optional[List[int]] = None,
+        providers: Optional[List[Optional[str]]] = None,
+        tiled: bool = False,
+        progress: Optional[AnalysisProgress] = None,
+        deadline: Optional[Deadline] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Çizimin istenen sayfalarını ön işle (sayfa önbelleği + process pool)
+        
+        Sadece önbellekte olmayan sayfalar rasterize edilir. Birden fazla
+        sağlayıcı verilirse sayfa bir kez iyileştirilir, her sağlayıcı için
+        ayrı boyutlandırılmış çıktı üretilir.
+        
+        Args:
+            file_bytes: Dosya baytları veya DrawingSource
+            filename: Dosya adı
+            enhance_mode: Görüntü iyileştirme modu
+            file_hash: Önceden hesaplanmış SHA-256 (yoksa hesaplanır)
+            pages: Sayfa numaraları (varsayılan: [1])
+            providers: Görüntü bütçesi profilleri (varsayılan: [None])
+            tiled: True ise her sayfa girdisi "tiles" listesini de içerir
+            progress: Verilirse "rasterized" ve "enhanced" olayları yazılır
+            deadline: Worker aşama sınırlarında kontrol eder
+            timings: Verilirse worker kuyruğu ("preprocess_queue"), worker aşama süreleri
+                (rasterize, denoise, encode, ...) ve worker CPU süresi ("cpu_time") bu sözlüğe eklenir
+        
+        Returns:
+            Sayfa sırasına göre {"page", "provider", "image_base64", "width", "height", ...} listesi
+        
+        Raises:
+            FileProcessingError: Görüntü (PDF olmayan) dosyada 1 dışında sayfa istendi
+        """
+        source = as_source(file_bytes, filename)
+        file_hash = file_hash or source.sha256
+        dpi = settings.pdf_dpi
+        pages = pages or [1]
+        _check_pages(filename, sorted(set(pages)))
+        providers = providers or [None]
+        layout = "tiled" if tiled else None
+        
+        page_list = []
+        missing = []
+        for page_no in pages:
+            cached = [
+                page_cache.get(file_hash, dpi, enhance_mode, page_no, provider, layout)
+                for provider in providers
+            ]
+            hit = all(page_data is not None for page_data in cached)
+            metrics.record_cache_lookup("page", hit)
+            if hit:
+                page_list.extend(cached)
+            else:
+                missing.append(page_no)
+        
+        if missing:
+            # CPU-yoğun pipeline event loop'u bloklamasın diye process pool'da çalışır
             file_ext = os.path.splitext(filename)[1].lower()
-            preprocessed = preprocess_drawing(file_bytes, file_ext, enhance_mode=enhance_mode)
+            preprocessed = await preprocess_pool.process(
+                source.preprocess_input,
+                file_ext,
+                dpi=dpi,
+                enhance_mode=enhance_mode,
+                pages=missing,
+                providers=providers,
+                tiled=tiled,
+                deadline=deadline.expires_at if deadline is not None else None
+            )
             
-            if preprocessed["status"] != "success" or not preprocessed.get("pages"):
+            if preprocessed["status"] != "success":
                 raise AnalysisError("Failed to preprocess drawing")
             
-            # İlk sayfayı kullan (çoğu teknik resim tek sayfa)
-            page_data = preprocessed["pages"][0]
-            image_base64 = page_data["image_base64"]
+            for page in preprocessed["pages"]:
+                page_cache.set(file_hash, dpi, enhance_mode, page)
+            page_list.extend(preprocessed["pages"])
             
-            logger.info(f"✅ Preprocessed: {page_data['width']}x{page_data['height']}px")
-            
-            # 2. Uygun modelle analiz et
-            if model.startswith("gpt-"):
-                result_dict = await self._analyze_with_openai(
-                    image_base64, 
-                    model, 
-                    max_tokens,
-                    reasoning_level
+            # Worker tek iş olarak döner; aşama süreleri worker'ın ölçümlerinden gelir
+            worker_timings = preprocessed.get("timings") or {}
+            if timings is not None:
+                measured = {
+                    "preprocess_queue": preprocessed.get("queue_wait") or 0.0,
+                    **worker_timings,
+                    "cpu_time": preprocessed.get("cpu_time") or 0.0
+                }
+                for name, seconds in measured.items():
+                    timings[name] = timings.get(name, 0.0) + seconds
+            report(
+                progress,
+                "rasterized",
+                pages=missing,
+                cached=False,
+                stages=self._stage_timings(worker_timings, ("rasterize", "decode"))
+            )
+            report(
+                progress,
+                "enhanced",
+                cached=False,
+                denoiser=resolve_denoiser(enhance_mode, settings.denoiser),
+                stages=self._stage_timings(
+                    worker_timings, ("grayscale", "denoise", "contrast", "sharpen", "resize", "encode")
                 )
-            elif model.startswith("claude-"):
-                result_dict = await self._analyze_with_claude(
-                    image_base64,
+            )
+        else:
+            logger.info(f"⚡ Page cache hit: pages={pages}")
+            report(progress, "rasterized", pages=pages, cached=True, stages={})
+            report(progress, "enhanced", cached=True, stages={})
+        
+        if not page_list:
+            raise AnalysisError(f"Requested pages not found in drawing: {pages}")
+        
+        page_list.sort(key=lambda page: page["page"])
+        for page in page_list:
+            logger.info(
+                f"✅ Preprocessed page {page['page']} ({page.get('provider') or 'default'}): "
+                f"{page['width']}x{page['height']}px, ~{page.get('estimated_image_tokens')} image tokens"
+            )
+        return page_list
+    
+    async def _call_model(
+        self,
+        images: List[Dict[str, Any]],
+        model: str,
+        max_tokens: int,
+        reasoning_level: str,
+        prompts: Optional[Tuple[str, str]] = None,
+        progress: Optional[AnalysisProgress] = None
+    ) -> Dict[str, Any]:
+        """
+        Model adına göre uygun sağlayıcıyı çağır
+        
+        images: "image_base64" + "media_type" içeren sayfa/karo girdileri.
+        progress verilirse akış sırasında "first_token", "tokens" ve "section" olayları yazılır.
+        Çağrı sağlayıcının kabul kuyruğundan geçer; bekleme süresi "queue_wait" alanına yazılır.
+        """
+        if model.startswith("gpt-"):
+            provider, call = "openai", self._analyze_with_openai
+        elif model.startswith("claude-"):
+            provider, call = "anthropic", self._analyze_with_claude
+        else:
+            raise AnalysisError(f"Unsupported model: {model}")
+        
+        breaker = circuit_breakers[provider]
+        async with provider_limiters[provider].admit(progress) as admission:
+            call_start = time.perf_counter()
+            try:
+                result = await call(images, model, max_tokens, reasoning_level, prompts, progress)
+            except asyncio.CancelledError as e:
+                if e.args and e.args[0] == HEDGE_LOST:
+                    # Yedek model kazandı: çağrı en az bu kadar sürdü (alt sınır örneği), yavaş sayılır
+                    elapsed = time.perf_counter() - call_start
+                    breaker.record_slow(elapsed)
+                    if prompts is None:
+                        latency_tracker.record(model, reasoning_level, elapsed)
+                else:
+                    # İstemci koptu / deadline - sağlayıcının sağlığını göstermez
+                    breaker.record_abandoned()
+                raise
+            except AIKeyError:
+                # Yapılandırma hatası sağlayıcının sağlığını göstermez
+                breaker.record_abandoned()
+                raise
+            except Exception:
+                breaker.record_failure()
+                raise
+            duration = time.perf_counter() - call_start
+            breaker.record_success(duration, provider_timeout_seconds(reasoning_level))
+            if prompts is None:
+                # Karo çağrıları kısa sürer; hedging dağılımı sadece tam çizim çağrılarından
+                latency_tracker.record(model, reasoning_level, duration)
+            admission.tokens_used = result.get("tokens_used")
+        metrics.record_tokens(model, reasoning_level, result.get("tokens_used"), result.get("cached_tokens"))
+        result["queue_wait"] = admission.queue_wait
+        return result
+    
+    async def _call_resilient(
+        self,
+        page_list: List[Dict[str, Any]],
+        model: str,
+        max_tokens: int,
+        reasoning_level: str,
+        pages_for: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+        progress: Optional[AnalysisProgress] = None
+    ) -> Tuple[Dict[str, Any], str, List[Dict[str, Any]]]:
+        """
+        Devre kesici ve hedging ile model çağrısı
+        
+        - Sağlayıcının devresi açıksa istek yedek modele yönlenir (yedek yoksa
+          ya da onun da devresi açıksa hemen ProviderUnavailableError)
+        - hedge_enabled ise birincil çağrı gözlenen gecikmenin hedge_percentile
+          yüzdeliğini aşınca yedek modelle ikinci çağrı başlar; ilk geçerli
+          sonuç kazanır, diğeri iptal edilir
+        
+        Args:
+            pages_for: Başka bir model için sayfa görüntülerini hazırlayan coroutine
+        
+        Returns:
+            (sonuç sözlüğü, sonucu üreten model, o modele gönderilen sayfalar)
+        """
+        alternate = settings.model_alternates.get(model)
+        
+        def alternate_allowed() -> bool:
+            breaker = circuit_breakers.get(image_provider(alternate)) if alternate else None
+            return breaker is not None and breaker.allow()
+        
+        breaker = circuit_breakers.get(image_provider(model))
+        if breaker is not None and not breaker.allow():
+            if not alternate_allowed():
+                raise ProviderUnavailableError(f"{model} geçici olarak devre dışı (circuit open)")
+            logger.warning(f"🔀 Circuit open for {model}, routing to {alternate}")
+            report(progress, "rerouted", model=model, alternate=alternate)
+            alt_pages = await pages_for(alternate)
+            result = await self._call_model(alt_pages, alternate, max_tokens, reasoning_level, progress=progress)
+            result.setdefault("warnings", []).append(f"{model} devre dışı olduğu için {alternate} ile analiz edildi")
+            return result, alternate, alt_pages
+        
+        delay = None
+        if settings.hedge_enabled and alternate:
+            delay = latency_tracker.percentile(
+                model, reasoning_level, settings.hedge_percentile, settings.hedge_min_samples
+            )
+        
+        primary = asyncio.create_task(
+            self._call_model(page_list, model, max_tokens, reasoning_level, progress=progress)
+        )
+        tasks = {primary}
+        winner = None
+        try:
+            if delay is None:
+                return await primary, model, page_list
+            
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not alternate_allowed():
+                return await primary, model, page_list
+            
+            logger.info(f"🏁 Hedging {model} with {alternate} after {delay:.0f}s")
+            report(progress, "hedged", model=model, alternate=alternate, after=round(delay, 3))
+            
+            async def _backup() -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+                alt_pages = await pages_for(alternate)
+                return await self._call_model(alt_pages, alternate, max_tokens, reasoning_level), alt_pages
+            
+            backup = asyncio.create_task(_backup())
+            tasks.add(backup)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (primary, backup):
+                    if task in done and task.exception() is None:
+                        if task is primary:
+                            result, used_model, used_pages = task.result(), model, page_list
+                        else:
+                            (result, used_pages), used_model = task.result(), alternate
+                            result.setdefault("warnings", []).append(
+                                f"{model} yanıtı gecikti, sonuç yedek model {alternate} ile üretildi"
+                            )
+                        result["hedged"] = True
+                        winner = task
+                        logger.info(f"🏁 Hedge won by {used_model}")
+                        return result, used_model, used_pages
+            
+            # İkisi de başarısız - birincil modelin hatası raporlanır
+            raise primary.exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    # Geride kalan birincil çağrı gecikme dağılımına ve devre kesiciye yavaş olarak yansır
+                    task.cancel(HEDGE_LOST if winner is not None and task is primary else None)
+    
+    async def _analyze_tiled(
+        self,
+        page_list: List[Dict[str, Any]],
+        model: str,
+        max_tokens: int,
+        reasoning_level: str,
+        progress: Optional[AnalysisProgress] = None
+    ) -> Dict[str, Any]:
+        """
+        Tiled analiz: genel görünüm + karolar eşzamanlı, sonuçlar birleştirilir
+        
+        Genel görünüm çağrısı antet, malzeme ve imalat bilgilerini verir;
+        ölçüler, özellikler ve toleranslar karolardan toplanıp örtüşme
+        tekrarları mekânsal olarak elenir. Toplam süre en yavaş çağrıya eşittir.
+        """
+        tiles = [tile for page in page_list for tile in page.get("tiles", [])]
+        grids = {
+            page["page"]: (
+                max(tile["row"] for tile in page["tiles"]) + 1,
+                max(tile["col"] for tile in page["tiles"]) + 1
+            )
+            for page in page_list if page.get("tiles")
+        }
+        semaphore = asyncio.Semaphore(max(1, settings.tile_max_concurrency))
+        
+        async def _analyze_tile(tile: Dict[str, Any]) -> Dict[str, Any]:
+            rows, cols = grids[tile["page"]]
+            async with semaphore:
+                output = await self._call_model(
+                    [tile],
                     model,
-                    max_tokens
+                    max_tokens,
+                    reasoning_level,
+                    prompts=get_tile_prompt(tile["row"], tile["col"], rows, cols)
                 )
+            report(progress, "tile_analyzed", page=tile["page"], index=tile["index"], total=len(tiles))
+            return output
+        
+        logger.info(f"🧩 Tiled analysis: {len(tiles)} tiles + overview, concurrency={settings.tile_max_concurrency}")
+        overview, *tile_outputs = await asyncio.gather(
+            self._call_model(page_list, model, max_tokens, reasoning_level, progress=progress),
+            *[_analyze_tile(tile) for tile in tiles],
+            return_exceptions=True
+        )
+        if isinstance(overview, BaseException):
+            raise overview
+        
+        result_dict = overview
+        warnings = list(result_dict.get("warnings") or [])
+        tile_results = []
+        for tile, output in zip(tiles, tile_outputs):
+            if isinstance(output, BaseException):
+                logger.warning(f"⚠️ Tile {tile['index']} (page {tile['page']}) failed: {output}")
             else:
-                raise AnalysisError(f"Unsupported model: {model}")
+                tile_results.append((tile, output))
+        
+        if len(tile_results) < len(tiles):
+            warnings.append(f"{len(tiles) - len(tile_results)}/{len(tiles)} karo analiz edilemedi, sonuç eksik olabilir")
+        
+        if tile_results:
+            distance = settings.tile_dedupe_distance
+            geometry = result_dict.setdefault("geometry", {})
+            geometry["dimensions"] = self._valid_items(
+                DimensionInfo, merge_tile_items("dimensions", tile_results, distance)
+            )
+            features = self._valid_items(FeatureInfo, merge_tile_items("features", tile_results, distance))
+            if features:
+                geometry["features"] = features
+            
+            tolerances = self._valid_items(ToleranceInfo, merge_tile_items("tolerances", tile_results, distance))
+            if tolerances:
+                result_dict.setdefault("quality", {})["tolerances"] = tolerances
             
-            # 3. Metadata ekle
-            processing_time = time.time() - start_time
-            result_dict["metadata"] = AnalysisMetadata(
-                model_used=model,
-                processing_time=processing_time,
-                confidence_score=result_dict.get("confidence_score", 0.8),
-                tokens_used=result_dict.get("tokens_used"),
-                warnings=result_dict.get("warnings", [])
+            notes = list(result_dict.get("general_notes") or [])
+            for _, output in tile_results:
+                notes.extend(note for note in output.get("notes") or [] if isinstance(note, str) and note not in notes)
+            result_dict["general_notes"] = notes
+            
+            result_dict["parse_time"] = sum(
+                [result_dict.get("parse_time") or 0.0] + [output.get("parse_time") or 0.0 for _, output in tile_results]
+            )
+            for key in ("tokens_used", "input_tokens", "output_tokens", "reasoning_tokens", "cached_tokens"):
+                tokens = [result_dict.get(key)] + [output.get(key) for _, output in tile_results]
+                result_dict[key] = sum(t for t in tokens if t) or None
+            # Karolar paralel beklediği için gecikmeye etkisi en uzun bekleyiştir
+            result_dict["queue_wait"] = max(
+                [result_dict.get("queue_wait") or 0.0] + [output.get("queue_wait") or 0.0 for _, output in tile_results]
             )
             
-            # 4. Pydantic modeline çevir
-            result = DrawingAnalysisResult(**result_dict)
+            logger.info(
+                f"✅ Tiles merged: {len(geometry['dimensions'])} dimensions, "
+                f"{len(geometry.get('features', []))} features, {len(tolerances)} tolerances"
+            )
+        
+        result_dict["warnings"] = warnings
+        return result_dict
+    
+    @staticmethod
+    def _valid_items(model_cls, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Şemaya uymayan karo öğelerini at (tek hatalı öğe tüm sonucu düşürmesin)"""
+        valid = []
+        for item in items:
+            try:
+                valid.append(model_cls.model_validate(item).model_dump())
+            except Exception:
+                logger.warning(f"⚠️ Skipping invalid {model_cls.__name__}: {item}")
+        return valid
+    
+    @staticmethod
+    async def _collect_stream(deltas: AsyncIterator[str], progress: Optional[AnalysisProgress]) -> str:
+        """
+        Akan metin parçalarını topla
+        
+        Kapanan üst düzey JSON bölümleri (title_block, material, geometry, ...)
+        hemen "section" olayı olarak yazılır; "tokens" olayı en fazla
+        stream_progress_interval saniyede bir gönderilir.
+        
+        Returns:
+            Modelin tam çıktı metni
+        """
+        parser = IncrementalJSONParser()
+        parts: List[str] = []
+        output_chars = 0
+        start = last_report = time.perf_counter()
+        
+        async for delta in deltas:
+            if not delta:
+                continue
+            if not parts:
+                logger.info(f"✍️ First output after {time.perf_counter() - start:.1f}s")
+                report(progress, "first_token")
+            parts.append(delta)
+            output_chars += len(delta)
             
-            logger.info(f"✅ Analysis complete in {processing_time:.1f}s")
-            return result
+            for section, value in parser.feed(delta):
+                report(progress, "section", section=section, data=value)
             
-        except Exception as e:
-            logger.error(f"❌ Analysis failed: {e}")
-            raise AnalysisError(f"Analysis failed: {str(e)}")
+            now = time.perf_counter()
+            if now - last_report >= settings.stream_progress_interval:
+                report(progress, "tokens", output_chars=output_chars, deltas=len(parts))
+                last_report = now
+        
+        return "".join(parts)
+    
+    @staticmethod
+    def _detail_tokens(details: Any, field: str) -> Optional[int]:
+        """OpenAI usage ayrıntısından token sayısı (cached_tokens, reasoning_tokens)"""
+        return getattr(details, field, None) if details is not None else None
+    
+    @staticmethod
+    def _build_breakdown(
+        stages: Dict[str, float],
+        sent_images: List[Dict[str, Any]],
+        result_dict: Dict[str, Any],
+        calls: int,
+        preprocess_cached: bool,
+        preprocess_cpu: Optional[float]
+    ) -> AnalysisBreakdown:
+        """Aşama süreleri, gönderilen görüntüler, token ve CPU dökümü (validate sonradan eklenir)"""
+        return AnalysisBreakdown(
+            stages={name: round(seconds, 3) for name, seconds in stages.items()},
+            preprocess_cached=preprocess_cached,
+            images=[
+                ImageTransfer(
+                    page=image["page"],
+                    tile=image.get("index"),
+                    width=image["width"],
+                    height=image["height"],
+                    encoded_bytes=image.get("encoded_bytes"),
+                    encoder=image.get("encoder"),
+                    estimated_tokens=image.get("estimated_image_tokens")
+                )
+                for image in sent_images
+            ],
+            provider_calls=calls,
+            input_tokens=result_dict.get("input_tokens"),
+            output_tokens=result_dict.get("output_tokens"),
+            reasoning_tokens=result_dict.get("reasoning_tokens"),
+            cached_tokens=result_dict.get("cached_tokens"),
+            preprocess_cpu_time=round(preprocess_cpu, 3) if preprocess_cpu is not None else None,
+            # JSON parse event loop'ta senkron çalışır (CPU süresi ~ duvar saati)
+            cpu_time=round((preprocess_cpu or 0.0) + (result_dict.get("parse_time") or 0.0), 3)
+        )
+    
+    @staticmethod
+    def _stage_timings(timings: Dict[str, float], stages: Tuple[str, ...]) -> Dict[str, float]:
+        """Ön işleme sürelerinden istenen aşamaları seç (saniye, yuvarlanmış)"""
+        return {stage: round(timings[stage], 3) for stage in stages if stage in timings}
+    
+    @staticmethod
+    def _sum_image_tokens(page_list: List[Dict[str, Any]]) -> Optional[int]:
+        """Sayfaların tahmini image-token toplamı (bilinmiyorsa None)"""
+        tokens = [page.get("estimated_image_tokens") for page in page_list]
+        if any(token is None for token in tokens):
+            return None
+        return sum(tokens)
+    
+    @staticmethod
+    def _multi_page_note(page_count: int) -> str:
+        """Birden fazla sayfa gönderildiğinde prompt'a eklenen not"""
+        if page_count <= 1:
+            return ""
+        return (
+            f"\n\nNOT: Bu çizim {page_count} sayfadan oluşuyor ve görüntüler sayfa sırasıyla verildi. "
+            "Tüm sayfaları birlikte değerlendirip TEK bir JSON sonucu döndür."
+        )
     
     async def _analyze_with_openai(
         self,
-        image_base64: str,
+        images: List[Dict[str, Any]],
         model: str,
         max_tokens: int,
-        reasoning_level: str
+        reasoning_level: str,
+        prompts: Optional[Tuple[str, str]] = None,
+        progress: Optional[AnalysisProgress] = None
     ) -> Dict[str, Any]:
-        """OpenAI GPT-5.2 / GPT-4 Vision ile analiz"""
+        """OpenAI GPT-5.2 / GPT-4 Vision ile analiz (prompts verilirse varsayılan prompt yerine kullanılır)"""
         if not self.openai_client:
             raise AIKeyError("OpenAI API key not configured")
         
@@ -147,27 +869,31 @@ class DrawingAnalyzer:
         
         try:
             # Prompt'u oluştur
-            system_prompt, user_prompt = get_analysis_prompt("openai", reasoning_level)
+            system_prompt, user_prompt = prompts or get_analysis_prompt("openai", reasoning_level)
+            user_prompt += self._multi_page_note(len(images))
             
             # GPT-5.2 için Responses API kullan
             if model in ["gpt-5.2", "gpt-5.2-chat", "gpt-5", "gpt-5-chat"]:
                 return await self._analyze_with_gpt52(
-                    image_base64,
+                    images,
                     model,
                     system_prompt,
                     user_prompt,
                     max_tokens,
-                    reasoning_level
+                    reasoning_level,
+                    progress
                 )
             
             # Eski modeller için Chat Completions API (geri uyumluluk)
             else:
                 return await self._analyze_with_gpt4_legacy(
-                    image_base64,
+                    images,
                     model,
                     system_prompt,
                     user_prompt,
-                    max_tokens
+                    max_tokens,
+                    reasoning_level,
+                    progress
                 )
             
         except json.JSONDecodeError as e:
@@ -179,16 +905,17 @@ class DrawingAnalyzer:
     
     async def _analyze_with_gpt52(
         self,
-        image_base64: str,
+        images: List[Dict[str, Any]],
         model: str,
         system_prompt: str,
         user_prompt: str,
         max_tokens: int,
-        reasoning_level: str
+        reasoning_level: str,
+        progress: Optional[AnalysisProgress] = None
     ) -> Dict[str, Any]:
         """
         GPT-5.2 Responses API ile analiz
-        Yeni reasoning parametreleri kullanılır
+        Yeni reasoning parametreleri kullanılır (provider_streaming açıksa akışlı)
         """
         logger.info(f"🚀 Using GPT-5.2 Responses API (reasoning: {reasoning_level})")
         
@@ -201,41 +928,76 @@ class DrawingAnalyzer:
         effort = effort_map.get(reasoning_level, "high")
         
         # Responses API çağrısı
-        response = self.openai_client.responses.create(
+        request = dict(
             model=model,
             input=[
                 {"type": "text", "text": f"{system_prompt}\n\n{user_prompt}"},
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{image_base64}",
-                        "detail": "high"
+                *[
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{image['media_type']};base64,{image['image_base64']}",
+                            "detail": "high"
+                        }
                     }
-                }
+                    for image in images
+                ]
             ],
             reasoning={"effort": effort},
             text={"verbosity": "high"},  # Detaylı analiz istiyoruz
             max_output_tokens=max_tokens,
+            timeout=provider_timeout(openai, reasoning_level),
         )
+        if settings.prompt_cache_enabled:
+            request["prompt_cache_key"] = prompt_cache_key(system_prompt)
+        
+        if settings.provider_streaming:
+            stream = await self.openai_client.responses.create(**request, stream=True)
+            final = {}
+            
+            async def _deltas():
+                async for event in stream:
+                    if event.type == "response.output_text.delta":
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        final["response"] = event.response
+            
+            # İptal (hedge / istemci kopması / deadline) veya hata ile çıkışta bağlantı hemen kapanır, üretim durur
+            async with stream:
+                content = await self._collect_stream(_deltas(), progress)
+            response = final.get("response")
+        else:
+            response = await self.openai_client.responses.create(**request)
+            content = response.output_text
         
         # Yanıtı parse et
-        content = response.output_text
+        parse_start = time.perf_counter()
         result = json.loads(content)
+        result["parse_time"] = time.perf_counter() - parse_start
         
         # Token bilgisi (varsa)
-        if hasattr(response, 'usage'):
-            result["tokens_used"] = response.usage.total_tokens
+        usage = getattr(response, 'usage', None)
+        if usage:
+            result["tokens_used"] = usage.total_tokens
+            result["input_tokens"] = usage.input_tokens
+            result["output_tokens"] = usage.output_tokens
+            result["reasoning_tokens"] = self._detail_tokens(
+                getattr(usage, "output_tokens_details", None), "reasoning_tokens"
+            )
+            result["cached_tokens"] = self._detail_tokens(getattr(usage, "input_tokens_details", None), "cached_tokens")
         
-        logger.info(f"✅ GPT-5.2 analysis complete. Tokens: {result.get('tokens_used')}")
+        logger.info(f"✅ GPT-5.2 analysis complete. Tokens: {result.get('tokens_used')} (cached: {result.get('cached_tokens')})")
         return result
     
     async def _analyze_with_gpt4_legacy(
         self,
-        image_base64: str,
+        images: List[Dict[str, Any]],
         model: str,
         system_prompt: str,
         user_prompt: str,
-        max_tokens: int
+        max_tokens: int,
+        reasoning_level: str,
+        progress: Optional[AnalysisProgress] = None
     ) -> Dict[str, Any]:
         """
         GPT-4 Vision - Chat Completions API (geri uyumluluk)
@@ -243,7 +1005,7 @@ class DrawingAnalyzer:
         logger.info(f"📟 Using legacy Chat Completions API for {model}")
         
         # API çağrısı
-        response = self.openai_client.chat.completions.create(
+        request = dict(
             model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -251,37 +1013,74 @@ class DrawingAnalyzer:
                     "role": "user",
                     "content": [
                         {"type": "text", "text": user_prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{image_base64}",
-                                "detail": "high"
+                        *[
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:{image['media_type']};base64,{image['image_base64']}",
+                                    "detail": "high"
+                                }
                             }
-                        }
+                            for image in images
+                        ]
                     ]
                 }
             ],
             max_tokens=max_tokens,
-            temperature=settings.temperature
+            temperature=settings.temperature,
+            timeout=provider_timeout(openai, reasoning_level)
         )
+        if settings.prompt_cache_enabled:
+            request["prompt_cache_key"] = prompt_cache_key(system_prompt)
         
-        # Yanıtı parse et
-        content = response.choices[0].message.content
+        if settings.provider_streaming:
+            stream = await self.openai_client.chat.completions.create(
+                **request, stream=True, stream_options={"include_usage": True}
+            )
+            final = {}
+            
+            async def _deltas():
+                async for chunk in stream:
+                    if chunk.usage:
+                        final["usage"] = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            
+            # İptal (hedge / istemci kopması / deadline) veya hata ile çıkışta bağlantı hemen kapanır, üretim durur
+            async with stream:
+                content = await self._collect_stream(_deltas(), progress)
+            usage = final.get("usage")
+        else:
+            response = await self.openai_client.chat.completions.create(**request)
+            content = response.choices[0].message.content
+            usage = response.usage
         
         # JSON parse et
+        parse_start = time.perf_counter()
         result = json.loads(content)
-        result["tokens_used"] = response.usage.total_tokens if response.usage else None
+        result["parse_time"] = time.perf_counter() - parse_start
+        result["tokens_used"] = usage.total_tokens if usage else None
+        if usage:
+            result["input_tokens"] = usage.prompt_tokens
+            result["output_tokens"] = usage.completion_tokens
+            result["reasoning_tokens"] = self._detail_tokens(
+                getattr(usage, "completion_tokens_details", None), "reasoning_tokens"
+            )
+        result["cached_tokens"] = self._detail_tokens(getattr(usage, "prompt_tokens_details", None), "cached_tokens")
         
-        logger.info(f"✅ GPT-4 legacy analysis complete. Tokens: {result.get('tokens_used')}")
+        logger.info(f"✅ GPT-4 legacy analysis complete. Tokens: {result.get('tokens_used')} (cached: {result.get('cached_tokens')})")
         return result
     
     async def _analyze_with_claude(
         self,
-        image_base64: str,
+        images: List[Dict[str, Any]],
         model: str,
-        max_tokens: int
+        max_tokens: int,
+        reasoning_level: str = "high",
+        prompts: Optional[Tuple[str, str]] = None,
+        progress: Optional[AnalysisProgress] = None
     ) -> Dict[str, Any]:
-        """Anthropic Claude ile analiz"""
+        """Anthropic Claude ile analiz (prompts verilirse varsayılan prompt yerine kullanılır)"""
         if not self.anthropic_client:
             raise AIKeyError("Anthropic API key not configured")
         
@@ -289,43 +1088,69 @@ class DrawingAnalyzer:
         
         try:
             # Prompt'u oluştur
-            system_prompt, user_prompt = get_analysis_prompt("claude", "high")
+            system_prompt, user_prompt = prompts or get_analysis_prompt("claude", "high")
+            user_prompt += self._multi_page_note(len(images))
+            
+            # Önbellek dostu düzen: sabit system + talimat önce (cache_control), görüntüler en sonda
+            cache_control = {"cache_control": {"type": "ephemeral"}} if settings.prompt_cache_enabled else {}
             
             # API çağrısı
-            response = self.anthropic_client.messages.create(
+            request = dict(
                 model=model,
                 max_tokens=max_tokens,
                 temperature=settings.temperature,
-                system=system_prompt,
+                system=[{"type": "text", "text": system_prompt, **cache_control}],
                 messages=[
                     {
                         "role": "user",
                         "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/png",
-                                    "data": image_base64
-                                }
-                            },
                             {
                                 "type": "text",
-                                "text": user_prompt
-                            }
+                                "text": user_prompt,
+                                **cache_control
+                            },
+                            *[
+                                {
+                                    "type": "image",
+                                    "source": {
+                                        "type": "base64",
+                                        "media_type": image["media_type"],
+                                        "data": image["image_base64"]
+                                    }
+                                }
+                                for image in images
+                            ]
                         ]
                     }
-                ]
+                ],
+                timeout=provider_timeout(anthropic, reasoning_level)
             )
             
-            # Yanıtı parse et
-            content = response.content[0].text
+            if settings.provider_streaming:
+                async with self.anthropic_client.messages.stream(**request) as stream:
+                    content = await self._collect_stream(stream.text_stream, progress)
+                    response = await stream.get_final_message()
+            else:
+                response = await self.anthropic_client.messages.create(**request)
+                content = response.content[0].text
             
             # JSON parse et
+            parse_start = time.perf_counter()
             result = json.loads(content)
-            result["tokens_used"] = response.usage.input_tokens + response.usage.output_tokens if hasattr(response, 'usage') else None
+            result["parse_time"] = time.perf_counter() - parse_start
+            usage = getattr(response, 'usage', None)
+            if usage:
+                # input_tokens önbellekten okunan/yazılan token'ları içermez
+                cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+                cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+                result["tokens_used"] = usage.input_tokens + cache_read + cache_write + usage.output_tokens
+                result["input_tokens"] = usage.input_tokens + cache_read + cache_write
+                result["output_tokens"] = usage.output_tokens
+                result["cached_tokens"] = cache_read
+            else:
+                result["tokens_used"] = None
             
-            logger.info(f"✅ Claude analysis complete. Tokens: {result.get('tokens_used')}")
+            logger.info(f"✅ Claude analysis complete. Tokens: {result.get('tokens_used')} (cached: {result.get('cached_tokens')})")
             return result
             
         except json.JSONDecodeError as e:
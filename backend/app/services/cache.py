@@ -0,0 +1,298 @@
+"""
+DI-2D Analiz Sonuç Önbelleği
+
+Aynı çizim aynı parametrelerle tekrar gönderildiğinde uzun süren
+model çağrısını (veya Werk24 kredisini) tekrar harcamamak için
+içerik adresli önbellek.
+
+Katmanlar:
+- Bellek içi LRU (milisaniye seviyesinde dönüş)
+- Disk katmanı (process yeniden başlasa da korunur)
+
+Anahtar: SHA-256(dosya baytları) + model + parametreler + prompt versiyonu
+
+Ayrıca ön işlenmiş sayfa görüntüleri için modelden bağımsız ikinci bir
+önbellek katmanı (PageImageCache) bulunur; model değişimi, tekrar
+denemeler ve /compare doğrudan provider çağrısından başlar.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from app.core.config import settings
+from app.models.analysis import DrawingAnalysisResult
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_bytes: bytes) -> str:
+    """Dosya içeriğinin SHA-256 özeti"""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def make_cache_key(file_hash: str, **params: Any) -> str:
+    """Dosya özeti ve analiz parametrelerinden deterministik anahtar üret"""
+    payload = json.dumps({"file": file_hash, **params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """İki katmanlı (bellek LRU + disk) analiz sonuç önbelleği"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        memory_entries: int = 256,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600
+    ):
+        """
+        Args:
+            enabled: Önbellek aktif mi
+            memory_entries: Bellekte tutulacak maksimum sonuç sayısı
+            disk_dir: Disk katmanı dizini (None = disk katmanı kapalı)
+            disk_max_bytes: Disk katmanının maksimum toplam boyutu
+            ttl: Kayıt ömrü (saniye)
+        """
+        self.enabled = enabled
+        self.memory_entries = memory_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl
+
+        self._memory: "OrderedDict[str, Tuple[float, DrawingAnalysisResult]]" = OrderedDict()
+        self._disk_bytes: Optional[int] = None
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[DrawingAnalysisResult]:
+        """Önbellekten sonuç getir (yoksa None)"""
+        if not self.enabled:
+            return None
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            created, result = entry
+            if time.time() - created <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return result.model_copy(deep=True)
+            del self._memory[key]
+
+        if self.disk_dir is not None:
+            loaded = await asyncio.to_thread(self._read_disk, key)
+            if loaded is not None:
+                created, result = loaded
+                self._remember(key, created, result)
+                self.hits["disk"] += 1
+                return result.model_copy(deep=True)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: DrawingAnalysisResult) -> None:
+        """Sonucu her iki katmana yaz"""
+        if not self.enabled:
+            return
+
+        created = time.time()
+        self._remember(key, created, result.model_copy(deep=True))
+
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, created, result)
+
+    async def invalidate(self, key: str) -> None:
+        """Kaydı her iki katmandan sil"""
+        self._memory.pop(key, None)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._delete_disk, key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss sayaçları ve doluluk bilgisi"""
+        total_hits = self.hits["memory"] + self.hits["disk"]
+        lookups = total_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": total_hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_bytes": self._disk_bytes or 0
+        }
+
+    def _remember(self, key: str, created: float, result: DrawingAnalysisResult) -> None:
+        self._memory[key] = (created, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, DrawingAnalysisResult]]:
+        path = self._path(key)
+        try:
+            created = path.stat().st_mtime
+            if time.time() - created > self.ttl:
+                self._delete_disk(key)
+                return None
+            result = DrawingAnalysisResult.model_validate_json(path.read_bytes())
+            return created, result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Corrupt cache entry {key}: {e}")
+            self._delete_disk(key)
+            return None
+
+    def _write_disk(self, key: str, created: float, result: DrawingAnalysisResult) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            data = result.model_dump_json().encode("utf-8")
+            previous = path.stat().st_size if path.exists() else 0
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+            os.utime(path, (created, created))
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(data) - previous
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to write cache entry {key}: {e}")
+
+    def _delete_disk(self, key: str) -> None:
+        path = self._path(key)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+        except FileNotFoundError:
+            pass
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.disk_dir.glob("*/*.json"))
+
+    def _evict_disk(self) -> None:
+        """Boyut sınırının altına inene kadar en eski kayıtları (ve süresi dolanları) sil"""
+        now = time.time()
+        entries = sorted(
+            ((p.stat().st_mtime, p) for p in self.disk_dir.glob("*/*.json")),
+            key=lambda item: item[0]
+        )
+        for mtime, path in entries:
+            if self._disk_bytes <= self.disk_max_bytes and now - mtime <= self.ttl:
+                break
+            self._delete_disk(path.stem)
+
+
+class PageImageCache:
+    """
+    Ön işlenmiş sayfa görüntüleri için bayt sınırlı LRU önbellek
+
+    Anahtar: (dosya özeti, dpi, enhance_mode, sayfa numarası, sağlayıcı, yerleşim)
+    Değer: {"page", "provider", "image_base64", "width", "height", ...} sözlüğü
+    (tiled yerleşimde karolar "tiles" listesinde aynı girdide tutulur)
+    """
+
+    def __init__(self, enabled: bool = True, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            enabled: Önbellek aktif mi
+            max_bytes: Tutulacak toplam kodlanmış görüntü boyutu
+        """
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[Tuple[str, int, str, int, Optional[str], Optional[str]], Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        file_hash: str,
+        dpi: int,
+        enhance_mode: str,
+        page: int,
+        provider: Optional[str] = None,
+        layout: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Sayfa görüntüsünü getir (yoksa None)"""
+        if not self.enabled:
+            return None
+
+        key = (file_hash, dpi, enhance_mode, page, provider, layout)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry)
+
+    def set(self, file_hash: str, dpi: int, enhance_mode: str, page_data: Dict[str, Any]) -> None:
+        """Sayfa görüntüsünü ekle, sınır aşılırsa en az kullanılanları çıkar"""
+        if not self.enabled:
+            return
+
+        size = self._size(page_data)
+        if size > self.max_bytes:
+            return
+
+        key = (file_hash, dpi, enhance_mode, page_data["page"], page_data.get("provider"), page_data.get("layout"))
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= self._size(previous)
+
+        self._entries[key] = dict(page_data)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._size(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss sayaçları ve doluluk bilgisi"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    @staticmethod
+    def _size(page_data: Dict[str, Any]) -> int:
+        tiles = page_data.get("tiles") or []
+        return len(page_data.get("image_base64") or "") + sum(len(tile.get("image_base64") or "") for tile in tiles)
+
+
+# Singleton instances
+result_cache = ResultCache(
+    enabled=settings.result_cache_enabled,
+    memory_entries=settings.result_cache_memory_entries,
+    disk_dir=settings.result_cache_dir or None,
+    disk_max_bytes=settings.result_cache_max_bytes,
+    ttl=settings.result_cache_ttl
+)
+
+page_cache = PageImageCache(
+    enabled=settings.page_cache_enabled,
+    max_bytes=settings.page_cache_max_bytes
+)
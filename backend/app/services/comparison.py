@@ -0,0 +1,286 @@
+"""
+DI-2D Model Karşılaştırma Servisi
+
+Aynı teknik resmi birden fazla modelle eşzamanlı analiz eder.
+- Ön işleme tek sefer yapılır, tüm AI modelleri aynı sonucu kullanır
+- Her model kendi zaman aşımıyla çalışır
+- Yavaş veya hatalı bir model tüm karşılaştırmayı düşürmez (kısmi sonuç)
+- N modelli karşılaştırma sonuçları tamamlandıkça akış olarak döner
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator, Union
+
+from app.core.exceptions import DI2DException
+from .analyzer import analyzer
+from .werk24_analyzer import werk24_analyzer
+from .uploads import DrawingSource, as_source
+from .image_budget import image_provider
+
+logger = logging.getLogger(__name__)
+
+WERK24_MODEL = "werk24-professional"
+
+
+def model_provider(model: str) -> str:
+    """Model adından sağlayıcıyı çıkar"""
+    if model == WERK24_MODEL:
+        return "Werk24"
+    if model.startswith("gpt-"):
+        return "OpenAI"
+    if model.startswith("claude-"):
+        return "Anthropic"
+    return ""
+
+
+def parse_model_specs(spec: str, default_reasoning: str = "medium") -> List[Tuple[str, str]]:
+    """
+    Model listesini çöz ("werk24-professional,gpt-5.2:high,gpt-5.2:xhigh")
+
+    Returns:
+        (model, reasoning_level) listesi
+    """
+    specs = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        model, _, reasoning_level = part.partition(":")
+        specs.append((model.strip(), reasoning_level.strip() or default_reasoning))
+    return specs
+
+
+async def run_model(
+    model: str,
+    file_bytes: Union[bytes, DrawingSource],
+    filename: str,
+    reasoning_level: str = "medium",
+    enhance_mode: str = "balanced",
+    timeout: Optional[float] = None,
+    preprocess_task: Optional["asyncio.Task"] = None
+) -> Dict[str, Any]:
+    """
+    Tek bir modeli zaman aşımıyla çalıştır, hatayı sonuç girdisine çevir
+
+    Args:
+        model: AI modeli
+        file_bytes: Dosya baytları veya spool edilmiş yükleme
+        filename: Dosya adı
+        reasoning_level: Düşünme seviyesi
+        enhance_mode: Görüntü iyileştirme modu
+        timeout: Saniye cinsinden zaman aşımı (None = sınırsız)
+        preprocess_task: Paylaşılan ön işleme görevi (AI modelleri bunu bekler)
+
+    Returns:
+        {"name", "provider", "status", "processing_time", "confidence", "result", "error"}
+    """
+    start_time = time.time()
+    entry: Dict[str, Any] = {
+        "name": model,
+        "provider": model_provider(model),
+        "reasoning_level": reasoning_level,
+        "status": "success",
+        "processing_time": 0.0,
+        "confidence": 0.0,
+        "result": None,
+        "error": None
+    }
+
+    async def _analyze():
+        if model == WERK24_MODEL:
+            return await werk24_analyzer.analyze(
+                file_bytes=file_bytes,
+                filename=filename,
+                confidence_threshold=0.7
+            )
+        if preprocess_task is not None:
+            # Diğer modeller zaman aşımına uğrasa da ortak görev iptal edilmesin
+            await asyncio.shield(preprocess_task)
+        return await analyzer.analyze(
+            file_bytes=file_bytes,
+            filename=filename,
+            model=model,
+            reasoning_level=reasoning_level,
+            enhance_mode=enhance_mode
+        )
+
+    logger.info(f"🔍 Model analizi başlıyor: {model}")
+    try:
+        result = await asyncio.wait_for(_analyze(), timeout=timeout)
+        result_dict = result.model_dump(mode="json")
+        metadata = result_dict.get("metadata", {})
+        entry["result"] = result_dict
+        entry["processing_time"] = metadata.get("processing_time", 0)
+        entry["confidence"] = metadata.get("confidence_score", 0)
+        logger.info(f"✅ {model} tamamlandı ({entry['processing_time']:.2f}s)")
+    except asyncio.TimeoutError:
+        entry["status"] = "timeout"
+        entry["error"] = f"Zaman aşımı ({timeout:.0f}s)"
+        entry["processing_time"] = time.time() - start_time
+        logger.warning(f"⏱️ {model} zaman aşımına uğradı ({timeout:.0f}s)")
+    except Exception as e:
+        entry["status"] = "error"
+        entry["error"] = e.detail if isinstance(e, DI2DException) else str(e)
+        entry["processing_time"] = time.time() - start_time
+        logger.error(f"❌ {model} başarısız: {entry['error']}")
+
+    return entry
+
+
+def start_shared_preprocess(
+    models: List[str],
+    file_bytes: Union[bytes, DrawingSource],
+    filename: str,
+    enhance_mode: str = "balanced"
+) -> Optional["asyncio.Task"]:
+    """
+    AI modelleri varsa ortak ön işleme görevini başlat (sonuç sayfa önbelleğine yazılır)
+    
+    Sayfa bir kez rasterize edilip iyileştirilir; her sağlayıcının
+    görüntü bütçesine göre ayrı boyutlandırılmış çıktı üretilir.
+    """
+    providers = list(dict.fromkeys(image_provider(model) for model in models if model != WERK24_MODEL))
+    if not providers:
+        return None
+    source = as_source(file_bytes, filename)
+    return asyncio.create_task(
+        analyzer.preprocess(
+            source,
+            filename,
+            enhance_mode,
+            file_hash=source.sha256,
+            providers=providers
+        )
+    )
+
+
+def _release_shared_preprocess(preprocess_task: Optional["asyncio.Task"]) -> None:
+    """Ortak ön işleme görevini iptal et veya hatasını tüketilmiş say"""
+    if preprocess_task is None:
+        return
+    if not preprocess_task.done():
+        preprocess_task.cancel()
+    elif not preprocess_task.cancelled():
+        preprocess_task.exception()  # Hata model girdilerine zaten yansıdı
+
+
+def build_comparison_notes(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Başarılı girdiler üzerinden karşılaştırma özeti oluştur"""
+    succeeded = [entry for entry in entries if entry["status"] == "success"]
+    notes: Dict[str, Any] = {
+        "completed": len(succeeded),
+        "failed": [entry["name"] for entry in entries if entry["status"] != "success"],
+        "partial": len(succeeded) < len(entries)
+    }
+    if not succeeded:
+        return notes
+
+    times = [entry["processing_time"] for entry in succeeded]
+    confidences = [entry["confidence"] for entry in succeeded]
+    notes.update({
+        "time_difference": max(times) - min(times),
+        "confidence_difference": max(confidences) - min(confidences),
+        "faster_model": min(succeeded, key=lambda entry: entry["processing_time"])["name"],
+        "higher_confidence": max(succeeded, key=lambda entry: entry["confidence"])["name"]
+    })
+    return notes
+
+
+async def compare_models(
+    models: List[str],
+    file_bytes: Union[bytes, DrawingSource],
+    filename: str,
+    reasoning_level: str = "medium",
+    enhance_mode: str = "balanced",
+    timeout: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Modelleri tek ortak ön işleme üzerinden eşzamanlı çalıştır
+
+    Returns:
+        Model sırasına göre sonuç girdileri
+    """
+    file_bytes = as_source(file_bytes, filename)  # Özet tüm modeller için bir kez hesaplanır
+    preprocess_task = start_shared_preprocess(models, file_bytes, filename, enhance_mode)
+    try:
+        return await asyncio.gather(*[
+            run_model(
+                model,
+                file_bytes,
+                filename,
+                reasoning_level=reasoning_level,
+                enhance_mode=enhance_mode,
+                timeout=timeout,
+                preprocess_task=preprocess_task
+            )
+            for model in models
+        ])
+    finally:
+        _release_shared_preprocess(preprocess_task)
+
+
+async def stream_comparison(
+    specs: List[Tuple[str, str]],
+    file_bytes: Union[bytes, DrawingSource],
+    filename: str,
+    enhance_mode: str = "balanced",
+    timeout: Optional[float] = None,
+    max_concurrency: int = 4
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    N model/reasoning kombinasyonunu eşzamanlılık sınırıyla çalıştır,
+    her biri bittiğinde sonucu ve güncel özeti yield et
+
+    Yields:
+        {"event": "started" | "result" | "done", ...}
+    """
+    models = [model for model, _ in specs]
+    file_bytes = as_source(file_bytes, filename)
+    preprocess_task = start_shared_preprocess(models, file_bytes, filename, enhance_mode)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _bounded(index: int, model: str, reasoning_level: str) -> Tuple[int, Dict[str, Any]]:
+        async with semaphore:
+            entry = await run_model(
+                model,
+                file_bytes,
+                filename,
+                reasoning_level=reasoning_level,
+                enhance_mode=enhance_mode,
+                timeout=timeout,
+                preprocess_task=preprocess_task
+            )
+        return index, entry
+
+    tasks = [
+        asyncio.create_task(_bounded(index, model, reasoning_level))
+        for index, (model, reasoning_level) in enumerate(specs)
+    ]
+    completed: List[Dict[str, Any]] = []
+
+    yield {
+        "event": "started",
+        "models": [{"name": model, "reasoning_level": level} for model, level in specs],
+        "max_concurrency": max_concurrency
+    }
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, entry = await next_done
+            completed.append(entry)
+            yield {
+                "event": "result",
+                "index": index,
+                "entry": entry,
+                "summary": build_comparison_notes(completed),
+                "remaining": len(tasks) - len(completed)
+            }
+
+        yield {"event": "done", "summary": build_comparison_notes(completed)}
+    finally:
+        # İstemci bağlantıyı kapatırsa kalan çağrıları iptal et
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        _release_shared_preprocess(preprocess_task)
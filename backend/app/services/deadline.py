@@ -0,0 +1,113 @@
+"""
+DI-2D Analiz Deadline'ları ve İptal Sayaçları
+
+Tarayıcı veya MQ_V3 vazgeçtiğinde sunucu ön işlemeyi ve sağlayıcı
+çağrısını sonuna kadar sürdürüyordu. Her analiz artık bir deadline taşır:
+
+- İstekten gelir: `X-Request-Deadline` (mutlak Unix zamanı),
+  `X-Request-Timeout` veya `timeout_seconds` form alanı (saniye);
+  hiçbiri yoksa analysis_default_timeout. En erken olan geçerlidir.
+- Aşamalar başlamadan önce kontrol edilir; ön işleme worker'ı aşama
+  sınırlarında kontrol eder.
+- Süre dolunca veya istemci kopunca devam eden iş iptal edilir.
+
+İptal edilen işler aşama ve nedene göre sayılır.
+"""
+import logging
+import math
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.core.config import settings
+from app.core.exceptions import DeadlineExceededError, FileProcessingError
+
+logger = logging.getLogger(__name__)
+
+_cancellations: Counter = Counter()
+
+
+class Deadline:
+    """Mutlak bitiş zamanı (time.time(), worker process'lere de aktarılabilir)"""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.time() + seconds)
+
+    def remaining(self) -> float:
+        return self.expires_at - time.time()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        """Süre dolduysa aşamayı başlatmadan DeadlineExceededError fırlat"""
+        if self.expired:
+            record_cancelled(stage, "deadline")
+            raise DeadlineExceededError(f"Analiz süresi doldu ({stage} aşaması başlatılmadı)")
+
+
+class SharedDeadline(Deadline):
+    """
+    Paylaşılan (single-flight) iş için deadline: o an bekleyenlerin en geç olanı
+
+    Sonradan daha uzun deadline'la katılan istek paylaşılan işi uzatır;
+    deadline'sız bekleyen varsa iş sınırsızdır. Her bekleyenin kendi
+    deadline'ı kendi beklemesinde ayrıca uygulanır.
+    """
+
+    def __init__(self, deadlines: Callable[[], Iterable[Optional[Deadline]]]):
+        self._deadlines = deadlines
+
+    @property
+    def expires_at(self) -> float:
+        deadlines = list(self._deadlines())
+        if not deadlines or any(deadline is None for deadline in deadlines):
+            return math.inf
+        return max(deadline.expires_at for deadline in deadlines)
+
+
+def deadline_from_request(
+    header_deadline: Optional[str] = None,
+    header_timeout: Optional[str] = None,
+    form_timeout: Optional[float] = None
+) -> Optional[Deadline]:
+    """
+    İstek başlıkları / form alanından deadline oluştur (en erken olan)
+
+    Raises:
+        FileProcessingError: Sayısal olmayan veya pozitif olmayan değer
+    """
+    now = time.time()
+    candidates = []
+    try:
+        if header_deadline:
+            candidates.append(float(header_deadline))
+        for timeout in (header_timeout, form_timeout):
+            if timeout not in (None, ""):
+                if float(timeout) <= 0:
+                    raise ValueError(timeout)
+                candidates.append(now + float(timeout))
+    except ValueError:
+        raise FileProcessingError("Geçersiz deadline/timeout değeri")
+
+    if settings.analysis_default_timeout > 0:
+        candidates.append(now + settings.analysis_default_timeout)
+    return Deadline(min(candidates)) if candidates else None
+
+
+def record_cancelled(stage: str, reason: str) -> None:
+    """İptal edilen işi say (reason: "deadline", "disconnect", "cancelled")"""
+    _cancellations[(stage, reason)] += 1
+    logger.info(f"🛑 Cancelled at {stage} ({reason})")
+
+
+def cancellation_stats() -> Dict[str, Any]:
+    """Aşama/neden bazında iptal sayaçları"""
+    return {f"{stage}:{reason}": count for (stage, reason), count in sorted(_cancellations.items())}
@@ -0,0 +1,108 @@
+"""
+DI-2D Gürültü Temizleme Backend'leri
+
+`cv2.fastNlMeansDenoising` 400 DPI bir sayfada ön işlemenin en pahalı
+adımıdır (A1 taramada onlarca saniye). Bu modül seçilebilir denoiser
+backend'leri sunar; enhance_mode varsayılan olarak bir backend'e eşlenir.
+
+Yaklaşık tek çekirdek throughput (8-bit gri, megapiksel/saniye):
+
+    none                  -            (kopya bile yok)
+    median                ~150 MP/s    3x3 medyan, tuz-biber gürültüsü
+    morph                 ~200 MP/s    2x2 açma, koyu alanlardaki beyaz noktalar (çizgileri inceltmez)
+    bilateral             ~15 MP/s     d=5, kenar koruyan yumuşatma
+    nlmeans_downscaled    ~8 MP/s      NL-means yarım çözünürlükte, fark tam çözünürlüğe taşınır
+    nlmeans               ~0.7 MP/s    Orijinal h=10, 7/21 pencere (en yavaş, referans kalite)
+
+A1 @ 400 DPI ≈ 124 MP: median < 1 sn, nlmeans_downscaled ≈ 15 sn, nlmeans ≈ 3 dk.
+"""
+import logging
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _none(gray: np.ndarray) -> np.ndarray:
+    return gray
+
+
+def _median(gray: np.ndarray) -> np.ndarray:
+    return cv2.medianBlur(gray, 3)
+
+
+def _bilateral(gray: np.ndarray) -> np.ndarray:
+    return cv2.bilateralFilter(gray, d=5, sigmaColor=40, sigmaSpace=5)
+
+
+def _morph(gray: np.ndarray) -> np.ndarray:
+    """
+    Çizgi resmi: 2x2 açma koyu çizgi/alanlardaki beyaz noktaları siler
+
+    Kapama uygulanmaz: beyaz zemin üzerinde önce genişletme yaptığı için
+    1 px'lik koyu çizgileri ve ince ölçü yazılarını tamamen siler. Zemindeki
+    siyah noktalar için median kullanılmalıdır.
+    """
+    kernel = np.ones((2, 2), np.uint8)
+    return cv2.morphologyEx(gray, cv2.MORPH_OPEN, kernel)
+
+
+def _nlmeans(gray: np.ndarray) -> np.ndarray:
+    return cv2.fastNlMeansDenoising(gray, None, h=10, templateWindowSize=7, searchWindowSize=21)
+
+
+def _nlmeans_downscaled(gray: np.ndarray) -> np.ndarray:
+    """
+    NL-means'i yarım çözünürlükte çalıştır, sadece kaldırılan gürültüyü
+    tam çözünürlüğe taşı (ince çizgi kenarları orijinalden korunur)
+    """
+    height, width = gray.shape[:2]
+    small = cv2.resize(gray, (max(1, width // 2), max(1, height // 2)), interpolation=cv2.INTER_AREA)
+    denoised = cv2.fastNlMeansDenoising(small, None, h=10, templateWindowSize=7, searchWindowSize=11)
+    noise = cv2.resize(
+        small.astype(np.int16) - denoised.astype(np.int16),
+        (width, height),
+        interpolation=cv2.INTER_LINEAR
+    )
+    return np.clip(gray.astype(np.int16) - noise, 0, 255).astype(np.uint8)
+
+
+DENOISERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "none": _none,
+    "median": _median,
+    "morph": _morph,
+    "bilateral": _bilateral,
+    "nlmeans_downscaled": _nlmeans_downscaled,
+    "nlmeans": _nlmeans,
+}
+
+# enhance_mode -> varsayılan backend (settings.denoiser ile ezilebilir)
+MODE_DENOISERS: Dict[str, str] = {
+    "fast": "median",
+    "balanced": "nlmeans_downscaled",
+    "aggressive": "nlmeans",
+}
+
+
+def resolve_denoiser(enhance_mode: str, denoiser: Optional[str] = None) -> str:
+    """
+    Kullanılacak backend adını belirle
+
+    Args:
+        enhance_mode: "fast", "balanced", "aggressive"
+        denoiser: Açık backend seçimi (None/boş = enhance_mode eşlemesi)
+
+    Returns:
+        DENOISERS içindeki backend adı
+    """
+    name = denoiser or MODE_DENOISERS.get(enhance_mode, "nlmeans_downscaled")
+    if name not in DENOISERS:
+        raise ValueError(f"Unknown denoiser: {name} (available: {', '.join(DENOISERS)})")
+    return name
+
+
+def denoise(gray: np.ndarray, name: str) -> np.ndarray:
+    """Gri görüntüye seçili backend'i uygula"""
+    return DENOISERS[name](gray)
@@ -0,0 +1,96 @@
+"""
+DI-2D Görüntü Encoder'ları
+
+Teknik resimler esasen beyaz zemin üzerinde siyah çizgidir; 3 kanallı
+`optimize=True` PNG hem en yavaş ayarlardan biridir hem de megabaytlarca
+gereksiz yük üretir. Bu modül boyut/gecikme dengesi farklı encoder'lar sunar:
+
+    png             3 kanal PNG, optimize=True (eski davranış, en yavaş)
+    png_gray        8-bit gri PNG, ayarlanabilir compress level (hızlı, ~3x küçük)
+    png_1bit        Otsu eşikli 1-bit PNG (en küçük, gri tonlar kaybolur)
+    webp_lossless   Kayıpsız WebP (png_gray'den küçük, encode daha yavaş)
+    jpeg            Yüksek kaliteli gri JPEG (taranmış/fotoğraf çizimler için)
+
+Sağlayıcı başına varsayılan encoder ayarlardan gelir.
+"""
+from typing import Optional, Tuple
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+
+ENCODERS = ("png", "png_gray", "png_1bit", "webp_lossless", "jpeg")
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "png_gray": "image/png",
+    "png_1bit": "image/png",
+    "webp_lossless": "image/webp",
+    "jpeg": "image/jpeg",
+}
+
+
+def encoder_for(provider: Optional[str]) -> str:
+    """Sağlayıcının varsayılan encoder'ı"""
+    if provider == "openai":
+        name = settings.openai_image_encoder
+    elif provider == "anthropic":
+        name = settings.anthropic_image_encoder
+    else:
+        name = settings.image_encoder
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown image encoder: {name} (available: {', '.join(ENCODERS)})")
+    return name
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def _imencode(ext: str, image: np.ndarray, params: list) -> bytes:
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        raise ValueError(f"OpenCV failed to encode {ext}")
+    return buffer.tobytes()
+
+
+def encode_image(image: np.ndarray, encoder: str) -> Tuple[bytes, str]:
+    """
+    Görüntüyü seçilen formatta encode et
+
+    Args:
+        image: Tek kanallı gri (veya BGR) numpy görüntüsü
+        encoder: ENCODERS içinden bir ad
+
+    Returns:
+        (encode edilmiş baytlar, media type)
+    """
+    if encoder == "png":
+        # Eski format 3 kanal ister - RGB kopyası sadece burada üretilir
+        if image.ndim == 3:
+            pil_img = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        else:
+            pil_img = Image.fromarray(image).convert("RGB")
+        buffer = io.BytesIO()
+        pil_img.save(buffer, format="PNG", optimize=True)
+        data = buffer.getvalue()
+    elif encoder == "png_gray":
+        data = _imencode(".png", _gray(image), [cv2.IMWRITE_PNG_COMPRESSION, settings.png_compress_level])
+    elif encoder == "png_1bit":
+        _, binary = cv2.threshold(_gray(image), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        data = _imencode(".png", binary, [
+            cv2.IMWRITE_PNG_BILEVEL, 1,
+            cv2.IMWRITE_PNG_COMPRESSION, settings.png_compress_level
+        ])
+    elif encoder == "webp_lossless":
+        # Kalite > 100 OpenCV'de kayıpsız WebP demek (tek kanal encoder içinde genişletilir)
+        data = _imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, 101])
+    elif encoder == "jpeg":
+        data = _imencode(".jpg", _gray(image), [cv2.IMWRITE_JPEG_QUALITY, settings.jpeg_quality])
+    else:
+        raise ValueError(f"Unknown image encoder: {encoder} (available: {', '.join(ENCODERS)})")
+
+    return data, MEDIA_TYPES[encoder]
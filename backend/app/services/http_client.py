@@ -0,0 +1,73 @@
+"""
+Provider HTTP bağlantı havuzu
+
+OpenAI ve Anthropic async istemcileri SDK başına tek bir bağlantı havuzu
+üzerinden çalışır. Böylece keep-alive bağlantılar ve HTTP/2 multiplexing
+tüm istekler arasında paylaşılır; tek worker aynı anda onlarca uzun süren
+reasoning çağrısını taşıyabilir.
+
+Havuz, SDK'nın kendi DefaultAsyncHttpxClient'ı ile oluşturulur. SDK'lar
+yalnızca kendi kullandıkları HTTP paketinin (httpx / httpx2) istemci,
+Limits ve Timeout nesnelerini kabul eder; genel bir httpx.AsyncClient
+verilirse istemci kurulumu TypeError ile başarısız olur.
+"""
+import logging
+from types import ModuleType
+from typing import Any, Dict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# SDK modül adı -> o SDK'nın DefaultAsyncHttpxClient örneği
+_http_clients: Dict[str, Any] = {}
+
+
+def get_http_client(sdk: ModuleType) -> Any:
+    """SDK'ya ait paylaşılan bağlantı havuzunu döndür (ilk çağrıda oluşturulur)"""
+    client = _http_clients.get(sdk.__name__)
+    if client is None or client.is_closed:
+        # Limits sınıfı SDK'nın kullandığı HTTP paketinden alınır
+        limits_cls = type(sdk.DEFAULT_CONNECTION_LIMITS)
+        client = sdk.DefaultAsyncHttpxClient(
+            http2=settings.http2_enabled,
+            limits=limits_cls(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry
+            ),
+            timeout=sdk.Timeout(
+                settings.provider_timeout_high,
+                connect=settings.http_connect_timeout
+            )
+        )
+        _http_clients[sdk.__name__] = client
+        logger.info(
+            f"✅ HTTP pool initialized for {sdk.__name__}: "
+            f"max_connections={settings.http_max_connections}, http2={settings.http2_enabled}"
+        )
+    return client
+
+
+def provider_timeout_seconds(reasoning_level: str) -> float:
+    """Reasoning seviyesine göre çağrı başına toplam zaman aşımı (saniye)"""
+    timeouts = {
+        "medium": settings.provider_timeout_medium,
+        "high": settings.provider_timeout_high,
+        "xhigh": settings.provider_timeout_xhigh
+    }
+    return timeouts.get(reasoning_level, settings.provider_timeout_high)
+
+
+def provider_timeout(sdk: ModuleType, reasoning_level: str) -> Any:
+    """Reasoning seviyesine göre çağrı başına zaman aşımı (SDK'nın Timeout tipinde)"""
+    return sdk.Timeout(provider_timeout_seconds(reasoning_level), connect=settings.http_connect_timeout)
+
+
+async def close_http_client() -> None:
+    """Paylaşılan bağlantı havuzlarını kapat"""
+    for name, client in list(_http_clients.items()):
+        if not client.is_closed:
+            await client.aclose()
+            logger.info(f"🛑 HTTP pool closed for {name}")
+    _http_clients.clear()
@@ -0,0 +1,84 @@
+"""
+Provider bazlı görüntü çözünürlüğü ve image-token bütçesi
+
+Sağlayıcılar büyük görüntüleri zaten kendi taraflarında küçültür. 400 DPI
+ham raster göndermek sadece yükleme süresi, gecikme ve (Claude için)
+boyut sınırı hatası demektir. Bu modül her sağlayıcının efektif maksimum
+çözünürlüğünü ve tahmini image-token maliyetini hesaplar; görüntü
+encode edilmeden önce bir kez INTER_AREA ile bu boyuta küçültülür.
+"""
+import math
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+
+def image_provider(model: str) -> Optional[str]:
+    """Modelin görüntü bütçesi profilini döndür ("openai", "anthropic" veya None)"""
+    if model.startswith("gpt-"):
+        return "openai"
+    if model.startswith("claude-"):
+        return "anthropic"
+    return None
+
+
+def _scale_to_fit(width: int, height: int, max_long: int) -> Tuple[int, int]:
+    long_side = max(width, height)
+    if long_side <= max_long:
+        return width, height
+    scale = max_long / long_side
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _openai_size(width: int, height: int) -> Tuple[int, int]:
+    """OpenAI detail=high: önce max_side kutusuna, sonra kısa kenar short_side'a"""
+    width, height = _scale_to_fit(width, height, settings.openai_image_max_side)
+    short_side = min(width, height)
+    if short_side > settings.openai_image_short_side:
+        scale = settings.openai_image_short_side / short_side
+        width, height = max(1, round(width * scale)), max(1, round(height * scale))
+    return width, height
+
+
+def _openai_tokens(width: int, height: int) -> int:
+    """512px karo başına sabit maliyet + taban maliyet"""
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def _anthropic_size(width: int, height: int) -> Tuple[int, int]:
+    """Claude: uzun kenar ve toplam piksel sınırı (daha büyüğü sunucuda küçültülür)"""
+    width, height = _scale_to_fit(width, height, settings.anthropic_image_max_side)
+    max_pixels = settings.anthropic_image_max_megapixels * 1_000_000
+    if width * height > max_pixels:
+        scale = math.sqrt(max_pixels / (width * height))
+        width, height = max(1, int(width * scale)), max(1, int(height * scale))
+    return width, height
+
+
+def _anthropic_tokens(width: int, height: int) -> int:
+    return math.ceil(width * height / 750)
+
+
+def plan_image_size(provider: Optional[str], width: int, height: int) -> Tuple[int, int, Optional[int]]:
+    """
+    Gönderilecek görüntü boyutunu ve tahmini image-token maliyetini hesapla
+
+    Args:
+        provider: "openai", "anthropic" veya None (sadece genel sınır)
+        width: Kaynak genişlik (px)
+        height: Kaynak yükseklik (px)
+
+    Returns:
+        (hedef genişlik, hedef yükseklik, tahmini token - bilinmiyorsa None)
+    """
+    # Genel üst sınır tüm sağlayıcılar için geçerli
+    width, height = _scale_to_fit(width, height, settings.image_max_size)
+
+    if provider == "openai":
+        width, height = _openai_size(width, height)
+        return width, height, _openai_tokens(width, height)
+    if provider == "anthropic":
+        width, height = _anthropic_size(width, height)
+        return width, height, _anthropic_tokens(width, height)
+    return width, height, None
@@ -0,0 +1,90 @@
+"""
+DI-2D Artımlı JSON Ayrıştırıcı
+
+Model çıktısı akarken en üst düzey JSON nesnesinin üyelerini kapandıkları
+anda döndürür. Örneğin "title_block" bölümü, "geometry" bölümü henüz
+yazılırken kullanılabilir.
+
+Ayrıştırıcı her karakteri yalnızca bir kez tarar. Derinlik, string ve
+kaçış durumunu izler; en üst düzeyde ',' veya kapanış '}' görüldüğünde
+biten üyeyi `json.loads` ile çözer. Nihai sonuç yine tam metinden
+`json.loads` ile üretilir; bu sınıf sadece erken ilerleme içindir.
+"""
+import json
+import logging
+from typing import Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONParser:
+    """En üst düzey nesne üyelerini tamamlandıkça çıkaran akış ayrıştırıcısı"""
+
+    def __init__(self):
+        self._parts: List[str] = []  # Mevcut üst düzey üyenin parçaları
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Yeni metin parçasını ekle
+
+        Baştaki ```json gibi nesne dışı metin atlanır.
+
+        Returns:
+            Bu parçayla tamamlanan (anahtar, değer) üyeleri
+        """
+        if self.done or not chunk:
+            return []
+        completed = []
+        member_start = 0
+
+        for i, char in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    if char != "{":
+                        # En üst düzey nesne değil - bölüm çıkarılamaz
+                        self.done = True
+                        return completed
+                    member_start = i + 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[member_start:i])
+                    completed.extend(self._close_member())
+                    self.done = True
+                    return completed
+            elif char == "," and self._depth == 1:
+                self._parts.append(chunk[member_start:i])
+                completed.extend(self._close_member())
+                member_start = i + 1
+
+        if self._depth >= 1:
+            self._parts.append(chunk[member_start:])
+        return completed
+
+    def _close_member(self) -> List[Tuple[str, Any]]:
+        """Biriken '"anahtar": değer' üyesini çöz"""
+        segment = "".join(self._parts).strip()
+        self._parts = []
+        if not segment:
+            return []
+        try:
+            return list(json.loads("{" + segment + "}").items())
+        except json.JSONDecodeError:
+            logger.debug(f"Invalid JSON member skipped: {segment[:80]}")
+            return []
@@ -0,0 +1,185 @@
+"""
+DI-2D Prometheus Metrikleri
+
+Tek gözlem aracı emoji log satırlarıydı; worker sayısını belirlemek ve
+gerçek yük altındaki gerilemeleri görmek için pipeline metrikleri
+`/metrics` endpoint'inden Prometheus formatında sunulur:
+
+- di2d_stage_duration_seconds: Aşama süreleri (upload_read,
+  preprocess_queue, rasterize, enhance, encode, queue_wait, provider_call,
+  json_parse, validate) -
+  model / reasoning_level / enhance_mode etiketli
+- di2d_tokens_used_total, di2d_cached_tokens_total: Sağlayıcı token kullanımı
+- di2d_cache_lookups_total: Sonuç ve sayfa önbelleği isabet/ıskalama
+- di2d_analysis_errors_total: Hata tipine göre başarısız analizler
+- di2d_queue_depth, di2d_in_flight: Sağlayıcı kabul kuyrukları, ön işleme
+  havuzu ve birleştirilmiş analizler (scrape anında okunur)
+
+Ön işleme worker process'lerde çalışır ama süreleri sonuçla birlikte döner;
+tüm gözlemler API process'inde yapılır. Birden fazla uvicorn worker'ı
+çalıştırılıyorsa her worker kendi sayaçlarını sunar.
+
+model / reasoning_level / enhance_mode değerleri form girdisinden gelir;
+zaman serisi sayısı sınırsız büyümesin diye bilinen değerler dışındakiler
+"other" etiketiyle kaydedilir.
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from app.core.config import settings
+from app.core.exceptions import DI2DException
+from .denoise import MODE_DENOISERS
+from .rate_limit import provider_limiters
+from .preprocess_pool import preprocess_pool
+from .singleflight import analysis_flights
+
+logger = logging.getLogger(__name__)
+
+# Ön işleme worker'ının ölçtüğü alt aşamaların metrik aşamalarına eşlemesi
+PREPROCESS_STAGES = {
+    "preprocess_queue": "preprocess_queue",
+    "rasterize": "rasterize",
+    "decode": "rasterize",
+    "grayscale": "enhance",
+    "denoise": "enhance",
+    "contrast": "enhance",
+    "sharpen": "enhance",
+    "resize": "enhance",
+    "encode": "encode",
+}
+
+# Etiket olarak kabul edilen değerler ("" = uygulanmıyor, örn. Werk24'te reasoning_level)
+KNOWN_MODELS = frozenset({
+    "werk24-professional",
+    "gpt-5.2",
+    "gpt-5.2-chat",
+    "gpt-5",
+    "gpt-5-chat",
+    "gpt-4-vision-preview",
+    "claude-3-5-sonnet-20241022",
+    "compare",
+    *settings.model_alternates,
+    *settings.model_alternates.values(),
+})
+REASONING_LEVELS = frozenset({"", "low", "medium", "high", "xhigh"})
+ENHANCE_MODES = frozenset({"", *MODE_DENOISERS})
+
+# Milisaniyelik JSON parse'tan 30 dakikalık xhigh çağrılarına kadar
+_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900, 1200, 1800, 2700)
+
+STAGE_DURATION = Histogram(
+    "di2d_stage_duration_seconds",
+    "Analiz pipeline aşama süresi",
+    ["stage", "model", "reasoning_level", "enhance_mode"],
+    buckets=_BUCKETS
+)
+TOKENS_USED = Counter(
+    "di2d_tokens_used_total",
+    "Sağlayıcı çağrılarında kullanılan toplam token",
+    ["model", "reasoning_level"]
+)
+CACHED_TOKENS = Counter(
+    "di2d_cached_tokens_total",
+    "Sağlayıcı prompt önbelleğinden okunan token",
+    ["model", "reasoning_level"]
+)
+CACHE_LOOKUPS = Counter(
+    "di2d_cache_lookups_total",
+    "Önbellek aramaları",
+    ["cache", "result"]
+)
+ANALYSIS_ERRORS = Counter(
+    "di2d_analysis_errors_total",
+    "Başarısız analizler (hata tipine göre)",
+    ["model", "error_type"]
+)
+QUEUE_DEPTH = Gauge(
+    "di2d_queue_depth",
+    "Kabul bekleyen iş sayısı",
+    ["queue"]
+)
+IN_FLIGHT = Gauge(
+    "di2d_in_flight",
+    "Devam eden iş sayısı",
+    ["queue"]
+)
+
+for _name, _limiter in provider_limiters.items():
+    QUEUE_DEPTH.labels(_name).set_function(lambda limiter=_limiter: limiter.queued)
+    IN_FLIGHT.labels(_name).set_function(lambda limiter=_limiter: limiter.in_flight)
+QUEUE_DEPTH.labels("preprocess").set_function(
+    lambda: max(0, preprocess_pool.pending - preprocess_pool.workers)
+)
+IN_FLIGHT.labels("preprocess").set_function(lambda: min(preprocess_pool.pending, preprocess_pool.workers))
+IN_FLIGHT.labels("analysis").set_function(lambda: analysis_flights.in_flight)
+
+
+def _label(value: str, allowed: frozenset) -> str:
+    """Bilinmeyen etiket değerini "other" olarak kaydet (kardinalite sınırı)"""
+    return value if value in allowed else "other"
+
+
+def observe_stage(
+    stage: str,
+    seconds: Optional[float],
+    model: str,
+    reasoning_level: str = "",
+    enhance_mode: str = ""
+) -> None:
+    """Aşama süresini kaydet (seconds None ise atlanır)"""
+    if seconds is None:
+        return
+    STAGE_DURATION.labels(
+        stage,
+        _label(model, KNOWN_MODELS),
+        _label(reasoning_level, REASONING_LEVELS),
+        _label(enhance_mode, ENHANCE_MODES)
+    ).observe(seconds)
+
+
+def observe_preprocess(timings: Dict[str, float], model: str, reasoning_level: str, enhance_mode: str) -> None:
+    """Worker'ın alt aşama sürelerini rasterize / enhance / encode olarak topla ve kaydet"""
+    totals: Dict[str, float] = {}
+    for name, seconds in timings.items():
+        stage = PREPROCESS_STAGES.get(name)
+        if stage is not None:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+    for stage, seconds in totals.items():
+        observe_stage(stage, seconds, model, reasoning_level, enhance_mode)
+
+
+def record_tokens(model: str, reasoning_level: str, tokens_used: Optional[int], cached_tokens: Optional[int]) -> None:
+    """Tek sağlayıcı çağrısının token kullanımını say"""
+    model, reasoning_level = _label(model, KNOWN_MODELS), _label(reasoning_level, REASONING_LEVELS)
+    if tokens_used:
+        TOKENS_USED.labels(model, reasoning_level).inc(tokens_used)
+    if cached_tokens:
+        CACHED_TOKENS.labels(model, reasoning_level).inc(cached_tokens)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def error_type(exc: BaseException) -> str:
+    """
+    Hatanın tip adı
+
+    Sağlayıcı hataları AnalysisError içine sarılır; sarmalanan asıl hata
+    (APITimeoutError, JSONDecodeError, ...) daha anlamlı olduğu için onun
+    adı döner.
+    """
+    while isinstance(exc, DI2DException) and (exc.__cause__ or exc.__context__) is not None:
+        exc = exc.__cause__ or exc.__context__
+    return type(exc).__name__
+
+
+def record_error(model: str, exc: BaseException) -> None:
+    ANALYSIS_ERRORS.labels(_label(model, KNOWN_MODELS), error_type(exc)).inc()
+
+
+def render() -> Tuple[bytes, str]:
+    """/metrics yanıtı için (içerik, content-type)"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,292 @@
+"""
+DI-2D Ön İşleme Process Pool'u
+
+DrawingPreprocessor pipeline'ı (PDF render, denoise, CLAHE, PNG encode)
+CPU-yoğun ve senkron çalışır. Event loop'u bloklamamak için tüm
+`process_file` çağrısı ayrı process'lerde yürütülür.
+
+Özellikler:
+- Ayarlanabilir worker sayısı (OpenCV iç thread'leri hesaba katılır)
+- Sınırlı bekleme kuyruğu (dolunca CapacityError)
+- Büyük sayfa çıktıları shared memory üzerinden döner (pickle edilmez)
+- İşbirlikçi iptal: istek iptal edilince veya deadline geçince worker
+  bir sonraki aşama sınırında durur (iptal işareti bir marker dosyasıdır)
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional, List, Iterator, Union
+
+from app.core.config import settings
+from app.core.exceptions import CapacityError, DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+
+class PreprocessCancelled(Exception):
+    """Worker işi iptal işareti veya deadline nedeniyle aşama sınırında durdu"""
+
+
+def _init_worker(opencv_threads: int) -> None:
+    """Worker process başlangıcı - OpenCV thread sayısını sınırla"""
+    import cv2
+    cv2.setNumThreads(opencv_threads)
+
+
+def _export_to_shm(data: bytes) -> Dict[str, Any]:
+    """Baytları yeni bir shared memory bloğuna yaz (sahiplik ana process'e geçer)"""
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=len(data), track=False)
+    except TypeError:
+        # Python < 3.13: track parametresi yok, resource_tracker kaydını elle sil
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        resource_tracker.unregister(shm._name, "shared_memory")
+    shm.buf[:len(data)] = data
+    handle = {"name": shm.name, "size": len(data)}
+    shm.close()
+    return handle
+
+
+def _import_from_shm(handle: Dict[str, Any]) -> bytes:
+    """Shared memory bloğunu oku ve serbest bırak"""
+    shm = shared_memory.SharedMemory(name=handle["name"])
+    try:
+        return bytes(shm.buf[:handle["size"]])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _iter_images(result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Sonuçtaki görüntü taşıyan tüm girdiler (sayfalar ve tiled moddaki karolar)"""
+    for page in result.get("pages", []):
+        yield page
+        yield from page.get("tiles", [])
+
+
+def _remove_marker(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _release_result(future) -> None:
+    """Sonucu kullanılmayan bir işin shared memory bloklarını serbest bırak"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    released = set()
+    for image in _iter_images(future.result()):
+        handle = image.get("shm")
+        if handle is not None and handle["name"] not in released:
+            released.add(handle["name"])
+            _import_from_shm(handle)
+
+
+def _run_preprocess(
+    file_bytes: Union[bytes, str],
+    file_ext: str,
+    dpi: int,
+    enhance_mode: str,
+    pages: Optional[List[int]],
+    providers: Optional[List[Optional[str]]],
+    tiled: bool,
+    shm_threshold: int,
+    cancel_path: Optional[str] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """Worker process içinde çalışan ön işleme işi (CPU süresi sonuca "cpu_time" olarak eklenir)"""
+    from .preprocessor import preprocess_drawing
+
+    cpu_start = time.process_time()
+
+    def _cancel_check() -> None:
+        if cancel_path is not None and os.path.exists(cancel_path):
+            raise PreprocessCancelled("cancelled")
+        if deadline is not None and time.time() > deadline:
+            raise PreprocessCancelled("deadline")
+
+    result = preprocess_drawing(
+        file_bytes,
+        file_ext,
+        dpi=dpi,
+        enhance_mode=enhance_mode,
+        pages=pages,
+        providers=providers,
+        tiled=tiled,
+        cancel_check=_cancel_check
+    )
+
+    # Aynı görüntüyü paylaşan sağlayıcılar için tek shared memory bloğu
+    exported: Dict[int, Dict[str, Any]] = {}
+    for image in _iter_images(result):
+        image_base64 = image["image_base64"]
+        if len(image_base64) >= shm_threshold:
+            if id(image_base64) not in exported:
+                exported[id(image_base64)] = _export_to_shm(image_base64.encode("ascii"))
+            image["image_base64"] = None
+            image["shm"] = exported[id(image_base64)]
+
+    # OpenCV thread'leri dahil tüm process'in CPU süresi
+    result["cpu_time"] = time.process_time() - cpu_start
+    return result
+
+
+class PreprocessPool:
+    """DrawingPreprocessor işleri için sınırlı kuyruklu process pool"""
+
+    def __init__(
+        self,
+        workers: int = 0,
+        opencv_threads: int = 2,
+        max_queue: int = 8,
+        shm_threshold: int = 1024 * 1024,
+        start_method: str = "spawn"
+    ):
+        """
+        Args:
+            workers: Worker process sayısı (0 = otomatik)
+            opencv_threads: Her worker'ın kullanacağı OpenCV thread sayısı
+            max_queue: Tüm worker'lar meşgulken bekleyebilecek iş sayısı
+            shm_threshold: Shared memory ile dönecek minimum sayfa boyutu (bayt)
+            start_method: multiprocessing başlatma yöntemi
+        """
+        self.opencv_threads = max(1, opencv_threads)
+        if workers <= 0:
+            # Her worker kendi içinde opencv_threads kadar çekirdek kullanır
+            workers = max(1, (os.cpu_count() or 1) // self.opencv_threads)
+        self.workers = workers
+        self.max_queue = max(0, max_queue)
+        self.shm_threshold = shm_threshold
+        self.start_method = start_method
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(self.workers)
+        self._pending = 0
+        self.cancelled = 0
+
+    @property
+    def pending(self) -> int:
+        """Çalışan + kuyrukta bekleyen iş sayısı"""
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self.opencv_threads,)
+            )
+            logger.info(
+                f"✅ Preprocess pool started: workers={self.workers}, "
+                f"opencv_threads={self.opencv_threads}, max_queue={self.max_queue}"
+            )
+        return self._executor
+
+    async def process(
+        self,
+        file_bytes: Union[bytes, str],
+        file_ext: str,
+        dpi: int = 400,
+        enhance_mode: str = "balanced",
+        pages: Optional[List[int]] = None,
+        providers: Optional[List[Optional[str]]] = None,
+        tiled: bool = False,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Dosyayı process pool'da ön işle
+
+        Args:
+            file_bytes: Ham dosya baytları veya spool dosyasının yolu (yol verilirse
+                dosya worker'a pickle edilmez, worker diskten okur)
+            file_ext: Dosya uzantısı (.pdf, .png, .jpg)
+            dpi: PDF render çözünürlüğü
+            enhance_mode: "fast", "balanced", "aggressive"
+            pages: İşlenecek sayfa numaraları (None = tümü)
+            providers: Görüntü bütçesi uygulanacak sağlayıcılar
+            tiled: Sayfaları ayrıca örtüşen karolara böl
+            deadline: Mutlak bitiş zamanı (time.time()); worker aşama sınırlarında kontrol eder
+
+        Returns:
+            preprocess_drawing() ile aynı formatta sonuç; ek olarak "queue_wait"
+            (worker bekleme süresi) ve "cpu_time" (worker CPU süresi)
+
+        Raises:
+            CapacityError: Kuyruk dolu
+            DeadlineExceededError: Deadline iş bitmeden geçti
+        """
+        if self._pending >= self.workers + self.max_queue:
+            logger.warning(f"⚠️ Preprocess queue full ({self._pending} pending)")
+            raise CapacityError("Ön işleme kuyruğu dolu, lütfen daha sonra tekrar deneyin")
+
+        cancel_path = os.path.join(tempfile.gettempdir(), f"di2d-cancel-{uuid.uuid4().hex}")
+        self._pending += 1
+        queued_at = time.perf_counter()
+        try:
+            async with self._slots:
+                queue_wait = time.perf_counter() - queued_at
+                future = self._get_executor().submit(
+                    _run_preprocess,
+                    file_bytes,
+                    file_ext,
+                    dpi,
+                    enhance_mode,
+                    pages,
+                    providers,
+                    tiled,
+                    self.shm_threshold,
+                    cancel_path,
+                    deadline
+                )
+                try:
+                    result = await asyncio.wrap_future(future)
+                except asyncio.CancelledError:
+                    # Başlamamış iş hiç çalışmaz; çalışan iş sıradaki aşama sınırında durur
+                    self.cancelled += 1
+                    open(cancel_path, "wb").close()
+                    future.add_done_callback(lambda _: _remove_marker(cancel_path))
+                    # İş yine de tamamlanırsa shared memory bloklarını sızdırma
+                    future.add_done_callback(_release_result)
+                    raise
+                except PreprocessCancelled:
+                    self.cancelled += 1
+                    raise DeadlineExceededError("Ön işleme deadline dolduğu için durduruldu")
+        finally:
+            self._pending -= 1
+
+        imported: Dict[str, str] = {}
+        for image in _iter_images(result):
+            handle = image.pop("shm", None)
+            if handle is not None:
+                if handle["name"] not in imported:
+                    imported[handle["name"]] = _import_from_shm(handle).decode("ascii")
+                image["image_base64"] = imported[handle["name"]]
+
+        result["queue_wait"] = queue_wait
+        return result
+
+    def shutdown(self) -> None:
+        """Worker process'leri kapat"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("🛑 Preprocess pool stopped")
+
+
+# Singleton instance
+preprocess_pool = PreprocessPool(
+    workers=settings.preprocess_workers,
+    opencv_threads=settings.preprocess_opencv_threads,
+    max_queue=settings.preprocess_max_queue,
+    shm_threshold=settings.preprocess_shm_threshold,
+    start_method=settings.preprocess_start_method
+)
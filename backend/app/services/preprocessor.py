@@ -15,219 +15,402 @@ from PIL import Image
 import io
 import base64
 import logging
-from typing import Dict, Any, Optional, Tuple
-from pdf2image import convert_from_bytes
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple, List, Iterator, Union, Callable
+from pdf2image import convert_from_bytes, convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
+
+from app.core.config import settings
+from .image_budget import plan_image_size
+from .tiling import plan_tiles
+from .denoise import resolve_denoiser, denoise
+from .encoders import encoder_for, encode_image
 
 logger = logging.getLogger(__name__)
 
 class DrawingPreprocessor:
     """2D teknik resim ön işleme sınıfı"""
     
-    def __init__(self, dpi: int = 400, enhance_mode: str = "balanced"):
+    def __init__(
+        self,
+        dpi: int = 400,
+        enhance_mode: str = "balanced",
+        providers: Optional[List[Optional[str]]] = None,
+        tiled: bool = False,
+        denoiser: Optional[str] = None,
+        cancel_check: Optional[Callable[[], None]] = None
+    ):
         """
         Args:
             dpi: PDF render çözünürlüğü (300-600 arası önerilir)
             enhance_mode: "fast", "balanced", "aggressive"
+            providers: Görüntü bütçesi uygulanacak sağlayıcılar ("openai", "anthropic").
+                Her sayfa her sağlayıcı için ayrı boyutlandırılıp encode edilir;
+                None = sadece genel image_max_size sınırı
+            tiled: True ise sayfa ayrıca üst üste binen karolara bölünür
+            denoiser: Gürültü temizleme backend'i (None = settings.denoiser veya enhance_mode eşlemesi)
+            cancel_check: Her aşama başında çağrılır; iş iptal edildiyse exception fırlatmalıdır
         """
         self.dpi = dpi
         self.enhance_mode = enhance_mode
+        self.providers = providers or [None]
+        self.tiled = tiled
+        self.denoiser = resolve_denoiser(enhance_mode, denoiser or settings.denoiser)
+        self.timings: Dict[str, float] = {}  # Aşama adı -> toplam süre (saniye)
+        self.cancel_check = cancel_check
+    
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        """Aşama süresini self.timings'e ekle (sayfalar arasında toplanır), başlamadan iptali kontrol et"""
+        if self.cancel_check is not None:
+            self.cancel_check()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
         
-    def process_file(self, file_bytes: bytes, file_ext: str) -> Dict[str, Any]:
+    def process_file(
+        self,
+        file_bytes: Union[bytes, str],
+        file_ext: str,
+        pages: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
         """
         Dosyayı işle (PDF veya görüntü)
         
         Args:
-            file_bytes: Ham dosya baytları
+            file_bytes: Ham dosya baytları veya diskteki dosyanın yolu (kopya yapılmadan okunur)
             file_ext: Dosya uzantısı (.pdf, .png, .jpg)
+            pages: İşlenecek sayfa numaraları (1'den başlar, None = tümü)
             
         Returns:
             İşlenmiş görüntüler ve metadata
         """
-        logger.info(f"🔧 Processing {file_ext} file with DPI={self.dpi}, mode={self.enhance_mode}")
+        logger.info(f"🔧 Processing {file_ext} file with DPI={self.dpi}, mode={self.enhance_mode}, pages={pages or 'all'}")
         
         if file_ext.lower() == '.pdf':
-            return self._process_pdf(file_bytes)
+            return self._process_pdf(file_bytes, pages)
         else:
             return self._process_image(file_bytes)
     
-    def _process_pdf(self, pdf_bytes: bytes) -> Dict[str, Any]:
-        """PDF'i işle ve her sayfayı optimize et"""
-        try:
-            # PDF'i görüntülere dönüştür
-            images = convert_from_bytes(
-                pdf_bytes,
-                dpi=self.dpi,
-                fmt='png',
-                thread_count=4
-            )
+    def iter_pdf_pages(
+        self,
+        pdf_bytes: Union[bytes, str],
+        pages: Optional[List[int]] = None,
+        total_pages: Optional[int] = None
+    ) -> Iterator[Tuple[int, Image.Image]]:
+        """
+        PDF sayfalarını tembel (lazy) şekilde render et
+        
+        Her sayfa ayrı bir first_page/last_page çağrısıyla, sadece
+        tüketildiğinde rasterize edilir. Sayfalar doğrudan 8-bit gri
+        (pdftoppm -gray, sıkıştırmasız PGM) olarak üretilir.
+        
+        Args:
+            pdf_bytes: Ham PDF baytları veya PDF dosya yolu
+            pages: Render edilecek sayfa numaraları (None = tümü)
+            total_pages: Biliniyorsa toplam sayfa sayısı (pdfinfo çağrısını atlar)
+        
+        Yields:
+            (sayfa numarası, "L" modunda PIL Image)
+        """
+        if total_pages is None:
+            total_pages = self._pdf_page_count(pdf_bytes)
+        selected = pages or range(1, total_pages + 1)
+        
+        for page_no in selected:
+            if page_no < 1 or page_no > total_pages:
+                logger.warning(f"⚠️ Page {page_no} out of range (1-{total_pages}), skipped")
+                continue
             
-            logger.info(f"✅ PDF converted: {len(images)} pages at {self.dpi} DPI")
+            convert = convert_from_path if isinstance(pdf_bytes, str) else convert_from_bytes
+            with self._timed("rasterize"):
+                images = convert(
+                    pdf_bytes,
+                    dpi=self.dpi,
+                    fmt='ppm',
+                    grayscale=True,
+                    first_page=page_no,
+                    last_page=page_no
+                )
+            yield page_no, images[0]
+    
+    @staticmethod
+    def _pdf_page_count(pdf_bytes: Union[bytes, str]) -> int:
+        if isinstance(pdf_bytes, str):
+            return pdfinfo_from_path(pdf_bytes)["Pages"]
+        return pdfinfo_from_bytes(pdf_bytes)["Pages"]
+    
+    def _process_pdf(self, pdf_bytes: Union[bytes, str], pages: Optional[List[int]] = None) -> Dict[str, Any]:
+        """PDF'in seçili sayfalarını işle ve optimize et"""
+        try:
+            total_pages = self._pdf_page_count(pdf_bytes)
             
             processed_pages = []
             
-            for idx, img in enumerate(images):
-                # PIL Image'ı numpy array'e çevir
-                img_array = np.array(img)
-                
-                # BGR formatına çevir (OpenCV için)
-                if len(img_array.shape) == 3:
-                    img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-                else:
-                    img_cv = img_array
+            for page_no, img in self.iter_pdf_pages(pdf_bytes, pages, total_pages):
+                with self._timed("decode"):
+                    # PIL Image'ı tek kanallı numpy array'e çevir
+                    gray = self._to_gray_array(img)
                 
                 # Görüntüyü iyileştir
-                enhanced = self._enhance_drawing(img_cv)
+                enhanced = self._enhance_drawing(gray)
                 
-                # Base64'e çevir
-                img_base64 = self._image_to_base64(enhanced)
-                
-                processed_pages.append({
-                    "page": idx + 1,
-                    "image_base64": img_base64,
-                    "width": enhanced.shape[1],
-                    "height": enhanced.shape[0]
-                })
+                # Sağlayıcı bütçesine göre küçült ve Base64'e çevir
+                processed_pages.extend(self._encode_page(page_no, enhanced))
+            
+            logger.info(f"✅ PDF converted: {len(processed_pages)}/{total_pages} pages at {self.dpi} DPI")
             
             return {
                 "status": "success",
-                "total_pages": len(images),
+                "total_pages": total_pages,
                 "dpi": self.dpi,
                 "pages": processed_pages,
-                "enhance_mode": self.enhance_mode
+                "enhance_mode": self.enhance_mode,
+                "timings": dict(self.timings)
             }
             
         except Exception as e:
             logger.error(f"❌ PDF processing failed: {e}")
             raise
     
-    def _process_image(self, image_bytes: bytes) -> Dict[str, Any]:
+    def _process_image(self, image_bytes: Union[bytes, str]) -> Dict[str, Any]:
         """Tek görüntüyü işle"""
         try:
-            # Bayt akışından görüntü oku
-            image = Image.open(io.BytesIO(image_bytes))
-            img_array = np.array(image)
-            
-            # BGR formatına çevir
-            if len(img_array.shape) == 3 and img_array.shape[2] == 3:
-                img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            elif len(img_array.shape) == 3 and img_array.shape[2] == 4:
-                img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGBA2BGR)
-            else:
-                img_cv = cv2.cvtColor(img_array, cv2.COLOR_GRAY2BGR)
+            with self._timed("decode"):
+                # Dosyadan veya bayt akışından görüntü oku (tek kanal)
+                source = image_bytes if isinstance(image_bytes, str) else io.BytesIO(image_bytes)
+                with Image.open(source) as image:
+                    gray = self._to_gray_array(image)
             
             # Görüntüyü iyileştir
-            enhanced = self._enhance_drawing(img_cv)
-            
-            # Base64'e çevir
-            img_base64 = self._image_to_base64(enhanced)
+            enhanced = self._enhance_drawing(gray)
             
+            # Sağlayıcı bütçesine göre küçült ve Base64'e çevir
+            processed_pages = self._encode_page(1, enhanced)
             return {
                 "status": "success",
                 "total_pages": 1,
                 "dpi": self.dpi,
-                "pages": [{
-                    "page": 1,
-                    "image_base64": img_base64,
-                    "width": enhanced.shape[1],
-                    "height": enhanced.shape[0]
-                }],
-                "enhance_mode": self.enhance_mode
+                "pages": processed_pages,
+                "enhance_mode": self.enhance_mode,
+                "timings": dict(self.timings)
             }
             
         except Exception as e:
             logger.error(f"❌ Image processing failed: {e}")
             raise
     
+    @staticmethod
+    def _to_gray_array(image: Image.Image) -> np.ndarray:
+        """
+        PIL görüntüsünü tek kanallı 8-bit numpy dizisine çevir
+        
+        Şeffaf görüntüler beyaz zemin üzerine oturtulur (aksi halde
+        şeffaf alanlar siyah çıkar). Renk bilgisi burada bırakılır.
+        """
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            rgba = image.convert("RGBA")
+            background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+            image = Image.alpha_composite(background, rgba)
+        if image.mode != "L":
+            image = image.convert("L")
+        return np.asarray(image)
+    
     def _enhance_drawing(self, image: np.ndarray) -> np.ndarray:
         """
         Teknik resmi iyileştir
         
-        Pipeline:
-        1. Gürültü temizleme
+        Pipeline (tek kanal 8-bit gri, giriş ve çıkış):
+        1. Gürültü temizleme (seçili denoise backend'i)
         2. Kontrast iyileştirme
         3. Çizgi netleştirme
         4. Adaptif threshold (opsiyonel)
         """
         logger.info(f"🎨 Enhancing image: {image.shape}")
         
-        # Gri tonlamaya çevir
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
+        # Renkli girdi gelirse bir kez gri tonlamaya çevir (kopya yok)
+        with self._timed("grayscale"):
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
         
-        # 1. Gürültü temizleme (hafif)
-        denoised = cv2.fastNlMeansDenoising(gray, None, h=10, templateWindowSize=7, searchWindowSize=21)
-        logger.info("✓ Noise reduction applied")
+        # 1. Gürültü temizleme (backend enhance_mode'a göre seçilir)
+        with self._timed("denoise"):
+            denoised = denoise(gray, self.denoiser)
+        logger.info(f"✓ Noise reduction applied ({self.denoiser})")
         
         # 2. Kontrast iyileştirme (CLAHE - Contrast Limited Adaptive Histogram Equalization)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        contrasted = clahe.apply(denoised)
+        with self._timed("contrast"):
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            contrasted = clahe.apply(denoised)
         logger.info("✓ Contrast enhanced (CLAHE)")
         
-        if self.enhance_mode == "aggressive":
-            # 3. Agresif keskinleştirme
-            kernel = np.array([[-1, -1, -1],
-                               [-1,  9, -1],
-                               [-1, -1, -1]])
-            sharpened = cv2.filter2D(contrasted, -1, kernel)
-            logger.info("✓ Aggressive sharpening applied")
-            result = sharpened
-            
-        elif self.enhance_mode == "balanced":
-            # 3. Dengeli keskinleştirme
-            blurred = cv2.GaussianBlur(contrasted, (0, 0), 3)
-            sharpened = cv2.addWeighted(contrasted, 1.5, blurred, -0.5, 0)
-            logger.info("✓ Balanced sharpening applied")
-            result = sharpened
-            
-        else:  # fast
-            # Minimal işleme
-            result = contrasted
-            logger.info("✓ Fast mode: minimal processing")
-        
-        # Tekrar BGR'ye çevir (AI modeli için)
-        result_bgr = cv2.cvtColor(result, cv2.COLOR_GRAY2BGR)
+        with self._timed("sharpen"):
+            if self.enhance_mode == "aggressive":
+                # 3. Agresif keskinleştirme
+                kernel = np.array([[-1, -1, -1],
+                                   [-1,  9, -1],
+                                   [-1, -1, -1]])
+                sharpened = cv2.filter2D(contrasted, -1, kernel)
+                logger.info("✓ Aggressive sharpening applied")
+                result = sharpened
+                
+            elif self.enhance_mode == "balanced":
+                # 3. Dengeli keskinleştirme
+                blurred = cv2.GaussianBlur(contrasted, (0, 0), 3)
+                sharpened = cv2.addWeighted(contrasted, 1.5, blurred, -0.5, 0)
+                logger.info("✓ Balanced sharpening applied")
+                result = sharpened
+                
+            else:  # fast
+                # Minimal işleme
+                result = contrasted
+                logger.info("✓ Fast mode: minimal processing")
         
-        logger.info(f"✅ Enhancement complete: {result_bgr.shape}")
-        return result_bgr
+        logger.info(f"✅ Enhancement complete: {result.shape}")
+        return result
     
-    def _image_to_base64(self, image: np.ndarray) -> str:
-        """Numpy görüntüsünü base64 PNG string'e çevir"""
-        try:
-            # BGR'den RGB'ye çevir
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    def _encode_page(self, page_no: int, enhanced: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        İyileştirilmiş sayfayı her sağlayıcının bütçesine göre küçültüp encode et
+        
+        Tiled modda sayfanın karoları da aynı şekilde encode edilir ve
+        her sağlayıcı girdisinin "tiles" listesine eklenir.
+        """
+        source_height, source_width = enhanced.shape[:2]
+        entries = [
+            {
+                "page": page_no,
+                "provider": provider,
+                **variant,
+                "source_width": source_width,
+                "source_height": source_height
+            }
+            for provider, variant in zip(self.providers, self._encode_variants(enhanced))
+        ]
+        
+        if self.tiled:
+            tiles = plan_tiles(
+                source_width,
+                source_height,
+                tile_size=settings.tile_size,
+                overlap=settings.tile_overlap,
+                max_tiles=settings.tile_max_tiles
+            )
+            logger.info(f"🧩 Page {page_no} split into {len(tiles)} tiles")
+            for entry in entries:
+                entry["layout"] = "tiled"
+                entry["tiles"] = []
             
-            # PIL Image'a çevir
-            pil_img = Image.fromarray(image_rgb)
+            for tile in tiles:
+                crop = enhanced[tile["y"]:tile["y"] + tile["height"], tile["x"]:tile["x"] + tile["width"]]
+                for entry, variant in zip(entries, self._encode_variants(crop)):
+                    entry["tiles"].append({
+                        **tile,
+                        "page": page_no,
+                        "page_width": source_width,
+                        "page_height": source_height,
+                        **variant
+                    })
+        
+        return entries
+    
+    def _encode_variants(self, image: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Görüntüyü sağlayıcı sırasıyla küçültüp encode et
+        
+        Küçültme encode'dan önce tek seferde INTER_AREA ile yapılır; aynı
+        hedef boyutu ve encoder'ı paylaşan sağlayıcılar aynı çıktıyı kullanır.
+        """
+        source_height, source_width = image.shape[:2]
+        encoded: Dict[Tuple[int, int, str], Dict[str, Any]] = {}
+        resized_cache: Dict[Tuple[int, int], np.ndarray] = {}
+        variants = []
+        
+        for provider in self.providers:
+            width, height, image_tokens = plan_image_size(provider, source_width, source_height)
+            encoder = encoder_for(provider)
             
-            # Bayt buffer'a kaydet
-            buffer = io.BytesIO()
-            pil_img.save(buffer, format="PNG", optimize=True)
-            buffer.seek(0)
+            if (width, height, encoder) not in encoded:
+                if (width, height) not in resized_cache:
+                    if (width, height) != (source_width, source_height):
+                        with self._timed("resize"):
+                            resized_cache[(width, height)] = cv2.resize(
+                                image, (width, height), interpolation=cv2.INTER_AREA
+                            )
+                        logger.info(f"📐 Resized for {provider or 'default'}: {source_width}x{source_height} → {width}x{height}")
+                    else:
+                        resized_cache[(width, height)] = image
+                encoded[(width, height, encoder)] = self._encode_image(resized_cache[(width, height)], encoder)
             
-            # Base64'e encode et
-            img_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+            variants.append({
+                **encoded[(width, height, encoder)],
+                "width": width,
+                "height": height,
+                "estimated_image_tokens": image_tokens
+            })
+        
+        return variants
+    
+    def _encode_image(self, image: np.ndarray, encoder: str) -> Dict[str, Any]:
+        """
+        Görüntüyü seçilen encoder ile base64'e çevir, süre ve boyutu kaydet
+        
+        Returns:
+            {"image_base64", "media_type", "encoder", "encoded_bytes", "encode_time"}
+        """
+        try:
+            with self._timed("encode"):
+                start = time.perf_counter()
+                data, media_type = encode_image(image, encoder)
+                img_base64 = base64.b64encode(data).decode('utf-8')
+                encode_time = time.perf_counter() - start
             
-            return img_base64
+            logger.info(f"🗜️ Encoded {image.shape[1]}x{image.shape[0]} as {encoder}: {len(data) / 1024:.0f} KB in {encode_time:.2f}s")
+            return {
+                "image_base64": img_base64,
+                "media_type": media_type,
+                "encoder": encoder,
+                "encoded_bytes": len(data),
+                "encode_time": encode_time
+            }
             
         except Exception as e:
             logger.error(f"❌ Base64 conversion failed: {e}")
             raise
+    
+    def _image_to_base64(self, image: np.ndarray, encoder: Optional[str] = None) -> str:
+        """Numpy görüntüsünü base64 string'e çevir (varsayılan: settings.image_encoder)"""
+        return self._encode_image(image, encoder or encoder_for(None))["image_base64"]
 
 
-def preprocess_drawing(file_bytes: bytes, file_ext: str, dpi: int = 400, enhance_mode: str = "balanced") -> Dict[str, Any]:
+def preprocess_drawing(
+    file_bytes: Union[bytes, str],
+    file_ext: str,
+    dpi: int = 400,
+    enhance_mode: str = "balanced",
+    pages: Optional[List[int]] = None,
+    providers: Optional[List[Optional[str]]] = None,
+    tiled: bool = False,
+    cancel_check: Optional[Callable[[], None]] = None
+) -> Dict[str, Any]:
     """
     Kolaylık fonksiyonu - teknik resim ön işleme
     
     Args:
-        file_bytes: Ham dosya baytları
+        file_bytes: Ham dosya baytları veya dosya yolu
         file_ext: Dosya uzantısı (.pdf, .png, .jpg)
         dpi: PDF render çözünürlüğü
         enhance_mode: "fast", "balanced", "aggressive"
+        pages: İşlenecek sayfa numaraları (None = tümü)
+        providers: Görüntü bütçesi uygulanacak sağlayıcılar (sayfa başına birer çıktı)
+        tiled: Sayfaları ayrıca örtüşen karolara böl
+        cancel_check: Aşama sınırlarında çağrılan iptal kontrolü
     
     Returns:
         İşlenmiş görüntüler ve metadata
     """
-    preprocessor = DrawingPreprocessor(dpi=dpi, enhance_mode=enhance_mode)
-    return preprocessor.process_file(file_bytes, file_ext)
+    preprocessor = DrawingPreprocessor(
+        dpi=dpi, enhance_mode=enhance_mode, providers=providers, tiled=tiled, cancel_check=cancel_check
+    )
+    return preprocessor.process_file(file_bytes, file_ext, pages=pages)
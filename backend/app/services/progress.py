@@ -0,0 +1,107 @@
+"""
+DI-2D Analiz İlerleme Olayları
+
+`high`/`xhigh` analizler dakikalarca sürer; tek bir HTTP isteği bu sürede
+sessiz kalınca proxy'ler bağlantıyı keser. AnalysisProgress, analiz
+pipeline'ının aşama olaylarını bir kuyruğa yazar; SSE endpoint'i kuyruğu
+tüketip olayları anında istemciye iletir, sessiz aralıklarda heartbeat
+gönderir.
+
+Olay sırası (standart analiz):
+
+    uploaded -> cache_hit? -> rasterized -> enhanced -> provider_call_started
+    -> first_token -> (tokens | section)* -> parsed -> validated -> result | error
+
+`section` olayı, model çıktısında kapanan üst düzey JSON bölümünü
+(title_block, material, geometry, ...) `data` alanında taşır.
+
+Her olay `elapsed` (analiz başından beri) ve `duration` (önceki olaydan
+beri) sürelerini saniye cinsinden taşır.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisProgress:
+    """Tek bir analizin aşama olayları için async kuyruk"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    def emit(self, event: str, **data: Any) -> None:
+        """Aşama olayı ekle (kapandıktan sonra gelen olaylar yok sayılır)"""
+        if self.closed:
+            return
+        now = time.perf_counter()
+        self._queue.put_nowait({
+            "event": event,
+            "elapsed": round(now - self.start, 3),
+            "duration": round(now - self._last, 3),
+            **data
+        })
+        self._last = now
+
+    def close(self) -> None:
+        """Akışı sonlandır (events() döngüsü biter)"""
+        if not self.closed:
+            self.closed = True
+            self._queue.put_nowait(None)
+
+    async def events(self, heartbeat_interval: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Olayları geldikçe döndür
+
+        heartbeat_interval boyunca olay gelmezse None döner; çağıran taraf
+        bağlantıyı canlı tutmak için heartbeat yazar.
+        """
+        while True:
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout=heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is None:
+                return
+            yield event
+
+
+class ProgressBroadcast(AnalysisProgress):
+    """
+    Paylaşılan (single-flight) analizin olaylarını o an bekleyen isteklere ilet
+
+    Sonradan katılan istek katıldığı andan itibaren olayları alır; süreler
+    (elapsed, duration) her isteğin kendi kuyruğunda hesaplanır.
+    """
+
+    def __init__(self, targets: Callable[[], Iterable[Optional[AnalysisProgress]]]):
+        super().__init__()
+        self._targets = targets
+
+    def emit(self, event: str, **data: Any) -> None:
+        for progress in self._targets():
+            report(progress, event, **data)
+
+
+def report(progress: Optional[AnalysisProgress], event: str, **data: Any) -> None:
+    """progress verilmişse olay ekle (normal /analyze çağrılarında no-op)"""
+    if progress is not None:
+        progress.emit(event, **data)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Olayı Server-Sent Events çerçevesine çevir"""
+    payload = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event['event']}\ndata: {payload}\n\n"
+
+
+def format_heartbeat(elapsed: float) -> str:
+    """SSE yorum satırı - istemci olay olarak görmez, proxy bağlantıyı canlı sayar"""
+    return f": heartbeat {elapsed:.0f}s\n\n"
@@ -6,8 +6,32 @@ Her model için özelleştirilmiş prompt'lar:
 - OpenAI GPT-4 Vision: Yapılandırılmış JSON çıktısı
 - Claude 3.5 Sonnet: Detaylı geometrik analiz
 - Gemini 1.5 Pro: Hızlı genel değerlendirme
+
+Prompt'lar (sağlayıcı, reasoning_level) başına bir kez üretilip bellekte
+tutulur. Sağlayıcı tarafı prompt önbelleği için metinler sabit önek + değişken
+son ek düzenindedir: değişken kısımlar (reasoning modu, karo konumu) en sonda,
+görüntüler mesajın en sonunda gönderilir.
 """
+import hashlib
+from functools import lru_cache
+
+# Prompt metinleri değiştiğinde artırılmalı (önbellek anahtarlarına dahil edilir)
+PROMPT_VERSION = "2025.12.3"
+
 
+@lru_cache(maxsize=64)
+def prompt_cache_key(system_prompt: str) -> str:
+    """
+    Sağlayıcı prompt önbelleği için sabit anahtar (OpenAI prompt_cache_key)
+    
+    Aynı önekli istekler aynı anahtarla gönderilince aynı önbellek
+    sunucusuna yönlendirilir; prompt sürümü veya metni değişince anahtar da değişir.
+    """
+    digest = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+    return f"di2d-{PROMPT_VERSION}-{digest}"
+
+
+@lru_cache(maxsize=None)
 def get_analysis_prompt(model_type: str, reasoning_level: str = "high") -> tuple[str, str]:
     """
     Model tipine göre system ve user prompt'ları döndür
@@ -17,7 +41,7 @@ def get_analysis_prompt(model_type: str, reasoning_level: str = "high") -> tuple
         reasoning_level: "medium", "high", "xhigh"
     
     Returns:
-        (system_prompt, user_prompt) tuple
+        (system_prompt, user_prompt) tuple (önbellekten, değiştirilmemeli)
     """
     if model_type == "openai":
         return _get_openai_prompts(reasoning_level)
@@ -29,6 +53,61 @@ def get_analysis_prompt(model_type: str, reasoning_level: str = "high") -> tuple
         raise ValueError(f"Unknown model type: {model_type}")
 
 
+@lru_cache(maxsize=256)
+def get_tile_prompt(row: int, col: int, rows: int, cols: int) -> tuple[str, str]:
+    """
+    Tiled analiz modunda tek bir karo için prompt'lar (tüm sağlayıcılar)
+    
+    Args:
+        row: Karo satırı (0'dan başlar)
+        col: Karo sütunu (0'dan başlar)
+        rows: Izgaradaki satır sayısı
+        cols: Izgaradaki sütun sayısı
+    
+    Returns:
+        (system_prompt, user_prompt) tuple
+    """
+    system_prompt = """Sen 20 yıllık deneyimli bir CNC imalat mühendisi ve teknik resim uzmanısın.
+Sana büyük bir montaj/teknik resmin sadece bir KARO'su (kesiti) veriliyor.
+Görevin bu karoda görünen ölçüleri, özellikleri ve toleransları eksiksiz okumak."""
+
+    user_prompt = f"""Bu görüntü ızgaraya bölünmüş bir teknik resmin tek bir karosudur.
+Komşu karolar kenarlarda örtüşür; kenarda kesilmiş ve okunamayan yazıları ATLA, tahmin etme.
+
+Sadece bu karoda GÖRÜNEN bilgileri aşağıdaki JSON formatında döndür:
+
+```json
+{{
+  "dimensions": [
+    {{"value": 12.5, "unit": "mm", "tolerance": "±0.1", "location": "Ölçünün neyi gösterdiği", "bbox": [0.10, 0.20, 0.18, 0.24]}}
+  ],
+  "features": [
+    {{
+      "type": "hole|pocket|slot|groove|thread|fillet|chamfer",
+      "quantity": 4,
+      "dimensions": {{"diameter": 6.5, "depth": 15}},
+      "position": "Pozisyon açıklaması",
+      "notes": null,
+      "bbox": [0.40, 0.35, 0.55, 0.50]
+    }}
+  ],
+  "tolerances": [
+    {{"type": "dimensional|geometric|surface", "value": "⊥ 0.05 A", "reference": null, "bbox": [0.60, 0.70, 0.70, 0.74]}}
+  ],
+  "notes": ["Bu karoda okunan notlar"]
+}}
+```
+
+bbox: Öğenin (ölçü yazısı, özellik veya tolerans kutucuğu) bu karo içindeki konumu,
+0-1 arası normalize [sol, üst, sağ, alt] koordinatlar.
+
+SADECE GEÇERLİ JSON DÖNDÜR. Açıklama veya markdown kod bloğu EKLEME.
+
+KARO KONUMU: {rows}x{cols} ızgarada {row + 1}. satır, {col + 1}. sütun."""
+
+    return system_prompt, user_prompt
+
+
 def _get_openai_prompts(reasoning_level: str) -> tuple[str, str]:
     """OpenAI GPT-4 Vision için prompt'lar"""
     
@@ -99,9 +178,7 @@ STANDART ANALİZ MOD (medium):
 - Genel imalat önerisi sun
 """
     
-    user_prompt = f"""{reasoning_instruction}
-
-Bu 2D teknik resmi analiz et ve aşağıdaki JSON formatında döndür:
+    user_prompt = f"""Bu 2D teknik resmi analiz et ve aşağıdaki JSON formatında döndür:
 
 ```json
 {{
@@ -188,7 +265,8 @@ Bu 2D teknik resmi analiz et ve aşağıdaki JSON formatında döndür:
 }}
 ```
 
-SADECE GEÇERLİ JSON DÖNDÜR. Açıklama veya markdown kod bloğu EKLEME."""
+SADECE GEÇERLİ JSON DÖNDÜR. Açıklama veya markdown kod bloğu EKLEME.
+{reasoning_instruction}"""
 
     return system_prompt, user_prompt
 
@@ -0,0 +1,208 @@
+"""
+DI-2D Sağlayıcı Kabul Katmanı (Admission)
+
+Route'lar ile OpenAI/Anthropic/Werk24 çağrıları arasında kısma yoktu; bir
+yükleme patlaması doğrudan 429 patlamasına, başarısız analizlere ve
+kullanıcıların yeniden denemelerine dönüşüyordu.
+
+Her sağlayıcı için bir ProviderLimiter:
+
+- max_in_flight: Aynı anda açık çağrı sınırı
+- rpm: Dakika başına istek kovası (token bucket)
+- tpm: Dakika başına token kovası; çağrı başı tahmin gerçek `tokens_used`
+  değerlerinden öğrenilir (EWMA), fark çağrı bitince kovaya yansıtılır
+- Kuyruk adildir (FIFO): sıradaki çağrı kabul edilmeden arkadaki geçemez
+- Kuyruk sınırlıdır: max_queue çağrı beklerken gelen istek CapacityError alır
+
+Bekleme süresi çağrı sonucuna (`queue_wait`) ve stats() sayaçlarına yazılır.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+from app.core.exceptions import CapacityError
+from .progress import AnalysisProgress, report
+
+logger = logging.getLogger(__name__)
+
+
+class _TokenBucket:
+    """Dakika başına kapasiteli kova (capacity <= 0 = sınırsız)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def shortfall(self, amount: float) -> float:
+        """amount çekilebilmesi için beklenmesi gereken süre (saniye)"""
+        if self.unlimited:
+            return 0.0
+        # Kapasiteden büyük talepler kova dolunca geçer (sonsuza kadar beklemesin)
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed * 60.0 / self.capacity)
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level -= amount
+
+
+class Admission:
+    """Kabul edilmiş tek çağrı; çağıran tokens_used'ı doldurur"""
+
+    __slots__ = ("queue_wait", "estimated_tokens", "tokens_used")
+
+    def __init__(self, queue_wait: float, estimated_tokens: float):
+        self.queue_wait = queue_wait
+        self.estimated_tokens = estimated_tokens
+        self.tokens_used: Optional[int] = None
+
+
+class ProviderLimiter:
+    """Tek sağlayıcı için eşzamanlılık sınırı + RPM/TPM kovaları"""
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        rpm: float,
+        tpm: float,
+        initial_tokens: float,
+        max_queue: int = 0
+    ):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max_queue  # <= 0 = sınırsız
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._turn = asyncio.Lock()  # FIFO sıra: kuyruk başı kabul edilmeden diğerleri bekler
+        self._requests = _TokenBucket(rpm)
+        self._tokens = _TokenBucket(tpm)
+        self.estimated_tokens = float(initial_tokens)
+
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def admit(self, progress: Optional[AnalysisProgress] = None) -> AsyncIterator[Admission]:
+        """
+        Çağrı için sıraya gir, kabul edilince bloğu çalıştır
+
+        Örnek:
+            async with limiter.admit() as admission:
+                result = await call()
+                admission.tokens_used = result.get("tokens_used")
+
+        Raises:
+            CapacityError: Kabul kuyruğu dolu
+        """
+        if 0 < self.max_queue <= self.queued:
+            logger.warning(f"⚠️ {self.name} admission queue full ({self.queued} queued)")
+            raise CapacityError(f"{self.name} kuyruğu dolu, lütfen daha sonra tekrar deneyin")
+        start = time.perf_counter()
+        self.queued += 1
+        try:
+            async with self._turn:
+                await self._slots.acquire()
+                try:
+                    estimated = await self._wait_for_budget()
+                except BaseException:
+                    self._slots.release()
+                    raise
+        finally:
+            self.queued -= 1
+
+        wait = time.perf_counter() - start
+        self.admitted += 1
+        self.in_flight += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait >= 1.0:
+            logger.info(f"⏳ {self.name} admission after {wait:.1f}s queue wait")
+        report(progress, "provider_admitted", provider=self.name, queue_wait=round(wait, 3))
+
+        admission = Admission(wait, estimated)
+        try:
+            yield admission
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            self._settle(admission)
+
+    async def _wait_for_budget(self) -> float:
+        """RPM/TPM kovalarında yer açılana kadar bekle, tahmini token'ı düş"""
+        estimated = self.estimated_tokens
+        while True:
+            self._requests.refill()
+            self._tokens.refill()
+            delay = max(self._requests.shortfall(1), self._tokens.shortfall(estimated))
+            if delay <= 0:
+                self._requests.take(1)
+                self._tokens.take(estimated)
+                return estimated
+            await asyncio.sleep(min(delay, 5.0))
+
+    def _settle(self, admission: Admission) -> None:
+        """Gerçek token kullanımını kovaya yansıt ve tahmini güncelle"""
+        if not admission.tokens_used:
+            return
+        self._tokens.take(admission.tokens_used - admission.estimated_tokens)
+        alpha = settings.rate_limit_token_ewma
+        self.estimated_tokens = (1 - alpha) * self.estimated_tokens + alpha * admission.tokens_used
+
+    def stats(self) -> Dict[str, Any]:
+        """Kuyruk ve bekleme sayaçları"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "avg_queue_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_queue_wait": self.max_wait,
+            "estimated_tokens_per_call": round(self.estimated_tokens),
+            "rpm_available": None if self._requests.unlimited else round(self._requests.level, 1),
+            "tpm_available": None if self._tokens.unlimited else round(self._tokens.level)
+        }
+
+
+provider_limiters: Dict[str, ProviderLimiter] = {
+    "openai": ProviderLimiter(
+        "openai",
+        settings.openai_max_in_flight,
+        settings.openai_rpm,
+        settings.openai_tpm,
+        settings.rate_limit_initial_tokens,
+        settings.provider_max_queue
+    ),
+    "anthropic": ProviderLimiter(
+        "anthropic",
+        settings.anthropic_max_in_flight,
+        settings.anthropic_rpm,
+        settings.anthropic_tpm,
+        settings.rate_limit_initial_tokens,
+        settings.provider_max_queue
+    ),
+    "werk24": ProviderLimiter(
+        "werk24",
+        settings.werk24_max_in_flight,
+        settings.werk24_rpm,
+        0,
+        0,
+        settings.provider_max_queue
+    ),
+}
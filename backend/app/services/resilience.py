@@ -0,0 +1,138 @@
+"""
+DI-2D Sağlayıcı Dayanıklılığı: Gecikme İzleme ve Devre Kesici
+
+Sağlayıcı gecikmesinin kuyruğu çok uzundur: GPT-5.2 high çağrılarının
+çoğu 5 dakikada biter, bazıları 20 dakika sürer. Bir sağlayıcı arıza
+verirken veya yavaşlarken her isteğin kendi zaman aşımını beklemesi de
+kapasiteyi boşa harcar.
+
+- LatencyTracker: (model, reasoning_level) başına son çağrı sürelerini
+  tutar; hedging gecikmesi bu dağılımın yüzdeliğinden hesaplanır
+- CircuitBreaker: Sağlayıcı başına son çağrı sonuçları; hata veya yavaş
+  çağrı oranı eşiği aşınca devre açılır, istekler yedek modele yönlenir
+  ya da hemen reddedilir. Bekleme süresi sonunda tek bir deneme çağrısına
+  izin verilir (half-open).
+"""
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Model ve reasoning seviyesine göre son başarılı çağrı süreleri"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, model: str, reasoning_level: str, duration: float) -> None:
+        key = (model, reasoning_level)
+        if key not in self._samples:
+            self._samples[key] = deque(maxlen=self.window)
+        self._samples[key].append(duration)
+
+    def percentile(self, model: str, reasoning_level: str, q: float, min_samples: int) -> Optional[float]:
+        """
+        Gözlenen sürelerin q yüzdeliği (0-1)
+
+        Returns:
+            Saniye; yeterli örnek yoksa None
+        """
+        samples = self._samples.get((model, reasoning_level))
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Tek sağlayıcı için closed -> open -> half_open devre kesici"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = "closed"
+        self._outcomes: Deque[bool] = deque(maxlen=settings.breaker_window)  # True = başarısız/yavaş
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Çağrıya izin var mı (half-open'da tek deneme çağrısı geçer)"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= settings.breaker_open_seconds:
+            self.state = "half_open"
+            self._probe_in_flight = False
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, duration: float, timeout: float) -> None:
+        """Başarılı çağrı; zaman aşımının breaker_slow_ratio'sunu aşan çağrı yavaş sayılır"""
+        slow = duration >= timeout * settings.breaker_slow_ratio
+        if slow:
+            logger.warning(f"🐢 Slow {self.name} call: {duration:.0f}s (timeout {timeout:.0f}s)")
+        self._record(bad=slow)
+
+    def record_failure(self) -> None:
+        self._record(bad=True)
+
+    def record_slow(self, elapsed: float) -> None:
+        """Sonucu beklenmeden bırakılan yavaş çağrı (hedging kaybedeni) - yavaş sayılır"""
+        logger.warning(f"🐢 Slow {self.name} call hedged away after {elapsed:.0f}s")
+        self._record(bad=True)
+
+    def record_abandoned(self) -> None:
+        """Sonuçsuz biten çağrı (iptal vb.) - deneme hakkını geri ver, istatistiğe katma"""
+        if self.state == "half_open":
+            self._probe_in_flight = False
+
+    def _record(self, bad: bool) -> None:
+        if self.state == "half_open":
+            self._probe_in_flight = False
+            if bad:
+                self._open()
+            else:
+                logger.info(f"✅ Circuit for {self.name} closed")
+                self.state = "closed"
+                self._outcomes.clear()
+            return
+
+        self._outcomes.append(bad)
+        if self.state == "closed" and len(self._outcomes) >= settings.breaker_min_calls:
+            ratio = sum(self._outcomes) / len(self._outcomes)
+            if ratio >= settings.breaker_failure_ratio:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        logger.warning(f"🔌 Circuit for {self.name} opened for {settings.breaker_open_seconds:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        recent = len(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": recent,
+            "recent_failure_ratio": sum(self._outcomes) / recent if recent else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+latency_tracker = LatencyTracker(settings.hedge_latency_window)
+
+circuit_breakers: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(name) for name in ("openai", "anthropic")
+}
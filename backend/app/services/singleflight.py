@@ -0,0 +1,108 @@
+"""
+DI-2D Single-Flight (Eşzamanlı İstek Birleştirme)
+
+Kullanıcı çift tıkladığında veya iki iş aynı çizimi aynı anda gönderdiğinde
+aynı 10 dakikalık GPT-5.2 çağrısı iki kez başlar (Werk24'te iki kredi
+harcanır). Sonuç önbelleği ancak ilk analiz bittikten sonra işe yarar.
+
+SingleFlight aynı anahtarlı (dosya hash'i + model + parametreler) eşzamanlı
+çağrıları tek bir task'a bağlar:
+
+- İlk çağıran task'ı başlatır, sonrakiler aynı task'ı bekler
+- Tüm bekleyenler aynı sonucu (veya aynı hatayı) alır
+- Bir bekleyen iptal edilirse (istemci koptu) task sürer; task ancak son
+  bekleyen de ayrıldığında iptal edilir
+- Her bekleyen kendi bağlamını (ilerleme kuyruğu, deadline, ...) bırakabilir;
+  task o an bekleyenlerin bağlamlarını waiters() ile okur
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """Tek bir anahtarın devam eden işi"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters: List[Any] = []
+
+
+class SingleFlight:
+    """Anahtar başına tek devam eden task"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._flights
+
+    def waiters(self, key: str) -> List[Any]:
+        """Anahtarın devam eden işini o an bekleyenlerin bağlamları"""
+        flight = self._flights.get(key)
+        return list(flight.waiters) if flight is not None else []
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]], waiter: Any = None) -> Tuple[Any, bool]:
+        """
+        Anahtar için devam eden işe katıl veya yenisini başlat
+
+        Args:
+            key: Birleştirme anahtarı (eşit anahtar = aynı iş)
+            factory: İşi başlatan coroutine fabrikası (sadece lider için çağrılır)
+            waiter: Bu bekleyenin bağlamı (beklediği sürece waiters() içinde görünür)
+
+        Returns:
+            (sonuç, shared) - shared=True ise sonuç başka bir çağrıyla paylaşıldı
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.create_task(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._forget(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"🔗 Coalesced with in-flight {self.name}: waiters={len(flight.waiters) + 1}")
+
+        flight.waiters.append(waiter)
+        try:
+            # shield: bekleyenin iptali task'ı değil sadece bu beklemeyi iptal eder
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if len(flight.waiters) == 1 and not flight.task.done():
+                logger.info(f"🛑 Last waiter left, cancelling in-flight {self.name}")
+                self.cancelled += 1
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters.remove(waiter)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Başlatılan/birleştirilen/iptal edilen iş sayaçları"""
+        return {
+            "in_flight": self.in_flight,
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled
+        }
+
+
+# Analiz çağrıları için paylaşılan örnek (anahtarlar sonuç önbelleği anahtarlarıdır)
+analysis_flights = SingleFlight("analysis")
@@ -0,0 +1,173 @@
+"""
+DI-2D Karo (Tiled) Analiz Yardımcıları
+
+A0/A1 montaj resimlerinde küçük ölçü yazıları tek bir görüntüye
+sıkıştırıldığında okunamaz hale gelir. Tiled modda iyileştirilmiş sayfa
+üst üste binen karolara bölünür, karolar eşzamanlı analiz edilir ve
+sonuçlar tek bir DrawingAnalysisResult altında birleştirilir.
+
+- Karo ızgarası sayfa boyutundan hesaplanır (tile_size, tile_max_tiles)
+- Karo çıktılarındaki bbox'lar sayfa koordinatlarına taşınır
+- Örtüşme bölgesinde iki karoda birden okunan öğeler mekânsal olarak elenir
+"""
+import json
+import math
+from typing import Dict, Any, List, Optional, Tuple
+
+# Öğe tipi -> içerik anahtarı için kullanılan alanlar
+_ITEM_KEYS = {
+    "dimensions": ("value", "unit", "tolerance"),
+    "features": ("type", "dimensions"),
+    "tolerances": ("type", "value", "reference"),
+}
+
+
+def plan_tiles(
+    width: int,
+    height: int,
+    tile_size: int,
+    overlap: float,
+    max_tiles: int
+) -> List[Dict[str, int]]:
+    """
+    Sayfayı üst üste binen karolara böl
+
+    Args:
+        width: Sayfa genişliği (px)
+        height: Sayfa yüksekliği (px)
+        tile_size: Hedef karo kenarı (örtüşme hariç, px)
+        overlap: Komşu karolar arası örtüşme oranı (karo kenarına göre)
+        max_tiles: Maksimum karo sayısı (aşılırsa karolar büyütülür)
+
+    Returns:
+        {"index", "row", "col", "x", "y", "width", "height"} listesi
+    """
+    cols = max(1, math.ceil(width / tile_size))
+    rows = max(1, math.ceil(height / tile_size))
+    while rows * cols > max_tiles:
+        tile_size = int(tile_size * 1.25)
+        cols = max(1, math.ceil(width / tile_size))
+        rows = max(1, math.ceil(height / tile_size))
+
+    step_x = width / cols
+    step_y = height / rows
+    pad_x = int(step_x * overlap / 2) if cols > 1 else 0
+    pad_y = int(step_y * overlap / 2) if rows > 1 else 0
+
+    tiles = []
+    for row in range(rows):
+        for col in range(cols):
+            x0 = max(0, int(col * step_x) - pad_x)
+            y0 = max(0, int(row * step_y) - pad_y)
+            x1 = min(width, int((col + 1) * step_x) + pad_x)
+            y1 = min(height, int((row + 1) * step_y) + pad_y)
+            tiles.append({
+                "index": len(tiles),
+                "row": row,
+                "col": col,
+                "x": x0,
+                "y": y0,
+                "width": x1 - x0,
+                "height": y1 - y0
+            })
+    return tiles
+
+
+def _content_key(kind: str, item: Dict[str, Any]) -> str:
+    return json.dumps([item.get(field) for field in _ITEM_KEYS[kind]], sort_keys=True, default=str)
+
+
+def _page_center(item: Dict[str, Any], tile: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Karoya göre normalize bbox'ın merkezini sayfa pikseline taşı"""
+    bbox = item.get("bbox")
+    if not isinstance(bbox, (list, tuple)) or len(bbox) != 4:
+        return None
+    try:
+        x0, y0, x1, y1 = (min(1.0, max(0.0, float(v))) for v in bbox)
+    except (TypeError, ValueError):
+        return None
+    return (
+        tile["x"] + (x0 + x1) / 2 * tile["width"],
+        tile["y"] + (y0 + y1) / 2 * tile["height"]
+    )
+
+
+def _edge_margin(center: Tuple[float, float], tile: Dict[str, Any]) -> float:
+    """Merkezin karo kenarına uzaklığı (kenarda kırpılmış okuma riskini temsil eder)"""
+    cx, cy = center
+    return min(
+        cx - tile["x"],
+        tile["x"] + tile["width"] - cx,
+        cy - tile["y"],
+        tile["y"] + tile["height"] - cy
+    )
+
+
+def _tiles_touch(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return (
+        a["page"] == b["page"]
+        and a["x"] < b["x"] + b["width"] and b["x"] < a["x"] + a["width"]
+        and a["y"] < b["y"] + b["height"] and b["y"] < a["y"] + a["height"]
+    )
+
+
+def merge_tile_items(
+    kind: str,
+    tile_results: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+    dedupe_distance: float
+) -> List[Dict[str, Any]]:
+    """
+    Karolardan gelen öğeleri birleştir ve örtüşme tekrarlarını ele
+
+    Aynı içerik anahtarına sahip iki öğe, merkezleri sayfa köşegeninin
+    `dedupe_distance` oranı kadar yakınsa aynı öğe sayılır; karo kenarından
+    en uzak olan (kırpılma ihtimali en düşük) okuma tutulur. bbox vermeyen
+    öğeler sadece birbirine değen karolar arasında içerikten elenir.
+
+    Args:
+        kind: "dimensions", "features" veya "tolerances"
+        tile_results: (karo, karo analiz sonucu) listesi
+        dedupe_distance: Sayfa köşegenine oranla eşleşme mesafesi
+
+    Returns:
+        Birleştirilmiş öğe listesi (bbox alanı çıkarılmış)
+    """
+    kept: List[Dict[str, Any]] = []
+
+    for tile, result in tile_results:
+        diagonal = math.hypot(tile["page_width"], tile["page_height"])
+        for item in result.get(kind) or []:
+            if not isinstance(item, dict):
+                continue
+            candidate = {
+                "item": {k: v for k, v in item.items() if k != "bbox"},
+                "key": _content_key(kind, item),
+                "tile": tile,
+                "center": _page_center(item, tile)
+            }
+
+            duplicate = None
+            for existing in kept:
+                if existing["key"] != candidate["key"] or existing["tile"] is tile:
+                    continue
+                if candidate["center"] is not None and existing["center"] is not None:
+                    if existing["tile"]["page"] != tile["page"]:
+                        continue
+                    distance = math.dist(candidate["center"], existing["center"])
+                    if distance <= dedupe_distance * diagonal:
+                        duplicate = existing
+                        break
+                elif _tiles_touch(existing["tile"], tile):
+                    duplicate = existing
+                    break
+
+            if duplicate is None:
+                kept.append(candidate)
+            elif (
+                candidate["center"] is not None
+                and duplicate["center"] is not None
+                and _edge_margin(candidate["center"], tile) > _edge_margin(duplicate["center"], duplicate["tile"])
+            ):
+                kept[kept.index(duplicate)] = candidate
+
+    return [entry["item"] for entry in kept]
@@ -0,0 +1,222 @@
+"""
+DI-2D Yükleme (Upload) Spool'u
+
+`await file.read()` ile 20 MB'a kadar yüklemeler bütünüyle bellekte tutulup
+base64 ve provider payload'larına kopyalanıyordu. Bu modül yüklemeyi
+parça parça okur:
+
+- İlk parçada magic-byte doğrulaması (yanlış içerik hemen reddedilir)
+- Okurken artımlı SHA-256 (önbellek anahtarı için ikinci geçiş yok)
+- Boyut sınırı akış sırasında uygulanır
+- Eşiği aşan yüklemeler geçici dosyaya taşınır (spool); PDF render,
+  process pool ve Werk24 akışı doğrudan bu dosyadan okur
+"""
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.exceptions import FileProcessingError
+
+logger = logging.getLogger(__name__)
+
+# Uzantı -> kabul edilen dosya imzaları
+MAGIC_BYTES = {
+    ".pdf": (b"%PDF-",),
+    ".png": (b"\x89PNG\r\n\x1a\n",),
+    ".jpg": (b"\xff\xd8\xff",),
+    ".jpeg": (b"\xff\xd8\xff",),
+}
+
+
+class DrawingSource:
+    """
+    Analiz girdisi: bellekte (küçük dosya) veya diskte (spool) duran çizim
+
+    Args:
+        filename: Orijinal dosya adı
+        data: Dosya baytları (bellek içi kaynak)
+        path: Dosya yolu (disk kaynağı)
+        sha256: Biliniyorsa içerik özeti
+        owned: True ise cleanup() dosyayı siler
+        read_time: Yüklemenin okunma süresi (saniye, spool_upload doldurur)
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        data: Optional[bytes] = None,
+        path: Optional[str] = None,
+        sha256: Optional[str] = None,
+        owned: bool = False,
+        read_time: Optional[float] = None
+    ):
+        if (data is None) == (path is None):
+            raise ValueError("DrawingSource requires exactly one of data or path")
+        self.filename = filename
+        self.data = data
+        self.path = path
+        self.owned = owned
+        self.read_time = read_time
+        self._sha256 = sha256
+
+    @property
+    def file_ext(self) -> str:
+        return os.path.splitext(self.filename)[1].lower()
+
+    @property
+    def size(self) -> int:
+        return len(self.data) if self.data is not None else os.path.getsize(self.path)
+
+    @property
+    def sha256(self) -> str:
+        """İçerik özeti (upload sırasında hesaplanmadıysa bir kez hesaplanır)"""
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            if self.data is not None:
+                digest.update(self.data)
+            else:
+                with open(self.path, "rb") as f:
+                    for chunk in iter(lambda: f.read(settings.upload_chunk_size), b""):
+                        digest.update(chunk)
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    @property
+    def preprocess_input(self) -> Union[bytes, str]:
+        """Process pool'a gönderilecek girdi: yol (pickle edilmez) veya baytlar"""
+        return self.path if self.path is not None else self.data
+
+    def open(self) -> BinaryIO:
+        """Okunabilir akış (disk kaynağında kopya oluşturmaz)"""
+        if self.path is not None:
+            return open(self.path, "rb")
+        return io.BytesIO(self.data)
+
+    def read_bytes(self) -> bytes:
+        return self.data if self.data is not None else Path(self.path).read_bytes()
+
+    def share(self) -> "DrawingSource":
+        """
+        İstekten bağımsız ömürlü kaynak (arka planda süren işler için)
+
+        Sahiplenilmiş spool dosyası için hard link oluşturulur (kopya yok);
+        isteğin cleanup()'ı işin okuduğu dosyayı silmez. İş bitince dönen
+        kaynağın cleanup()'ı çağrılmalıdır.
+        """
+        if not self.owned or self.path is None:
+            return self
+        root, ext = os.path.splitext(self.path)
+        link_path = f"{root}-{uuid.uuid4().hex[:8]}{ext}"
+        try:
+            os.link(self.path, link_path)
+        except OSError:
+            shutil.copyfile(self.path, link_path)
+        return DrawingSource(self.filename, path=link_path, sha256=self._sha256, owned=True, read_time=self.read_time)
+
+    def cleanup(self) -> None:
+        """Spool dosyasını sil"""
+        if self.owned and self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def as_source(file_input: Union[bytes, DrawingSource], filename: str) -> DrawingSource:
+    """Baytları veya hazır kaynağı DrawingSource'a çevir"""
+    if isinstance(file_input, DrawingSource):
+        return file_input
+    return DrawingSource(filename, data=file_input)
+
+
+def _check_magic(file_ext: str, head: bytes) -> None:
+    signatures = MAGIC_BYTES.get(file_ext)
+    if signatures is None:
+        raise FileProcessingError(f"Desteklenmeyen dosya formatı. İzin verilenler: {', '.join(MAGIC_BYTES)}")
+    if not any(head.startswith(signature) for signature in signatures):
+        raise FileProcessingError(f"Dosya içeriği {file_ext} formatıyla uyuşmuyor")
+
+
+async def spool_upload(file: UploadFile) -> DrawingSource:
+    """
+    Yüklenen dosyayı parça parça oku, doğrula ve hashle
+
+    upload_spool_threshold'u aşan dosyalar geçici dosyaya yazılır;
+    çağıran taraf iş bitince cleanup() çağırmalıdır.
+
+    Raises:
+        FileProcessingError: Ad/uzantı/içerik geçersiz, boş veya çok büyük dosya
+    """
+    if not file.filename:
+        raise FileProcessingError("Dosya adı bulunamadı")
+
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    if file_ext not in MAGIC_BYTES:
+        raise FileProcessingError(f"Desteklenmeyen dosya formatı. İzin verilenler: {', '.join(MAGIC_BYTES)}")
+
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    spool: Optional[BinaryIO] = None
+    size = 0
+
+    try:
+        while True:
+            chunk = await file.read(settings.upload_chunk_size)
+            if not chunk:
+                break
+            if size == 0:
+                _check_magic(file_ext, chunk)
+
+            size += len(chunk)
+            if size > settings.upload_max_bytes:
+                raise FileProcessingError(f"Dosya çok büyük (max {settings.upload_max_bytes // (1024 * 1024)}MB)")
+            digest.update(chunk)
+
+            if spool is None and size > settings.upload_spool_threshold:
+                spool = tempfile.NamedTemporaryFile(
+                    prefix="di2d-", suffix=file_ext, dir=settings.upload_spool_dir or None, delete=False
+                )
+                spool.write(buffer)
+                buffer = bytearray()
+            if spool is not None:
+                spool.write(chunk)
+            else:
+                buffer.extend(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if size == 0:
+        raise FileProcessingError("Boş dosya")
+
+    if spool is not None:
+        spool.close()
+        logger.info(f"📄 Received file: {file.filename} ({size} bytes, spooled to disk)")
+        return DrawingSource(
+            file.filename,
+            path=spool.name,
+            sha256=digest.hexdigest(),
+            owned=True,
+            read_time=time.perf_counter() - start
+        )
+
+    logger.info(f"📄 Received file: {file.filename} ({size} bytes)")
+    return DrawingSource(
+        file.filename,
+        data=bytes(buffer),
+        sha256=digest.hexdigest(),
+        read_time=time.perf_counter() - start
+    )
@@ -3,7 +3,7 @@ Werk24 Professional Drawing Analysis Service
 High-accuracy 2D technical drawing analysis using Werk24 V2 API
 """
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from werk24 import (
     Werk24Client,
     Hook,
@@ -13,12 +13,22 @@ from werk24 import (
 )
 import logging
 
+from app.core.config import settings
+from app.services.cache import result_cache, make_cache_key
+from app.services.uploads import DrawingSource, as_source
+from app.services.progress import AnalysisProgress, ProgressBroadcast, report
+from app.services.singleflight import analysis_flights
+from app.services.rate_limit import provider_limiters
+from app.services.deadline import Deadline, record_cancelled
+from app.services import metrics
+from app.core.exceptions import CapacityError, DeadlineExceededError
 from app.models.analysis import (
     DrawingAnalysisResult,
     GeometryAnalysis,
     ManufacturingAnalysis,
     QualityRequirements,
     AnalysisMetadata,
+    AnalysisBreakdown,
     DimensionInfo,
     FeatureInfo,
     MaterialInfo,
@@ -29,85 +39,47 @@ from app.models.analysis import (
 logger = logging.getLogger(__name__)
 
 
-class Werk24Analyzer:
+class _Werk24Session:
     """
-    Werk24 profesyonel teknik resim analiz servisi
+    Tek bir Werk24 okumasına ait sonuç durumu
     
-    Özellikler:
-    - Yüksek doğruluklu boyut okuma
-    - GD&T tolerans analizi
-    - Malzeme tanıma
-    - Yüzey pürüzlülüğü tespiti
-    - Diş özellikleri analizi
+    Her analyze() çağrısı kendi oturumunu oluşturur; hook'lar bu oturuma
+    yazar. Tüm beklenen yanıtlar geldiğinde tamamlanma event'i tetiklenir.
     """
     
-    def __init__(self):
+    EXPECTED = ("metadata", "features", "insights")
+    
+    def __init__(self, progress: Optional[AnalysisProgress] = None):
+        self.progress = progress
         self.results: Dict[str, Any] = {}
         self.errors: list = []
-        
-    async def analyze(
-        self,
-        file_bytes: bytes,
-        filename: str,
-        confidence_threshold: float = 0.7
-    ) -> DrawingAnalysisResult:
-        """
-        Werk24 ile teknik resim analizi yap
-        
-        Args:
-            file_bytes: Dosya byte dizisi
-            filename: Dosya adı
-            confidence_threshold: Minimum güven skoru
-            
-        Returns:
-            DrawingAnalysisResult: Yapılandırılmış analiz sonucu
-        """
-        logger.info(f"🔧 Starting Werk24 analysis for {filename}")
-        
-        import time
-        start_time = time.time()
-        
-        # Reset results
-        self.results = {}
-        self.errors = []
-        
+        self.received: set = set()
+        self._loop = asyncio.get_running_loop()
+        self._complete = asyncio.Event()
+    
+    @property
+    def is_complete(self) -> bool:
+        return self._complete.is_set()
+    
+    async def wait_complete(self, timeout: float) -> bool:
+        """Tüm hook yanıtlarını bekle, zaman aşımında False döndür"""
         try:
-            # Werk24 V2 client
-            async with Werk24Client() as client:
-                # V2 API - spesifik Ask tipleri ile çalış
-                hooks = [
-                    Hook(ask=AskMetaData(), function=self._handle_response),
-                    Hook(ask=AskFeatures(), function=self._handle_response),
-                    Hook(ask=AskInsights(), function=self._handle_response),
-                ]
-                
-                # BytesIO stream oluştur
-                from io import BytesIO
-                drawing_stream = BytesIO(file_bytes)
-                
-                # Analiz başlat
-                await client.read_drawing_with_hooks(drawing_stream, hooks)
-                
-                # Kısa bekleme
-                await asyncio.sleep(0.5)
-            
-            processing_time = time.time() - start_time
-            
-            # Sonuçları yapılandır
-            result = self._build_result(filename, processing_time, confidence_threshold)
-            
-            logger.info(f"✅ Werk24 analysis completed in {processing_time:.2f}s")
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Werk24 analysis failed: {e}")
-            self.errors.append(str(e))
-            
-            # Hata durumunda minimal sonuç döndür
-            processing_time = time.time() - start_time
-            return self._build_error_result(filename, processing_time, str(e))
+            await asyncio.wait_for(self._complete.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def _mark_received(self, kind: str) -> None:
+        if kind in self.received:
+            return
+        self.received.add(kind)
+        # Bölüm geldiği anda ilerleme olayı (event loop thread'inde yazılır)
+        self._loop.call_soon_threadsafe(lambda: report(self.progress, "section", section=kind))
+        if self.received.issuperset(self.EXPECTED):
+            # Hook farklı bir thread'den çağrılabilir
+            self._loop.call_soon_threadsafe(self._complete.set)
     
-    def _handle_response(self, message):
+    def handle_response(self, message):
         """Werk24 V2 API yanıtını işle"""
         try:
             from werk24.models.v2.responses import (
@@ -134,24 +106,196 @@ class Werk24Analyzer:
             elif isinstance(message, ResponseBalloons):
                 self.results["balloons"] = message.model_dump()
             
+            for kind in self.EXPECTED:
+                if kind in self.results:
+                    self._mark_received(kind)
+            
             if hasattr(message, 'exceptions') and message.exceptions:
                 logger.warning(f"⚠️ Error: {message.exceptions}")
                 self.errors.extend(message.exceptions)
         except Exception as e:
             logger.error(f"❌ Handle error: {e}")
             self.errors.append(str(e))
+
+
+class Werk24Analyzer:
+    """
+    Werk24 profesyonel teknik resim analiz servisi
+    
+    Özellikler:
+    - Yüksek doğruluklu boyut okuma
+    - GD&T tolerans analizi
+    - Malzeme tanıma
+    - Yüzey pürüzlülüğü tespiti
+    - Diş özellikleri analizi
+    """
+    
+    async def analyze(
+        self,
+        file_bytes: Union[bytes, DrawingSource],
+        filename: str,
+        confidence_threshold: float = 0.7,
+        use_cache: bool = True,
+        invalidate_cache: bool = False,
+        progress: Optional[AnalysisProgress] = None,
+        deadline: Optional[Deadline] = None
+    ) -> DrawingAnalysisResult:
+        """
+        Werk24 ile teknik resim analizi yap
+        
+        Args:
+            file_bytes: Dosya byte dizisi veya spool edilmiş yükleme (DrawingSource)
+            filename: Dosya adı
+            confidence_threshold: Minimum güven skoru
+            use_cache: False ise önbellek okunmaz ve yazılmaz
+            invalidate_cache: True ise mevcut önbellek kaydı silinip analiz yeniden yapılır
+            progress: Verilirse aşama olayları (provider_call_started, section, validated) buraya yazılır
+            deadline: Verilirse okuma başlamadan kontrol edilir; süre dolunca okuma iptal edilir
+            
+        Returns:
+            DrawingAnalysisResult: Yapılandırılmış analiz sonucu
+        """
+        logger.info(f"🔧 Starting Werk24 analysis for {filename}")
+        
+        import time
+        start_time = time.time()
+        
+        # Önbellek - her tekrar bir Werk24 kredisi harcar
+        source = as_source(file_bytes, filename)
+        cache_key = make_cache_key(
+            source.sha256,
+            model="werk24-professional",
+            confidence_threshold=confidence_threshold
+        )
+        if invalidate_cache:
+            await result_cache.invalidate(cache_key)
+        if use_cache:
+            cached = await result_cache.get(cache_key)
+            metrics.record_cache_lookup("result", cached is not None)
+            if cached is not None:
+                cached.metadata.cache_hit = True
+                logger.info(f"⚡ Werk24 cache hit for {filename}")
+                report(progress, "cache_hit", model="werk24-professional")
+                return cached
+        
+        async def _run(task_source: DrawingSource, progress: AnalysisProgress) -> Tuple[DrawingAnalysisResult, bool]:
+            # İsteğe özel sonuç durumu - eşzamanlı okumalar birbirini etkilemez
+            session = _Werk24Session(progress)
+            queue_wait = None
+            stages: Dict[str, float] = {}
+            if source.read_time is not None:
+                stages["upload_read"] = round(source.read_time, 3)
+            
+            try:
+                # Werk24 V2 client (sağlayıcı kabul kuyruğundan geçer - kredi/kota koruması)
+                async with provider_limiters["werk24"].admit(progress) as admission, Werk24Client() as client:
+                    queue_wait = admission.queue_wait
+                    stages["queue_wait"] = round(queue_wait, 3)
+                    metrics.observe_stage("queue_wait", queue_wait, "werk24-professional")
+                    call_start = time.perf_counter()
+                    report(progress, "provider_call_started", model="werk24-professional")
+                    # V2 API - spesifik Ask tipleri ile çalış
+                    hooks = [
+                        Hook(ask=AskMetaData(), function=session.handle_response),
+                        Hook(ask=AskFeatures(), function=session.handle_response),
+                        Hook(ask=AskInsights(), function=session.handle_response),
+                    ]
+                    
+                    # Spool dosyasından (veya bellekten) doğrudan akış
+                    with task_source.open() as drawing_stream:
+                        # Analiz başlat
+                        await client.read_drawing_with_hooks(drawing_stream, hooks)
+                    
+                    # Tüm hook'lar tamamlanana kadar bekle (genelde hemen döner)
+                    if not await session.wait_complete(settings.werk24_hook_timeout):
+                        missing = sorted(set(_Werk24Session.EXPECTED) - session.received)
+                        logger.warning(f"⚠️ Werk24 hooks incomplete, missing: {missing}")
+                    stages["provider_call"] = round(time.perf_counter() - call_start, 3)
+                    metrics.observe_stage("provider_call", stages["provider_call"], "werk24-professional")
+                
+                processing_time = time.time() - start_time
+                
+                # Sonuçları yapılandır
+                validate_start = time.perf_counter()
+                result = self._build_result(session, filename, processing_time, confidence_threshold)
+                validate_time = time.perf_counter() - validate_start
+                metrics.observe_stage("validate", validate_time, "werk24-professional")
+                stages["validate"] = round(validate_time, 3)
+                result.metadata.queue_wait = queue_wait
+                # Görüntü ve token yok: Werk24 çizimi doğrudan okur, ücret kredi bazlıdır
+                result.metadata.breakdown = AnalysisBreakdown(
+                    stages=stages,
+                    provider_calls=1,
+                    cpu_time=round(validate_time, 3)
+                )
+                report(progress, "validated", processing_time=round(processing_time, 3), errors=len(session.errors))
+                
+                logger.info(f"✅ Werk24 analysis completed in {processing_time:.2f}s")
+                # Hatalı/eksik sonuçlar önbelleğe alınmaz
+                return result, not session.errors and session.is_complete
+                
+            except CapacityError as e:
+                # Kabul kuyruğu dolu - okuma hiç başlamadı, istemci 503 alır
+                metrics.record_error("werk24-professional", e)
+                raise
+            except Exception as e:
+                logger.error(f"❌ Werk24 analysis failed: {e}")
+                metrics.record_error("werk24-professional", e)
+                session.errors.append(str(e))
+                
+                # Hata durumunda minimal sonuç döndür
+                processing_time = time.time() - start_time
+                return self._build_error_result(filename, processing_time, str(e)), False
+            except asyncio.CancelledError:
+                record_cancelled("provider_call", "cancelled")
+                raise
+            finally:
+                task_source.cleanup()
+        
+        # Aynı çizim için eşzamanlı istekler tek Werk24 okumasını (tek krediyi) paylaşır
+        if cache_key in analysis_flights:
+            report(progress, "coalesced", model="werk24-professional")
+        if deadline is not None:
+            deadline.check("provider_call")
+        flight = analysis_flights.run(
+            cache_key,
+            lambda: _run(
+                source.share(),
+                ProgressBroadcast(lambda: [waiter[0] for waiter in analysis_flights.waiters(cache_key)])
+            ),
+            # Deadline yalnızca bu isteğin beklemesine uygulanır (paylaşılan okuma son bekleyenle iptal olur)
+            waiter=(progress, deadline)
+        )
+        if deadline is None:
+            (result, cacheable), shared = await flight
+        else:
+            try:
+                (result, cacheable), shared = await asyncio.wait_for(flight, timeout=max(0.0, deadline.remaining()))
+            except asyncio.TimeoutError:
+                record_cancelled("analysis", "deadline")
+                error = DeadlineExceededError("Werk24 analizi deadline içinde tamamlanamadı")
+                metrics.record_error("werk24-professional", error)
+                raise error
+        # Önbelleğe yazma kararı her isteğin kendi use_cache seçeneğine göre verilir
+        if use_cache and cacheable:
+            await result_cache.set(cache_key, result)
+        if shared:
+            result = result.model_copy(deep=True)
+            result.metadata.coalesced = True
+        return result
     
     def _build_result(
         self,
+        session: "_Werk24Session",
         filename: str,
         processing_time: float,
         confidence_threshold: float
     ) -> DrawingAnalysisResult:
         """Werk24 V2 sonuçlarını DI-2D formatına dönüştür"""
         
-        metadata = self.results.get("metadata", {})
-        insights = self.results.get("insights", {})
-        features = self.results.get("features", {})
+        metadata = session.results.get("metadata", {})
+        insights = session.results.get("insights", {})
+        features = session.results.get("features", {})
         
         title = metadata.get('designation') or filename
         drawing_number = None
@@ -170,8 +314,8 @@ class Werk24Analyzer:
         
         # Raw results'ı kullan
         raw_results = {
-            'werk24_response': self.results,
-            'errors': self.errors
+            'werk24_response': session.results,
+            'errors': session.errors
         }
         
         # Malzeme bilgisi
@@ -316,7 +460,7 @@ class Werk24Analyzer:
             model_used="Werk24 V2 Professional API",
             processing_time=processing_time,
             confidence_score=0.95,  # Werk24 profesyonel servis - yüksek güven
-            warnings=[f"Error: {e}" for e in self.errors] if self.errors else []
+            warnings=[f"Error: {e}" for e in session.errors] if session.errors else []
         )
         
         return DrawingAnalysisResult(
@@ -337,7 +481,7 @@ class Werk24Analyzer:
             ],
             design_recommendations=[],
             metadata=analysis_metadata,
-            raw_response=raw_results if self.results else None
+            raw_response=raw_results if session.results else None
         )
     
     def _build_error_result(
@@ -0,0 +1,302 @@
+"""
+DI-2D Ön İşleme Benchmark'ı
+===========================
+
+DrawingPreprocessor'ın sayfa boyutu, DPI ve enhance_mode ile nasıl
+ölçeklendiğini sentetik teknik resimler üzerinde ölçer.
+
+Ölçülen hedefler:
+- process_pdf      : PDF → rasterize → iyileştirme → encode (tam pipeline)
+- process_image    : PNG → iyileştirme → encode
+- enhance_drawing  : Sadece _enhance_drawing (aşama bazında süreler)
+- image_to_base64  : Sadece _image_to_base64 (iyileştirilmiş sayfa)
+
+Her (boyut, DPI, mod, hedef) kombinasyonu ayrı bir process'te çalışır,
+böylece tepe bellek (peak RSS) ölçümü birbirini etkilemez. Raporlanan
+değerler: wall time, CPU time, peak RSS, çıktı baytı ve aşama süreleri.
+
+Kullanım (backend/ dizininden):
+    python benchmark_preprocess.py -o bench.json [seçenekler]
+    python benchmark_preprocess.py -o after.json --compare before.json
+
+Örnek:
+    python benchmark_preprocess.py --sizes A4,A1 --dpis 200,400 --modes fast,balanced --repeat 3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# ISO 216 kağıt boyutları (mm, yatay)
+PAPER_SIZES = {
+    "A4": (297, 210),
+    "A3": (420, 297),
+    "A2": (594, 420),
+    "A1": (841, 594),
+    "A0": (1189, 841),
+}
+TARGETS = ("process_pdf", "process_image", "enhance_drawing", "image_to_base64")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DI-2D ön işleme benchmark'ı")
+    parser.add_argument("-o", "--output", default="preprocess_benchmark.json", help="JSON sonuç dosyası")
+    parser.add_argument("--sizes", default="A4,A3,A2,A1,A0", help="Kağıt boyutları (virgülle)")
+    parser.add_argument("--dpis", default="200,300,400,600", help="DPI değerleri (virgülle)")
+    parser.add_argument("--modes", default="fast,balanced,aggressive", help="enhance_mode değerleri (virgülle)")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Ölçülecek hedefler (virgülle)")
+    parser.add_argument("--encoder", default=None,
+                        help="image_to_base64 için encoder (varsayılan: settings.image_encoder)")
+    parser.add_argument("--repeat", type=int, default=1, help="Her kombinasyon için tekrar sayısı")
+    parser.add_argument("--max-megapixels", type=float, default=0,
+                        help="Bu boyutun üstündeki sayfaları atla (0 = sınırsız)")
+    parser.add_argument("--compare", default=None, help="Karşılaştırılacak önceki JSON sonucu")
+    return parser.parse_args()
+
+
+def _split(value: str) -> List[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def page_pixels(size: str, dpi: int) -> tuple:
+    """Kağıt boyutu ve DPI'dan piksel boyutu"""
+    width_mm, height_mm = PAPER_SIZES[size]
+    return round(width_mm / 25.4 * dpi), round(height_mm / 25.4 * dpi)
+
+
+def make_drawing(width: int, height: int, dpi: int, seed: int = 0):
+    """
+    Deterministik sentetik teknik resim üret (tek kanallı gri numpy dizisi)
+
+    Çerçeve, antet, kontur çizgileri, delikler, ölçü yazıları ve
+    tarama gürültüsü (tuz-biber + hafif Gauss) içerir.
+    """
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width), 255, np.uint8)
+    line = max(1, round(dpi * 0.35 / 25.4))  # 0.35 mm çizgi kalınlığı
+    thin = max(1, line // 2)
+    font_scale = dpi / 300
+
+    # Çerçeve ve antet
+    margin = round(dpi * 10 / 25.4)
+    cv2.rectangle(img, (margin, margin), (width - margin, height - margin), 0, line)
+    title_w, title_h = round(dpi * 180 / 25.4), round(dpi * 40 / 25.4)
+    cv2.rectangle(img, (width - margin - title_w, height - margin - title_h),
+                  (width - margin, height - margin), 0, line)
+    cv2.putText(img, "DI-2D BENCHMARK  REV A  1:1  S235JR", (width - margin - title_w + 20, height - margin - title_h // 2),
+                cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, thin)
+
+    # Parça konturları, delikler ve ölçüler (sayfa alanıyla orantılı sayıda)
+    parts = max(4, (width * height) // 2_000_000)
+    for _ in range(parts):
+        w = int(rng.integers(width // 20, width // 6))
+        h = int(rng.integers(height // 20, height // 6))
+        x = int(rng.integers(margin * 2, max(margin * 2 + 1, width - margin * 2 - w)))
+        y = int(rng.integers(margin * 2, max(margin * 2 + 1, height - margin * 2 - title_h - h)))
+        cv2.rectangle(img, (x, y), (x + w, y + h), 0, line)
+        for _ in range(int(rng.integers(1, 5))):
+            cx, cy = x + int(rng.integers(w // 5, 4 * w // 5)), y + int(rng.integers(h // 5, 4 * h // 5))
+            cv2.circle(img, (cx, cy), max(3, min(w, h) // 12), 0, thin)
+        cv2.line(img, (x, y - margin // 2), (x + w, y - margin // 2), 0, thin)
+        cv2.putText(img, f"{w / dpi * 25.4:.1f} +/-0.1", (x + w // 3, y - margin // 2 - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, font_scale * 0.6, 0, thin)
+
+    # Tarama gürültüsü
+    noise = rng.normal(0, 6, (height, width))
+    img = np.clip(img.astype(np.int16) + noise.astype(np.int16), 0, 255).astype(np.uint8)
+    specks = rng.random((height, width)) < 0.0005
+    img[specks] = 0
+    return img
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(size: str, dpi: int, mode: str, target: str, encoder: Optional[str] = None) -> Dict[str, Any]:
+    """Tek kombinasyonu temiz bir process'te ölç"""
+    import cv2
+    from PIL import Image
+    import io
+    from app.services.preprocessor import DrawingPreprocessor
+    from app.services.encoders import encoder_for
+
+    width, height = page_pixels(size, dpi)
+    drawing = make_drawing(width, height, dpi)
+    preprocessor = DrawingPreprocessor(dpi=dpi, enhance_mode=mode)
+
+    # Girdi hazırlığı ölçüme dahil değil
+    if target == "process_pdf":
+        buffer = io.BytesIO()
+        Image.fromarray(drawing).save(buffer, format="PDF", resolution=dpi)
+        payload = buffer.getvalue()
+    elif target == "process_image":
+        payload = cv2.imencode(".png", drawing)[1].tobytes()
+    elif target == "image_to_base64":
+        payload = preprocessor._enhance_drawing(drawing)
+        preprocessor.timings.clear()
+    else:
+        payload = drawing
+    baseline_rss = _peak_rss_bytes()
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if target == "process_pdf":
+        result = preprocessor.process_file(payload, ".pdf")
+        output_bytes = sum(len(page["image_base64"]) for page in result["pages"])
+    elif target == "process_image":
+        result = preprocessor.process_file(payload, ".png")
+        output_bytes = sum(len(page["image_base64"]) for page in result["pages"])
+    elif target == "enhance_drawing":
+        output_bytes = preprocessor._enhance_drawing(payload).nbytes
+    else:
+        output_bytes = len(preprocessor._image_to_base64(payload, encoder))
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    return {
+        "size": size,
+        "dpi": dpi,
+        "mode": mode,
+        "target": target,
+        "denoiser": preprocessor.denoiser,
+        "encoder": encoder or encoder_for(None),
+        "width": width,
+        "height": height,
+        "megapixels": round(width * height / 1e6, 2),
+        "wall_time": wall,
+        "cpu_time": cpu,
+        "peak_rss": _peak_rss_bytes(),
+        "baseline_rss": baseline_rss,
+        "output_bytes": output_bytes,
+        "stages": dict(preprocessor.timings),
+    }
+
+
+def run_isolated(case: tuple) -> Dict[str, Any]:
+    """Ölçümü yeni bir process'te çalıştır - peak RSS önceki ölçümlerden etkilenmez"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, *case).result()
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Tekrarları tek satıra indir (süreler için min/medyan, bellek için maksimum)"""
+    first = runs[0]
+    walls = [run["wall_time"] for run in runs]
+    stages = {
+        stage: statistics.median(run["stages"].get(stage, 0.0) for run in runs)
+        for stage in first["stages"]
+    }
+    return {
+        **{key: first[key] for key in ("size", "dpi", "mode", "target", "denoiser", "encoder", "width", "height", "megapixels")},
+        "repeat": len(runs),
+        "wall_time": statistics.median(walls),
+        "wall_time_min": min(walls),
+        "cpu_time": statistics.median(run["cpu_time"] for run in runs),
+        "peak_rss": max(run["peak_rss"] for run in runs),
+        "baseline_rss": min(run["baseline_rss"] for run in runs),
+        "output_bytes": first["output_bytes"],
+        "throughput_mp_s": first["megapixels"] / statistics.median(walls) if statistics.median(walls) else None,
+        "stages": stages,
+    }
+
+
+def case_key(row: Dict[str, Any]) -> tuple:
+    return row["size"], row["dpi"], row["mode"], row["target"]
+
+
+def print_row(row: Dict[str, Any]) -> None:
+    stages = ", ".join(f"{name}={seconds:.2f}" for name, seconds in row["stages"].items())
+    print(f"  {row['target']:<16} {row['size']:<3} {row['dpi']:>4}dpi {row['mode']:<10} "
+          f"wall={row['wall_time']:7.2f}s cpu={row['cpu_time']:7.2f}s "
+          f"rss={row['peak_rss'] / 2**20:7.0f}MB out={row['output_bytes'] / 2**20:6.1f}MB"
+          + (f"  [{stages}]" if stages else ""))
+
+
+def print_comparison(current: List[Dict[str, Any]], baseline_path: Path) -> None:
+    """İki çalıştırmayı kombinasyon bazında karşılaştır"""
+    baseline = {case_key(row): row for row in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    print("\n" + "=" * 70)
+    print(f"  📊 Karşılaştırma: {baseline_path}")
+    print("=" * 70)
+    for row in current:
+        old = baseline.get(case_key(row))
+        if old is None:
+            continue
+        wall = row["wall_time"] / old["wall_time"] if old["wall_time"] else float("nan")
+        rss = row["peak_rss"] / old["peak_rss"] if old["peak_rss"] else float("nan")
+        out = row["output_bytes"] / old["output_bytes"] if old["output_bytes"] else float("nan")
+        icon = "🟢" if wall < 0.95 else ("🔴" if wall > 1.05 else "⚪")
+        print(f"  {icon} {row['target']:<16} {row['size']:<3} {row['dpi']:>4}dpi {row['mode']:<10} "
+              f"wall x{wall:.2f}  rss x{rss:.2f}  out x{out:.2f}")
+
+
+def main() -> int:
+    args = parse_args()
+    targets = _split(args.targets)
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        raise SystemExit(f"❌ Bilinmeyen hedef: {', '.join(unknown)}")
+
+    cases = []
+    for size in _split(args.sizes):
+        if size not in PAPER_SIZES:
+            raise SystemExit(f"❌ Bilinmeyen kağıt boyutu: {size}")
+        for dpi in (int(d) for d in _split(args.dpis)):
+            width, height = page_pixels(size, dpi)
+            if args.max_megapixels and width * height / 1e6 > args.max_megapixels:
+                continue
+            for mode in _split(args.modes):
+                for target in targets:
+                    cases.append((size, dpi, mode, target, args.encoder))
+
+    print(f"⚙️ {len(cases)} kombinasyon x {args.repeat} tekrar, python={platform.python_version()}, cpu={os.cpu_count()}")
+
+    results = []
+    for case in cases:
+        try:
+            runs = [run_isolated(case) for _ in range(max(1, args.repeat))]
+        except Exception as e:
+            print(f"  ❌ {case}: {e}")
+            continue
+        row = summarize(runs)
+        results.append(row)
+        print_row(row)
+
+    import cv2
+    from app.core.config import settings
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "denoiser_setting": settings.denoiser,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    output = Path(args.output)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n📝 Sonuçlar: {output}")
+
+    if args.compare:
+        print_comparison(results, Path(args.compare))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
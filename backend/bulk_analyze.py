@@ -0,0 +1,243 @@
+"""
+DI-2D Toplu Analiz (Bulk Backfill) Aracı
+========================================
+
+Bir dizindeki veya zip arşivindeki tüm teknik resimleri API sunucusuna
+gerek kalmadan doğrudan DrawingAnalyzer / Werk24Analyzer ile analiz eder.
+
+- CPU-yoğun ön işleme process pool'da çalışır
+- Provider çağrıları async eşzamanlılık sınırıyla yürütülür
+- Sonuçlar JSONL olarak yazılır; yarıda kalan iş aynı komutla devam eder
+- İlerleme ve throughput (resim/dakika) raporlanır
+
+Kullanım (backend/ dizininden):
+    python bulk_analyze.py <dizin|arsiv.zip> -o results.jsonl [seçenekler]
+
+Örnek:
+    python bulk_analyze.py ~/archive/drawings -o backfill.jsonl --model gpt-5.2 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Any, List, Set, Tuple, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services.uploads import DrawingSource
+
+ALLOWED_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg"}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DI-2D toplu teknik resim analizi")
+    parser.add_argument("source", help="Resim dizini veya .zip arşivi")
+    parser.add_argument("-o", "--output", default="bulk_results.jsonl", help="JSONL çıktı dosyası (checkpoint)")
+    parser.add_argument("--model", default="gpt-5.2", help="AI modeli (werk24-professional dahil)")
+    parser.add_argument("--reasoning-level", default="high", help="medium | high | xhigh")
+    parser.add_argument("--enhance-mode", default="balanced", help="fast | balanced | aggressive")
+    parser.add_argument("--analysis-mode", default="standard", help="standard | tiled (A0/A1 için)")
+    parser.add_argument("--max-tokens", type=int, default=150000)
+    parser.add_argument("--concurrency", type=int, default=4, help="Aynı anda çalışan provider çağrısı")
+    parser.add_argument("--workers", type=int, default=None, help="Ön işleme process sayısı (varsayılan: ayarlardan)")
+    parser.add_argument("--no-cache", action="store_true", help="Sonuç önbelleğini kullanma")
+    parser.add_argument("--limit", type=int, default=0, help="En fazla bu kadar dosya işle (0 = tümü)")
+    return parser.parse_args()
+
+
+def discover_inputs(source: Path) -> List[Tuple[str, Callable[[], "DrawingSource"]]]:
+    """
+    İşlenecek dosyaları bul
+
+    Returns:
+        (göreli yol, kaynak oluşturucu) listesi - dizindeki dosyalar belleğe
+        okunmaz, ön işleme ve Werk24 doğrudan diskten okur; zip girdileri
+        ihtiyaç anında açılır
+    """
+    from app.services.uploads import DrawingSource
+
+    inputs: List[Tuple[str, Callable[[], DrawingSource]]] = []
+
+    if source.is_file() and source.suffix.lower() == ".zip":
+        archive = zipfile.ZipFile(source)
+        for info in sorted(archive.infolist(), key=lambda i: i.filename):
+            if info.is_dir() or Path(info.filename).suffix.lower() not in ALLOWED_EXTENSIONS:
+                continue
+            inputs.append((
+                info.filename,
+                lambda name=info.filename: DrawingSource(name, data=archive.read(name))
+            ))
+    elif source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.is_file() and path.suffix.lower() in ALLOWED_EXTENSIONS:
+                name = str(path.relative_to(source))
+                inputs.append((name, lambda name=name, path=path: DrawingSource(name, path=str(path))))
+    else:
+        raise SystemExit(f"❌ Kaynak bulunamadı veya desteklenmiyor: {source}")
+
+    return inputs
+
+
+def load_checkpoint(
+    output: Path,
+    model: str,
+    reasoning_level: str,
+    enhance_mode: str,
+    analysis_mode: str,
+    max_tokens: int
+) -> Set[str]:
+    """Çıktı dosyasında aynı ayarlarla başarıyla tamamlanmış dosyaları oku"""
+    done: Set[str] = set()
+    if not output.exists():
+        return done
+
+    with output.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Yarıda kesilmiş son satır
+            if (
+                record.get("status") == "success"
+                and record.get("model") == model
+                and record.get("reasoning_level") == reasoning_level
+                and record.get("enhance_mode") == enhance_mode
+                and record.get("analysis_mode") == analysis_mode
+                and record.get("max_tokens") == max_tokens
+            ):
+                done.add(record["file"])
+    return done
+
+
+async def run(args: argparse.Namespace) -> int:
+    # Ayarlar import sırasında okunduğu için app modülleri burada yükleniyor
+    from app.core.exceptions import DI2DException
+    from app.services.analyzer import analyzer
+    from app.services.werk24_analyzer import werk24_analyzer
+    from app.services.preprocess_pool import preprocess_pool
+    from app.services.image_budget import image_provider
+    from app.services.http_client import close_http_client
+
+    source = Path(args.source).expanduser()
+    output = Path(args.output)
+
+    inputs = discover_inputs(source)
+    done = load_checkpoint(
+        output, args.model, args.reasoning_level, args.enhance_mode, args.analysis_mode, args.max_tokens
+    )
+    pending = [(name, reader) for name, reader in inputs if name not in done]
+    if args.limit:
+        pending = pending[:args.limit]
+
+    print(f"📂 {len(inputs)} dosya bulundu, {len(done)} tanesi zaten tamamlanmış, {len(pending)} işlenecek")
+    print(f"⚙️ model={args.model}, reasoning={args.reasoning_level}, concurrency={args.concurrency}, "
+          f"preprocess_workers={preprocess_pool.workers}")
+    if not pending:
+        return 0
+
+    # Ön işleme provider çağrılarından önde gider, ama en fazla worker sayısı kadar
+    provider_slots = asyncio.Semaphore(max(1, args.concurrency))
+    pipeline_slots = asyncio.Semaphore(max(1, args.concurrency) + preprocess_pool.workers)
+    lock = asyncio.Lock()
+    counters = {"success": 0, "error": 0}
+    start_time = time.time()
+
+    with output.open("a", encoding="utf-8") as out:
+
+        async def write_record(record: Dict[str, Any]) -> None:
+            async with lock:
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+
+                counters[record["status"]] += 1
+                finished = counters["success"] + counters["error"]
+                elapsed = time.time() - start_time
+                rate = finished / elapsed * 60 if elapsed > 0 else 0.0
+                icon = "✅" if record["status"] == "success" else "❌"
+                print(f"{icon} [{finished}/{len(pending)}] {record['file']} "
+                      f"({record['processing_time']:.1f}s) - {rate:.2f} resim/dk")
+
+        async def process(name: str, reader: Callable[[], "DrawingSource"]) -> None:
+            async with pipeline_slots:
+                item_start = time.time()
+                record: Dict[str, Any] = {
+                    "file": name,
+                    "model": args.model,
+                    "reasoning_level": args.reasoning_level,
+                    "enhance_mode": args.enhance_mode,
+                    "analysis_mode": args.analysis_mode,
+                    "max_tokens": args.max_tokens
+                }
+                try:
+                    drawing = await asyncio.to_thread(reader)
+                    record["sha256"] = await asyncio.to_thread(lambda: drawing.sha256)
+
+                    if args.model == "werk24-professional":
+                        async with provider_slots:
+                            result = await werk24_analyzer.analyze(
+                                file_bytes=drawing,
+                                filename=name,
+                                use_cache=not args.no_cache
+                            )
+                    else:
+                        # CPU aşaması (process pool) - sonuç sayfa önbelleğine yazılır
+                        await analyzer.preprocess(
+                            drawing,
+                            name,
+                            args.enhance_mode,
+                            file_hash=record["sha256"],
+                            providers=[image_provider(args.model)],
+                            tiled=args.analysis_mode == "tiled"
+                        )
+                        async with provider_slots:
+                            result = await analyzer.analyze(
+                                file_bytes=drawing,
+                                filename=name,
+                                model=args.model,
+                                max_tokens=args.max_tokens,
+                                reasoning_level=args.reasoning_level,
+                                enhance_mode=args.enhance_mode,
+                                use_cache=not args.no_cache,
+                                analysis_mode=args.analysis_mode
+                            )
+                    record["status"] = "success"
+                    record["result"] = result.model_dump(mode="json")
+                except Exception as e:
+                    record["status"] = "error"
+                    record["error"] = e.detail if isinstance(e, DI2DException) else str(e)
+                record["processing_time"] = time.time() - item_start
+                await write_record(record)
+
+        try:
+            await asyncio.gather(*[process(name, reader) for name, reader in pending])
+        finally:
+            preprocess_pool.shutdown()
+            await close_http_client()
+
+    elapsed = time.time() - start_time
+    finished = counters["success"] + counters["error"]
+    print("\n" + "=" * 70)
+    print(f"  ✅ Başarılı: {counters['success']}   ❌ Hatalı: {counters['error']}")
+    print(f"  ⏱️ Süre: {elapsed:.1f}s   📈 Throughput: {finished / elapsed * 60:.2f} resim/dakika")
+    print(f"  📝 Çıktı: {output}")
+    print("=" * 70)
+    return 0 if counters["error"] == 0 else 1
+
+
+def main() -> int:
+    args = parse_args()
+
+    # Process pool'un bekleme kuyruğu eşzamanlı çağrıları karşılayabilmeli
+    if args.workers is not None:
+        os.environ["PREPROCESS_WORKERS"] = str(args.workers)
+    os.environ["PREPROCESS_MAX_QUEUE"] = str(max(args.concurrency, 8))
+
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,13 @@
 DI-2D Backend - FastAPI Main Application
 2D Drawing Intelligence System
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.routes import analysis
+from app.services.preprocess_pool import preprocess_pool
+from app.services.http_client import close_http_client
+from app.services import metrics
 
 app = FastAPI(
     title="DI-2D API",
@@ -25,6 +28,11 @@ app.add_middleware(
 # Include routers
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
 
+@app.on_event("shutdown")
+async def shutdown():
+    preprocess_pool.shutdown()
+    await close_http_client()
+
 @app.get("/")
 async def root():
     return {
@@ -37,3 +45,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "DI-2D"}
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint'i (aşama süreleri, token, önbellek, hata ve kuyruk metrikleri)"""
+    content, content_type = metrics.render()
+    return Response(content=content, media_type=content_type)
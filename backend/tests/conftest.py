@@ -0,0 +1,13 @@
+"""
+Testler backend kökünden (main, app) import eder
+
+Gerçek sağlayıcı anahtarları kullanılmaz; anahtarlı istemci kurulumu
+test_http_client.py'de sahte anahtarlarla ayrıca test edilir.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for _key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "WERK24_TOKEN"):
+    os.environ[_key] = ""
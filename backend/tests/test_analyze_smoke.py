@@ -0,0 +1,87 @@
+"""
+/analyze endpoint smoke testi
+
+Sağlayıcı çağrısı yapılmaz; analyzer.analyze sahte sonuç döndürür. Route
+katmanının (upload spool, deadline, disconnect izleme) uçtan uca
+çalıştığını doğrular.
+"""
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.routes import analysis as routes
+from app.models.analysis import (
+    AnalysisMetadata,
+    DrawingAnalysisResult,
+    GeometryAnalysis,
+    ManufacturingAnalysis,
+    QualityRequirements,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def _result(model: str) -> DrawingAnalysisResult:
+    return DrawingAnalysisResult(
+        title="TEST-001",
+        geometry=GeometryAnalysis(part_type="flanş", shape_type="silindirik", complexity_score=3),
+        manufacturing=ManufacturingAnalysis(primary_process="tornalama", setup_count=1, difficulty_level="kolay"),
+        quality=QualityRequirements(),
+        metadata=AnalysisMetadata(model_used=model, processing_time=0.1, confidence_score=0.9)
+    )
+
+
+def test_analyze_returns_result(monkeypatch):
+    calls = []
+
+    async def fake_analyze(**kwargs):
+        calls.append(kwargs)
+        return _result(kwargs["model"])
+
+    monkeypatch.setattr(routes.analyzer, "analyze", fake_analyze)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/analysis/analyze",
+            files={"file": ("part.png", PNG, "image/png")},
+            data={"model": "gpt-5.2", "reasoning_level": "medium"},
+            headers={"X-Request-Timeout": "60"}
+        )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "TEST-001"
+    assert len(calls) == 1
+    assert calls[0]["reasoning_level"] == "medium"
+    assert 0 < calls[0]["deadline"].remaining() <= 60
+
+
+def test_analyze_rejects_invalid_timeout(monkeypatch):
+    async def fake_analyze(**kwargs):
+        raise AssertionError("analiz başlamamalı")
+
+    monkeypatch.setattr(routes.analyzer, "analyze", fake_analyze)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/analysis/analyze",
+            files={"file": ("part.png", PNG, "image/png")},
+            data={"timeout_seconds": "-5"}
+        )
+
+    assert response.status_code == 422
+
+
+def test_analyze_rejects_unknown_analysis_mode(monkeypatch):
+    async def fake_analyze(**kwargs):
+        raise AssertionError("analiz başlamamalı")
+
+    monkeypatch.setattr(routes.analyzer, "analyze", fake_analyze)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/analysis/analyze",
+            files={"file": ("part.png", PNG, "image/png")},
+            data={"analysis_mode": "mosaic"}
+        )
+
+    assert response.status_code == 422
+    assert "mosaic" in response.json()["detail"]
@@ -0,0 +1,17 @@
+"""Raster yüklemelerde sayfa seçimi"""
+import asyncio
+
+import pytest
+
+from app.core.exceptions import FileProcessingError
+from app.services.analyzer import analyzer
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+@pytest.mark.parametrize("pages", [[2], [1, 2]])
+def test_raster_upload_rejects_pages_other_than_first(pages):
+    with pytest.raises(FileProcessingError):
+        asyncio.run(analyzer.analyze(PNG, "part.png", model="gpt-5.2", pages=pages, use_cache=False))
+    with pytest.raises(FileProcessingError):
+        asyncio.run(analyzer.preprocess(PNG, "part.png", pages=pages))
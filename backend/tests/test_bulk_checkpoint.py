@@ -0,0 +1,30 @@
+"""Toplu analizde kaldığı yerden devam: sadece aynı ayarlarla başarılı dosyalar atlanır"""
+import json
+
+from bulk_analyze import load_checkpoint
+
+SETTINGS = dict(model="gpt-5.2", reasoning_level="high", enhance_mode="balanced",
+                analysis_mode="standard", max_tokens=150000)
+
+
+def _write(path, records, tail=""):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + tail, encoding="utf-8")
+
+
+def test_checkpoint_matches_all_run_settings(tmp_path):
+    output = tmp_path / "results.jsonl"
+    _write(output, [
+        {"file": "same.pdf", "status": "success", **SETTINGS},
+        {"file": "failed.pdf", "status": "error", **SETTINGS},
+        {"file": "other_model.pdf", "status": "success", **{**SETTINGS, "model": "claude-3-5-sonnet-20241022"}},
+        {"file": "other_level.pdf", "status": "success", **{**SETTINGS, "reasoning_level": "xhigh"}},
+        {"file": "other_enhance.pdf", "status": "success", **{**SETTINGS, "enhance_mode": "aggressive"}},
+        {"file": "other_mode.pdf", "status": "success", **{**SETTINGS, "analysis_mode": "tiled"}},
+        {"file": "other_budget.pdf", "status": "success", **{**SETTINGS, "max_tokens": 50000}},
+    ], tail='{"file": "cut.pdf", "stat')
+
+    assert load_checkpoint(output, **SETTINGS) == {"same.pdf"}
+
+
+def test_checkpoint_without_output_file(tmp_path):
+    assert load_checkpoint(tmp_path / "missing.jsonl", **SETTINGS) == set()
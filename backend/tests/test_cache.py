@@ -0,0 +1,211 @@
+"""Sonuç ve sayfa görüntüsü önbellekleri"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.analysis import (
+    AnalysisMetadata,
+    DrawingAnalysisResult,
+    GeometryAnalysis,
+    ManufacturingAnalysis,
+    QualityRequirements,
+)
+from app.services import analyzer as analyzer_module
+from app.services import cache as cache_module
+from app.services.analyzer import DrawingAnalyzer
+from app.services.cache import PageImageCache, ResultCache, make_cache_key
+from app.services.prompts import PROMPT_VERSION
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def _result(title: str) -> DrawingAnalysisResult:
+    return DrawingAnalysisResult(
+        title=title,
+        geometry=GeometryAnalysis(part_type="flanş", shape_type="silindirik", complexity_score=3),
+        manufacturing=ManufacturingAnalysis(primary_process="tornalama", setup_count=1, difficulty_level="kolay"),
+        quality=QualityRequirements(),
+        metadata=AnalysisMetadata(model_used="gpt-5.2", processing_time=1.0, confidence_score=0.9)
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: fake.now))
+    return fake
+
+
+def test_cache_key_is_deterministic_and_parameter_sensitive():
+    base = dict(model="gpt-5.2", reasoning_level="high", enhance_mode="balanced", prompt_version="v1")
+    key = make_cache_key("abc", **base)
+
+    assert make_cache_key("abc", **dict(reversed(list(base.items())))) == key
+    assert make_cache_key("abd", **base) != key
+    for name, other in [
+        ("model", "claude-3-5-sonnet-20241022"),
+        ("reasoning_level", "xhigh"),
+        ("enhance_mode", "aggressive"),
+        ("prompt_version", "v2"),
+    ]:
+        assert make_cache_key("abc", **{**base, name: other}) != key, name
+
+
+def test_analyze_keys_cache_on_prompt_version_model_reasoning_and_enhance_mode(monkeypatch):
+    seen = []
+
+    class _Stop(Exception):
+        pass
+
+    def capture(file_hash, **params):
+        seen.append(params)
+        raise _Stop()
+
+    monkeypatch.setattr(analyzer_module, "make_cache_key", capture)
+    analyzer = DrawingAnalyzer()
+
+    with pytest.raises(_Stop):
+        asyncio.run(analyzer.analyze(
+            PNG, "part.png", model="gpt-5.2", reasoning_level="xhigh", enhance_mode="aggressive", max_tokens=1234
+        ))
+
+    assert seen[0]["prompt_version"] == PROMPT_VERSION
+    assert seen[0]["model"] == "gpt-5.2"
+    assert seen[0]["reasoning_level"] == "xhigh"
+    assert seen[0]["enhance_mode"] == "aggressive"
+    assert seen[0]["max_tokens"] == 1234
+
+
+def test_memory_hit_returns_copy(clock):
+    cache = ResultCache(memory_entries=4)
+
+    async def main():
+        await cache.set("k", _result("A"))
+        first = await cache.get("k")
+        first.title = "changed"
+        return await cache.get("k")
+
+    assert asyncio.run(main()).title == "A"
+    assert cache.stats()["hits"] == {"memory": 2, "disk": 0}
+
+
+def test_ttl_expiry(clock, tmp_path):
+    cache = ResultCache(memory_entries=4, disk_dir=str(tmp_path), ttl=60)
+
+    async def main():
+        await cache.set("k", _result("A"))
+        clock.now += 59
+        fresh = await cache.get("k")
+        clock.now += 2
+        expired = await cache.get("k")
+        return fresh, expired
+
+    fresh, expired = asyncio.run(main())
+
+    assert fresh is not None and expired is None
+    assert cache.misses == 1
+    # Süresi dolan disk kaydı da silinir
+    assert list(tmp_path.glob("*/*.json")) == []
+
+
+def test_memory_lru_eviction_at_cap(clock):
+    cache = ResultCache(memory_entries=2)
+
+    async def main():
+        await cache.set("a", _result("A"))
+        await cache.set("b", _result("B"))
+        await cache.get("a")  # a en son kullanılan
+        await cache.set("c", _result("C"))
+        return [await cache.get(key) for key in ("a", "b", "c")]
+
+    a, b, c = asyncio.run(main())
+
+    assert a.title == "A" and b is None and c.title == "C"
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_round_trip_across_instances(clock, tmp_path):
+    expected = _result("A")
+
+    async def main():
+        await ResultCache(disk_dir=str(tmp_path)).set("k" * 64, expected)
+        restarted = ResultCache(disk_dir=str(tmp_path))
+        first = await restarted.get("k" * 64)
+        second = await restarted.get("k" * 64)
+        return restarted, first, second
+
+    restarted, first, second = asyncio.run(main())
+
+    assert first == expected
+    assert second == expected
+    assert restarted.hits == {"memory": 1, "disk": 1}
+
+
+def test_disk_eviction_by_size(clock, tmp_path):
+    size = len(_result("A").model_dump_json().encode("utf-8"))
+    cache = ResultCache(memory_entries=1, disk_dir=str(tmp_path), disk_max_bytes=size * 2)
+
+    async def main():
+        for key in ("aa", "bb", "cc"):
+            await cache.set(key, _result("A"))
+            clock.now += 1
+        return [await ResultCache(disk_dir=str(tmp_path)).get(key) for key in ("aa", "bb", "cc")]
+
+    oldest, middle, newest = asyncio.run(main())
+
+    assert oldest is None and middle is not None and newest is not None
+    assert cache.stats()["disk_bytes"] <= size * 2
+
+
+def test_invalidate_removes_both_tiers(clock, tmp_path):
+    cache = ResultCache(disk_dir=str(tmp_path))
+
+    async def main():
+        await cache.set("k", _result("A"))
+        await cache.invalidate("k")
+        return await cache.get("k")
+
+    assert asyncio.run(main()) is None
+    assert list(tmp_path.glob("*/*.json")) == []
+
+
+def test_disabled_cache_is_noop(clock, tmp_path):
+    cache = ResultCache(enabled=False, disk_dir=str(tmp_path))
+
+    async def main():
+        await cache.set("k", _result("A"))
+        return await cache.get("k")
+
+    assert asyncio.run(main()) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def _page(page: int, size: int, provider="openai"):
+    return {"page": page, "provider": provider, "image_base64": "x" * size, "width": 10, "height": 10}
+
+
+def test_page_cache_keyed_by_provider_and_enhance_mode():
+    cache = PageImageCache(max_bytes=1000)
+    cache.set("hash", 300, "balanced", _page(1, 10))
+
+    assert cache.get("hash", 300, "balanced", 1, "openai")["image_base64"] == "x" * 10
+    assert cache.get("hash", 300, "balanced", 1, "anthropic") is None
+    assert cache.get("hash", 300, "aggressive", 1, "openai") is None
+    assert cache.get("hash", 200, "balanced", 1, "openai") is None
+
+
+def test_page_cache_lru_eviction_by_bytes():
+    cache = PageImageCache(max_bytes=250)
+    cache.set("hash", 300, "balanced", _page(1, 100))
+    cache.set("hash", 300, "balanced", _page(2, 100))
+    cache.get("hash", 300, "balanced", 1, "openai")
+    cache.set("hash", 300, "balanced", _page(3, 100))
+
+    assert cache.get("hash", 300, "balanced", 2, "openai") is None
+    assert cache.get("hash", 300, "balanced", 1, "openai") is not None
+    assert cache.stats()["bytes"] == 200
+
+    # Tek başına sınırı aşan girdi önbelleğe alınmaz
+    cache.set("hash", 300, "balanced", _page(4, 300))
+    assert cache.get("hash", 300, "balanced", 4, "openai") is None
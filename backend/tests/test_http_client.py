@@ -0,0 +1,65 @@
+"""Sağlayıcı istemcilerinin paylaşılan bağlantı havuzu ile kurulumu"""
+import asyncio
+
+import anthropic
+import httpx2
+import openai
+
+from app.core.config import settings
+from app.services.analyzer import DrawingAnalyzer
+from app.services.http_client import close_http_client, get_http_client, provider_timeout
+
+
+def _mock_client(sdk, body):
+    """İstekleri ağa çıkmadan yanıtlayan, istenen zaman aşımlarını kaydeden istemci"""
+    seen = []
+
+    def handler(request):
+        seen.append(request.extensions["timeout"])
+        return httpx2.Response(200, json=body)
+
+    return sdk.DefaultAsyncHttpxClient(transport=httpx2.MockTransport(handler)), seen
+
+
+def test_analyzer_initializes_clients_with_keys_set(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", "sk-test")
+    monkeypatch.setattr(settings, "anthropic_api_key", "sk-ant-test")
+
+    analyzer = DrawingAnalyzer()
+
+    assert analyzer.openai_client is not None
+    assert analyzer.anthropic_client is not None
+    # SDK başına tek havuz; tekrar kurulumda aynı havuz paylaşılır
+    assert get_http_client(openai) is get_http_client(openai)
+    assert get_http_client(openai) is not get_http_client(anthropic)
+    asyncio.run(close_http_client())
+
+
+def test_per_call_timeout_is_accepted_by_each_sdk():
+    async def main():
+        http, seen = _mock_client(anthropic, {
+            "id": "msg", "type": "message", "role": "assistant", "model": "claude",
+            "content": [{"type": "text", "text": "{}"}], "stop_reason": "end_turn",
+            "stop_sequence": None, "usage": {"input_tokens": 1, "output_tokens": 1}
+        })
+        client = anthropic.AsyncAnthropic(api_key="sk-ant-test", http_client=http)
+        await client.messages.create(
+            model="claude", max_tokens=8, messages=[{"role": "user", "content": "x"}],
+            timeout=provider_timeout(anthropic, "xhigh")
+        )
+        assert seen[-1]["read"] == settings.provider_timeout_xhigh
+        assert seen[-1]["connect"] == settings.http_connect_timeout
+
+        http, seen = _mock_client(openai, {
+            "id": "chatcmpl", "object": "chat.completion", "created": 0, "model": "gpt",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "{}"}}]
+        })
+        client = openai.AsyncOpenAI(api_key="sk-test", http_client=http)
+        await client.chat.completions.create(
+            model="gpt", messages=[{"role": "user", "content": "x"}],
+            timeout=provider_timeout(openai, "medium")
+        )
+        assert seen[-1]["read"] == settings.provider_timeout_medium
+
+    asyncio.run(main())
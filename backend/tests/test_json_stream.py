@@ -0,0 +1,134 @@
+"""Artımlı JSON ayrıştırıcı ve akış ilerleme olayları"""
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.analyzer import DrawingAnalyzer
+from app.services.json_stream import IncrementalJSONParser
+from app.services.progress import AnalysisProgress
+
+DOCUMENT = {
+    "title_block": {"part_name": "Flanş \"A\" {rev}", "drawing_number": "DI-2D-001"},
+    "material": {"type": "1.4301", "notes": "köşe } ve ] karakterleri, ters bölü \\ ve \\\" kaçış"},
+    "geometry": {"dimensions": [{"value": 12.5, "tolerance": [-0.1, 0.1]}, {"value": 40, "tolerance": None}]},
+    "confidence": 0.93,
+    "flags": [],
+    "empty": {},
+}
+
+
+def _feed_all(parser: IncrementalJSONParser, chunks):
+    members = []
+    for chunk in chunks:
+        members.extend(parser.feed(chunk))
+    return members
+
+
+def _chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_members_match_json_loads_across_chunk_boundaries(size):
+    text = json.dumps(DOCUMENT, ensure_ascii=False, indent=2)
+    parser = IncrementalJSONParser()
+
+    members = _feed_all(parser, _chunks(text, size))
+
+    assert dict(members) == json.loads(text)
+    assert [key for key, _ in members] == list(DOCUMENT)
+    assert parser.done
+
+
+def test_members_are_returned_as_soon_as_they_close():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"title_block": {"part_name": "x, y"}') == []
+    assert parser.feed(', "geo') == [("title_block", {"part_name": "x, y"})]
+    assert parser.feed('metry": [1, [2, 3]]}') == [("geometry", [1, [2, 3]])]
+    assert parser.done
+    assert parser.feed(', "late": 1}') == []
+
+
+def test_escaped_quote_split_across_chunks():
+    parser = IncrementalJSONParser()
+
+    members = _feed_all(parser, ['{"note": "a\\', '"}", "b": 1}'])
+
+    assert members == [("note", 'a"}'), ("b", 1)]
+
+
+def test_leading_fence_text_is_skipped():
+    parser = IncrementalJSONParser()
+
+    members = _feed_all(parser, ["```json\n", '{"a": 1, ', '"b": {"c": 2}}', "\n```"])
+
+    assert members == [("a", 1), ("b", {"c": 2})]
+
+
+def test_top_level_array_yields_no_sections():
+    parser = IncrementalJSONParser()
+
+    assert _feed_all(parser, ['[{"a": 1}, ', '{"b": 2}]']) == []
+    assert parser.done
+
+
+def test_invalid_member_is_skipped():
+    parser = IncrementalJSONParser()
+
+    members = _feed_all(parser, ['{"a": tru, ', '"b": 2}'])
+
+    assert members == [("b", 2)]
+
+
+def _drain(progress: AnalysisProgress):
+    events = []
+    while not progress._queue.empty():
+        events.append(progress._queue.get_nowait())
+    return events
+
+
+def test_collect_stream_reports_first_token_sections_and_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "stream_progress_interval", 0.0)
+    text = json.dumps({"title_block": {"part_name": "x"}, "material": {"type": "S235"}})
+    chunks = ["", *_chunks(text, 5)]
+
+    async def deltas():
+        for chunk in chunks:
+            yield chunk
+
+    progress = AnalysisProgress()
+    content = asyncio.run(DrawingAnalyzer._collect_stream(deltas(), progress))
+    events = _drain(progress)
+
+    assert content == text
+    assert events[0]["event"] == "first_token"
+    assert [event["event"] for event in events].count("first_token") == 1
+    sections = [(event["section"], event["data"]) for event in events if event["event"] == "section"]
+    assert sections == [("title_block", {"part_name": "x"}), ("material", {"type": "S235"})]
+    tokens = [event for event in events if event["event"] == "tokens"]
+    assert tokens[-1]["output_chars"] == len(text)
+    assert tokens[-1]["deltas"] == len(chunks) - 1
+
+
+def test_collect_stream_throttles_token_events(monkeypatch):
+    monkeypatch.setattr(settings, "stream_progress_interval", 3600.0)
+
+    async def deltas():
+        for chunk in _chunks('{"a": 1, "b": 2}', 1):
+            yield chunk
+
+    progress = AnalysisProgress()
+    asyncio.run(DrawingAnalyzer._collect_stream(deltas(), progress))
+
+    assert [event["event"] for event in _drain(progress) if event["event"] == "tokens"] == []
+
+
+def test_collect_stream_without_progress():
+    async def deltas():
+        yield '{"a": '
+        yield "1}"
+
+    assert asyncio.run(DrawingAnalyzer._collect_stream(deltas(), None)) == '{"a": 1}'
@@ -0,0 +1,34 @@
+"""Prometheus etiketlerinin kardinalite sınırı"""
+from app.services import metrics
+
+
+def _series(name: str) -> set:
+    return {
+        tuple(sorted(sample.labels.items()))
+        for family in metrics.STAGE_DURATION.collect()
+        for sample in family.samples
+        if sample.name == name
+    }
+
+
+def test_unknown_label_values_map_to_other():
+    metrics.observe_stage("validate", 0.01, "gpt-5.2", "high", "balanced")
+    metrics.observe_stage("validate", 0.01, "evil-model-1", "ultra", "x" * 40)
+    metrics.observe_stage("validate", 0.01, "evil-model-2", "ultra2", "y")
+
+    series = _series("di2d_stage_duration_seconds_count")
+    labels = [dict(items) for items in series if dict(items)["stage"] == "validate"]
+
+    assert {"stage": "validate", "model": "gpt-5.2", "reasoning_level": "high", "enhance_mode": "balanced"} in labels
+    assert {"stage": "validate", "model": "other", "reasoning_level": "other", "enhance_mode": "other"} in labels
+    assert not any(label["model"].startswith("evil") for label in labels)
+
+
+def test_error_counter_uses_known_model_labels():
+    metrics.record_error("../../etc/passwd", ValueError("x"))
+    samples = [
+        sample.labels
+        for family in metrics.ANALYSIS_ERRORS.collect()
+        for sample in family.samples
+    ]
+    assert {"model": "other", "error_type": "ValueError"} in samples
@@ -0,0 +1,107 @@
+"""Akışlı sağlayıcı yanıtları: iptalde / hatada bağlantının hemen kapanması"""
+import asyncio
+import json
+
+import httpx2
+import openai
+import pytest
+
+from app.services.analyzer import DrawingAnalyzer
+from app.services.progress import AnalysisProgress
+
+IMAGE = {"media_type": "image/png", "image_base64": "AAAA"}
+
+
+class _HangingStream(httpx2.AsyncByteStream):
+    """İlk olaydan sonra sonsuza kadar bekleyen SSE gövdesi; kapatılınca işaretlenir"""
+
+    def __init__(self, first_event: dict):
+        self.first_event = first_event
+        self.started = asyncio.Event()
+        self.closed = False
+
+    async def __aiter__(self):
+        yield f"data: {json.dumps(self.first_event)}\n\n".encode()
+        self.started.set()
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        self.closed = True
+
+
+def _analyzer_with(body: _HangingStream) -> DrawingAnalyzer:
+    def handler(request):
+        return httpx2.Response(200, headers={"content-type": "text/event-stream"}, stream=body)
+
+    analyzer = DrawingAnalyzer()
+    analyzer.openai_client = openai.AsyncOpenAI(
+        api_key="sk-test",
+        http_client=openai.DefaultAsyncHttpxClient(transport=httpx2.MockTransport(handler))
+    )
+    return analyzer
+
+
+class _FailingProgress(AnalysisProgress):
+    """İlk çıktı olayında hata veren ilerleme hedefi (akış yield'de askıdayken çıkış)"""
+
+    def emit(self, event, **data):
+        if event == "first_token":
+            raise RuntimeError("progress failed")
+
+
+async def _fail_mid_stream(body: _HangingStream, call) -> None:
+    with pytest.raises(Exception):
+        await call
+    assert body.closed
+
+
+async def _cancel_mid_stream(body: _HangingStream, call) -> None:
+    task = asyncio.ensure_future(call)
+    await asyncio.wait_for(body.started.wait(), 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # Kapanış çağrı içinde olmalı, çöp toplama / döngü kapanışına kalmamalı
+    assert body.closed
+
+
+CHAT_CHUNK = {
+    "id": "c", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4-vision-preview",
+    "choices": [{"index": 0, "delta": {"content": "{\"title_block\": {}"}, "finish_reason": None}]
+}
+RESPONSES_DELTA = {
+    "type": "response.output_text.delta", "delta": "{", "sequence_number": 1,
+    "item_id": "i", "output_index": 0, "content_index": 0, "logprobs": []
+}
+
+
+def test_chat_completions_stream_closed_on_cancel():
+    body = _HangingStream(CHAT_CHUNK)
+    analyzer = _analyzer_with(body)
+    asyncio.run(_cancel_mid_stream(body, analyzer._analyze_with_gpt4_legacy(
+        [IMAGE], "gpt-4-vision-preview", "system", "user", 1000, "high"
+    )))
+
+
+def test_chat_completions_stream_closed_on_consumer_error():
+    body = _HangingStream(CHAT_CHUNK)
+    analyzer = _analyzer_with(body)
+    asyncio.run(_fail_mid_stream(body, analyzer._analyze_with_gpt4_legacy(
+        [IMAGE], "gpt-4-vision-preview", "system", "user", 1000, "high", _FailingProgress()
+    )))
+
+
+def test_responses_stream_closed_on_cancel():
+    body = _HangingStream(RESPONSES_DELTA)
+    analyzer = _analyzer_with(body)
+    asyncio.run(_cancel_mid_stream(body, analyzer._analyze_with_gpt52(
+        [IMAGE], "gpt-5.2", "system", "user", 1000, "high"
+    )))
+
+
+def test_responses_stream_closed_on_consumer_error():
+    body = _HangingStream(RESPONSES_DELTA)
+    analyzer = _analyzer_with(body)
+    asyncio.run(_fail_mid_stream(body, analyzer._analyze_with_gpt52(
+        [IMAGE], "gpt-5.2", "system", "user", 1000, "high", _FailingProgress()
+    )))
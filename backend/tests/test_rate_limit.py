@@ -0,0 +1,179 @@
+"""Sağlayıcı kabul katmanı: FIFO sıra, RPM/TPM kovaları, token tahmini ve kuyruk sınırı"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import CapacityError
+from app.services import rate_limit
+from app.services.rate_limit import ProviderLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Sahte saat: kova dolumu ve bekleme süreleri gerçek zamandan bağımsızdır
+
+    asyncio.sleep(d) saati d kadar ilerletir ve sadece döngüye bir tur verir.
+    """
+    fake = SimpleNamespace(now=0.0, sleeps=[])
+
+    async def sleep(delay):
+        fake.sleeps.append(delay)
+        fake.now += delay
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: fake.now, perf_counter=lambda: fake.now))
+    monkeypatch.setattr(rate_limit, "asyncio", SimpleNamespace(
+        Semaphore=asyncio.Semaphore, Lock=asyncio.Lock, sleep=sleep
+    ))
+    monkeypatch.setattr(settings, "rate_limit_token_ewma", 0.2)
+    return fake
+
+
+async def _admit_once(limiter, tokens_used=None):
+    async with limiter.admit() as admission:
+        admission.tokens_used = tokens_used
+    return admission
+
+
+def test_rpm_bucket_refills_over_time(clock):
+    limiter = ProviderLimiter("test", max_in_flight=8, rpm=2, tpm=0, initial_tokens=0)
+
+    async def main():
+        first = await _admit_once(limiter)
+        second = await _admit_once(limiter)
+        third = await _admit_once(limiter)
+        return first, second, third
+
+    first, second, third = asyncio.run(main())
+
+    assert first.queue_wait == 0 and second.queue_wait == 0
+    # Dakikada 2 istek: kova boşken bir istek için 30 s beklenir (en fazla 5 s'lik adımlarla)
+    assert third.queue_wait == pytest.approx(30.0)
+    assert max(clock.sleeps) <= 5.0
+    assert limiter.stats()["max_queue_wait"] == pytest.approx(30.0)
+
+
+def test_tpm_bucket_learns_token_estimate(clock):
+    limiter = ProviderLimiter("test", max_in_flight=8, rpm=0, tpm=100_000, initial_tokens=30_000)
+
+    async def main():
+        admission = await _admit_once(limiter, tokens_used=10_000)
+        return admission
+
+    admission = asyncio.run(main())
+
+    assert admission.estimated_tokens == 30_000
+    # EWMA: 0.8 * 30000 + 0.2 * 10000
+    assert limiter.estimated_tokens == pytest.approx(26_000)
+    # Tahmin düşüldü, fark (10000 - 30000) çağrı bitince kovaya geri yansıdı
+    assert limiter.stats()["tpm_available"] == 90_000
+
+
+def test_tpm_bucket_waits_for_estimated_tokens(clock):
+    limiter = ProviderLimiter("test", max_in_flight=8, rpm=0, tpm=60_000, initial_tokens=40_000)
+
+    async def main():
+        await _admit_once(limiter, tokens_used=40_000)
+        return await _admit_once(limiter)
+
+    second = asyncio.run(main())
+
+    # Kovada 20000 kaldı; 40000 için 20000 token daha = 20 s (dakikada 60000)
+    assert second.queue_wait == pytest.approx(20.0)
+
+
+def test_admission_is_fifo_under_contention(clock):
+    limiter = ProviderLimiter("test", max_in_flight=1, rpm=0, tpm=0, initial_tokens=0)
+    order = []
+
+    async def call(name):
+        async with limiter.admit():
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def main():
+        tasks = []
+        for name in range(6):
+            tasks.append(asyncio.ensure_future(call(name)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    assert order == list(range(6))
+    assert limiter.admitted == 6
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+def test_rate_limited_head_blocks_later_callers(clock):
+    """Kovayı bekleyen kuyruk başı varken boş slot olsa da arkadaki çağrı öne geçemez"""
+    limiter = ProviderLimiter("test", max_in_flight=4, rpm=1, tpm=0, initial_tokens=0)
+    order = []
+
+    async def call(name):
+        async with limiter.admit():
+            order.append((name, clock.now))
+
+    async def main():
+        await asyncio.gather(*(call(name) for name in range(3)))
+
+    asyncio.run(main())
+
+    assert [name for name, _ in order] == [0, 1, 2]
+    assert [at for _, at in order] == pytest.approx([0.0, 60.0, 120.0])
+
+
+def test_full_queue_raises_capacity_error(clock):
+    limiter = ProviderLimiter("test", max_in_flight=1, rpm=0, tpm=0, initial_tokens=0, max_queue=2)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.admit():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        waiters = [asyncio.ensure_future(_admit_once(limiter)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 1 and limiter.queued == 2
+
+        with pytest.raises(CapacityError):
+            await _admit_once(limiter)
+
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        # Kuyruk boşalınca yeni çağrı kabul edilir
+        await _admit_once(limiter)
+
+    asyncio.run(main())
+    assert limiter.admitted == 4
+
+
+def test_cancelled_waiter_leaves_queue(clock):
+    limiter = ProviderLimiter("test", max_in_flight=1, rpm=0, tpm=0, initial_tokens=0, max_queue=1)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.admit():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        waiter = asyncio.ensure_future(_admit_once(limiter))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queued == 0
+
+        release.set()
+        await holder
+        await _admit_once(limiter)
+
+    asyncio.run(main())
+    assert limiter.in_flight == 0
@@ -0,0 +1,236 @@
+"""Devre kesici, gecikme izleyici ve hedging"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import analyzer as analyzer_module
+from app.services import resilience
+from app.services.analyzer import DrawingAnalyzer
+from app.services.rate_limit import ProviderLimiter
+from app.services.resilience import CircuitBreaker, LatencyTracker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """resilience modülünün monotonic saatini elle ilerletilen sahte saatle değiştir"""
+    fake = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=lambda: fake.now))
+    monkeypatch.setattr(settings, "breaker_window", 10)
+    monkeypatch.setattr(settings, "breaker_min_calls", 4)
+    monkeypatch.setattr(settings, "breaker_failure_ratio", 0.5)
+    monkeypatch.setattr(settings, "breaker_slow_ratio", 0.8)
+    monkeypatch.setattr(settings, "breaker_open_seconds", 60.0)
+    return fake
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_breaker_stays_closed_below_min_calls_and_ratio(clock):
+    breaker = CircuitBreaker("test")
+
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == "closed"  # breaker_min_calls dolmadı
+
+    other = CircuitBreaker("other")
+    for _ in range(4):
+        other.record_success(1.0, 100.0)
+    for _ in range(3):
+        other.record_failure()
+    assert other.state == "closed"  # 3/7 < 0.5
+    assert other.allow()
+
+
+def test_breaker_opens_at_failure_ratio_counting_slow_calls(clock):
+    breaker = CircuitBreaker("test")
+
+    breaker.record_success(1.0, 100.0)
+    breaker.record_success(1.0, 100.0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_success(85.0, 100.0)  # Zaman aşımının %80'ini aştı: yavaş
+
+    assert breaker.state == "open"
+    assert breaker.opened == 1
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_breaker_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker("test")
+    _open(breaker)
+
+    clock.now += 59
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # Deneme çağrısı sürerken ikinci çağrı geçmez
+
+    breaker.record_success(1.0, 100.0)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.stats()["recent_calls"] == 0
+
+
+def test_breaker_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("test")
+    _open(breaker)
+    clock.now += 60
+    assert breaker.allow()
+
+    breaker.record_slow(500.0)
+
+    assert breaker.state == "open"
+    assert breaker.opened == 2
+    clock.now += 30
+    assert not breaker.allow()
+
+
+def test_breaker_abandoned_probe_gives_the_probe_back(clock):
+    breaker = CircuitBreaker("test")
+    _open(breaker)
+    clock.now += 60
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_abandoned()
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_breaker_abandoned_calls_do_not_count(clock):
+    breaker = CircuitBreaker("test")
+
+    for _ in range(10):
+        breaker.record_abandoned()
+
+    assert breaker.stats()["recent_calls"] == 0
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker(window=100)
+    for duration in range(1, 11):
+        tracker.record("gpt-5.2", "high", float(duration))
+
+    assert tracker.percentile("gpt-5.2", "high", 0.9, min_samples=10) == 9.0
+    assert tracker.percentile("gpt-5.2", "high", 0.5, min_samples=10) == 5.0
+    assert tracker.percentile("gpt-5.2", "high", 1.0, min_samples=10) == 10.0
+    assert tracker.percentile("gpt-5.2", "high", 0.0, min_samples=10) == 1.0
+    assert tracker.percentile("gpt-5.2", "high", 0.9, min_samples=11) is None
+    assert tracker.percentile("gpt-5.2", "medium", 0.9, min_samples=1) is None
+
+
+def test_latency_window_keeps_latest_samples():
+    tracker = LatencyTracker(window=3)
+    for duration in (100.0, 1.0, 2.0, 3.0):
+        tracker.record("gpt-5.2", "high", duration)
+
+    assert tracker.percentile("gpt-5.2", "high", 1.0, min_samples=3) == 3.0
+
+
+PRIMARY = "gpt-5.2"
+ALTERNATE = "claude-3-5-sonnet-20241022"
+
+
+@pytest.fixture
+def hedging(monkeypatch, clock):
+    """Yalıtılmış devre kesiciler, gecikme geçmişi ve kabul katmanıyla hedging açık analyzer"""
+    breakers = {name: CircuitBreaker(name) for name in ("openai", "anthropic")}
+    tracker = LatencyTracker(window=50)
+    for _ in range(5):
+        tracker.record(PRIMARY, "high", 0.05)
+    limiters = {name: ProviderLimiter(name, 4, 0, 0, 0) for name in ("openai", "anthropic")}
+    monkeypatch.setattr(analyzer_module, "circuit_breakers", breakers)
+    monkeypatch.setattr(analyzer_module, "latency_tracker", tracker)
+    monkeypatch.setattr(analyzer_module, "provider_limiters", limiters)
+    monkeypatch.setattr(settings, "hedge_enabled", True)
+    monkeypatch.setattr(settings, "hedge_percentile", 0.9)
+    monkeypatch.setattr(settings, "hedge_min_samples", 5)
+    monkeypatch.setattr(settings, "model_alternates", {PRIMARY: ALTERNATE, ALTERNATE: PRIMARY})
+
+    analyzer = DrawingAnalyzer()
+    calls = SimpleNamespace(primary_cancelled=None)
+
+    async def slow_primary(images, model, max_tokens, reasoning_level, prompts, progress):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError as e:
+            calls.primary_cancelled = e.args
+            raise
+        return {"title": "primary"}
+
+    async def fast_alternate(images, model, max_tokens, reasoning_level, prompts, progress):
+        return {"title": "alternate", "tokens_used": 10}
+
+    monkeypatch.setattr(analyzer, "_analyze_with_openai", slow_primary)
+    monkeypatch.setattr(analyzer, "_analyze_with_claude", fast_alternate)
+    return SimpleNamespace(analyzer=analyzer, breakers=breakers, tracker=tracker, calls=calls)
+
+
+def test_hedge_alternate_wins_and_primary_is_recorded_slow(hedging):
+    pages = [{"page": 1, "image_base64": "AAAA", "media_type": "image/png"}]
+
+    async def pages_for(model):
+        return pages
+
+    async def main():
+        result = await hedging.analyzer._call_resilient(pages, PRIMARY, 1000, "high", pages_for)
+        await asyncio.sleep(0)  # İptal edilen birincil çağrının kapanışı
+        return result
+
+    result, used_model, used_pages = asyncio.run(main())
+
+    assert used_model == ALTERNATE
+    assert result["title"] == "alternate"
+    assert result["hedged"] is True
+    # Birincil çağrı "hedge_lost" mesajıyla iptal edildi ve yavaş sayıldı
+    assert hedging.calls.primary_cancelled == (analyzer_module.HEDGE_LOST,)
+    assert list(hedging.breakers["openai"]._outcomes) == [True]
+    assert list(hedging.breakers["anthropic"]._outcomes) == [False]
+    # Kaybedenin geçen süresi gecikme dağılımına alt sınır örneği olarak girer
+    samples = list(hedging.tracker._samples[(PRIMARY, "high")])
+    assert len(samples) == 6
+    assert samples[-1] >= 0.05
+
+
+def test_hedge_not_started_without_enough_samples(hedging, monkeypatch):
+    monkeypatch.setattr(settings, "hedge_min_samples", 50)
+
+    async def fast_primary(images, model, max_tokens, reasoning_level, prompts, progress):
+        return {"title": "primary"}
+
+    async def unexpected(*args):
+        raise AssertionError("yedek model çağrılmamalı")
+
+    monkeypatch.setattr(hedging.analyzer, "_analyze_with_openai", fast_primary)
+    monkeypatch.setattr(hedging.analyzer, "_analyze_with_claude", unexpected)
+
+    async def pages_for(model):
+        raise AssertionError("yedek sayfa hazırlanmamalı")
+
+    result, used_model, _ = asyncio.run(hedging.analyzer._call_resilient([], PRIMARY, 1000, "high", pages_for))
+
+    assert used_model == PRIMARY
+    assert "hedged" not in result
+
+
+def test_open_circuit_routes_to_alternate(hedging):
+    _open(hedging.breakers["openai"])
+
+    async def pages_for(model):
+        return [{"page": 1, "image_base64": "AAAA", "media_type": "image/png"}]
+
+    result, used_model, _ = asyncio.run(hedging.analyzer._call_resilient([], PRIMARY, 1000, "high", pages_for))
+
+    assert used_model == ALTERNATE
+    assert hedging.calls.primary_cancelled is None
+    assert any(ALTERNATE in warning for warning in result["warnings"])
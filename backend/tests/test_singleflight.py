@@ -0,0 +1,194 @@
+"""Eşzamanlı aynı analizlerin tek işte birleştirilmesi"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.exceptions import AnalysisError, DeadlineExceededError
+from app.services.analyzer import DrawingAnalyzer
+from app.services.deadline import Deadline
+from app.services.singleflight import SingleFlight
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def test_concurrent_callers_share_one_task():
+    flights = SingleFlight("test")
+    started = []
+
+    async def work():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def main():
+        return await asyncio.gather(*(flights.run("key", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(started) == 1
+    assert [result for result, _ in results] == [{"value": 42}] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 4, "cancelled": 0}
+
+
+def test_waiter_cancel_does_not_cancel_shared_task():
+    flights = SingleFlight("test")
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def work():
+            await gate.wait()
+            return "done"
+
+        leaving = asyncio.ensure_future(flights.run("key", work, waiter="a"))
+        staying = asyncio.ensure_future(flights.run("key", work, waiter="b"))
+        await asyncio.sleep(0)
+        assert flights.waiters("key") == ["a", "b"]
+
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        assert flights.waiters("key") == ["b"]
+
+        gate.set()
+        return await staying
+
+    assert asyncio.run(main()) == ("done", True)
+    assert flights.cancelled == 0
+
+
+def test_last_waiter_leaving_cancels_task():
+    flights = SingleFlight("test")
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        waiters = [asyncio.ensure_future(flights.run("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+
+    assert cancelled == [True]
+    assert flights.cancelled == 1
+    assert "key" not in flights
+
+
+def test_exception_reaches_every_waiter():
+    flights = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise AnalysisError("provider failed")
+
+    async def main():
+        return await asyncio.gather(*(flights.run("key", work) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+
+    assert all(isinstance(error, AnalysisError) for error in errors)
+    assert flights.in_flight == 0
+
+
+def _result_dict():
+    return {
+        "title": "TEST-001",
+        "geometry": {"part_type": "flanş", "shape_type": "silindirik", "complexity_score": 3},
+        "manufacturing": {"primary_process": "tornalama", "setup_count": 1, "difficulty_level": "kolay"},
+        "quality": {},
+        "queue_wait": 0.0,
+    }
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    """Ön işleme ve sağlayıcı çağrısı sahte; çağrı sayısı ve görülen deadline'lar kaydedilir"""
+    analyzer = DrawingAnalyzer()
+    state = {"calls": 0, "gate": None, "deadlines": []}
+
+    async def preprocess(*args, **kwargs):
+        return [{"page": 1, "width": 100, "height": 100}]
+
+    async def call_resilient(page_list, model, max_tokens, reasoning_level, pages_for, progress=None):
+        state["calls"] += 1
+        await state["gate"].wait()
+        return _result_dict(), model, page_list
+
+    def check_provider_deadline(deadline, model, reasoning_level):
+        state["deadlines"].append(deadline.expires_at)
+
+    monkeypatch.setattr(analyzer, "preprocess", preprocess)
+    monkeypatch.setattr(analyzer, "_call_resilient", call_resilient)
+    monkeypatch.setattr(analyzer, "_check_provider_deadline", check_provider_deadline)
+    state["analyzer"] = analyzer
+    return state
+
+
+def _analyze(analyzer, deadline=None):
+    return analyzer.analyze(PNG, "part.png", model="gpt-5.2", use_cache=False, deadline=deadline)
+
+
+def test_analyze_coalesces_identical_requests(fake_provider):
+    async def main():
+        fake_provider["gate"] = asyncio.Event()
+        tasks = [asyncio.ensure_future(_analyze(fake_provider["analyzer"])) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        fake_provider["gate"].set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(main())
+
+    assert fake_provider["calls"] == 1
+    assert [result.metadata.coalesced for result in results].count(True) == 3
+    assert len({id(result) for result in results}) == 4  # Paylaşılan sonuç her isteğe ayrı kopya
+
+
+def test_expired_waiter_leaves_and_shared_run_uses_latest_deadline(fake_provider):
+    async def main():
+        fake_provider["gate"] = asyncio.Event()
+        now = time.time()
+        short = asyncio.ensure_future(_analyze(fake_provider["analyzer"], Deadline(now + 0.05)))
+        long = asyncio.ensure_future(_analyze(fake_provider["analyzer"], Deadline(now + 60)))
+
+        with pytest.raises(DeadlineExceededError):
+            await short
+        fake_provider["gate"].set()
+        return await long, now
+
+    result, now = asyncio.run(main())
+
+    assert fake_provider["calls"] == 1
+    assert result.title == "TEST-001"
+    # Paylaşılan iş ilk isteğin kısa deadline'ı ile değil en geç deadline ile çalıştı
+    assert fake_provider["deadlines"] == [pytest.approx(now + 60)]
+
+
+def test_analyze_error_reaches_every_waiter(fake_provider, monkeypatch):
+    async def failing(*args, **kwargs):
+        fake_provider["calls"] += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider exploded")
+
+    monkeypatch.setattr(fake_provider["analyzer"], "_call_resilient", failing)
+
+    async def main():
+        return await asyncio.gather(
+            *(_analyze(fake_provider["analyzer"]) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = asyncio.run(main())
+
+    assert fake_provider["calls"] == 1
+    assert all(isinstance(error, AnalysisError) and "provider exploded" in error.detail for error in errors)
@@ -0,0 +1,124 @@
+"""Karo planı ve karo sonuçlarının birleştirilmesi"""
+import pytest
+
+from app.services.tiling import merge_tile_items, plan_tiles
+
+
+def _covered(tiles, width, height):
+    """Her pikselin en az bir karoda olup olmadığı (satır/sütun aralıklarıyla)"""
+    xs = sorted({(t["x"], t["x"] + t["width"]) for t in tiles})
+    ys = sorted({(t["y"], t["y"] + t["height"]) for t in tiles})
+
+    def spans(intervals, end):
+        reach = 0
+        for start, stop in intervals:
+            if start > reach:
+                return False
+            reach = max(reach, stop)
+        return reach >= end
+
+    return spans(xs, width) and spans(ys, height)
+
+
+@pytest.mark.parametrize("width,height", [(9933, 14043), (7016, 4961), (1000, 800), (4097, 4095)])
+def test_plan_tiles_covers_page_with_overlap(width, height):
+    tiles = plan_tiles(width, height, tile_size=2048, overlap=0.1, max_tiles=16)
+
+    assert _covered(tiles, width, height)
+    assert [t["index"] for t in tiles] == list(range(len(tiles)))
+    for tile in tiles:
+        assert tile["x"] >= 0 and tile["y"] >= 0
+        assert tile["x"] + tile["width"] <= width
+        assert tile["y"] + tile["height"] <= height
+
+    by_cell = {(t["row"], t["col"]): t for t in tiles}
+    for (row, col), tile in by_cell.items():
+        right = by_cell.get((row, col + 1))
+        if right is not None:
+            # Komşu karolar örtüşür (sınırdaki yazı en az bir karoda tam görünür)
+            assert right["x"] < tile["x"] + tile["width"]
+        below = by_cell.get((row + 1, col))
+        if below is not None:
+            assert below["y"] < tile["y"] + tile["height"]
+
+
+def test_plan_tiles_single_tile_has_no_padding():
+    assert plan_tiles(1500, 1000, tile_size=2048, overlap=0.2, max_tiles=16) == [
+        {"index": 0, "row": 0, "col": 0, "x": 0, "y": 0, "width": 1500, "height": 1000}
+    ]
+
+
+def test_plan_tiles_respects_max_tiles():
+    tiles = plan_tiles(20000, 20000, tile_size=1024, overlap=0.1, max_tiles=9)
+
+    assert len(tiles) <= 9
+    assert _covered(tiles, 20000, 20000)
+
+
+def _tile(index, x, y, width=1000, height=1000, page=1):
+    return {"index": index, "page": page, "x": x, "y": y, "width": width, "height": height,
+            "page_width": 1900, "page_height": 1000}
+
+
+LEFT = _tile(0, 0, 0)
+RIGHT = _tile(1, 900, 0)  # x=900..1000 bölgesi örtüşüyor
+
+
+def test_merge_dedupes_reading_in_overlap_and_keeps_the_one_away_from_edge():
+    # Sayfa x=960: LEFT karosunun sağ kenarına 40 px, RIGHT karosunun sol kenarına 60 px
+    left_item = {"value": 25, "unit": "mm", "tolerance": "±0.1", "bbox": [0.95, 0.5, 0.97, 0.52], "src": "left"}
+    right_item = {"value": 25, "unit": "mm", "tolerance": "±0.1", "bbox": [0.05, 0.5, 0.07, 0.52], "src": "right"}
+
+    merged = merge_tile_items(
+        "dimensions", [(LEFT, {"dimensions": [left_item]}), (RIGHT, {"dimensions": [right_item]})], 0.02
+    )
+
+    assert merged == [{"value": 25, "unit": "mm", "tolerance": "±0.1", "src": "right"}]
+
+
+def test_merge_keeps_same_value_far_apart():
+    near_left = {"value": 25, "unit": "mm", "tolerance": None, "bbox": [0.1, 0.1, 0.12, 0.12]}
+    far_right = {"value": 25, "unit": "mm", "tolerance": None, "bbox": [0.8, 0.8, 0.82, 0.82]}
+
+    merged = merge_tile_items(
+        "dimensions", [(LEFT, {"dimensions": [near_left]}), (RIGHT, {"dimensions": [far_right]})], 0.02
+    )
+
+    assert len(merged) == 2
+
+
+def test_merge_keeps_repeated_values_within_one_tile():
+    items = [
+        {"value": 5, "unit": "mm", "tolerance": None, "bbox": [0.1, 0.1, 0.11, 0.11]},
+        {"value": 5, "unit": "mm", "tolerance": None, "bbox": [0.1, 0.1, 0.11, 0.11]},
+    ]
+
+    assert len(merge_tile_items("dimensions", [(LEFT, {"dimensions": items})], 0.02)) == 2
+
+
+def test_merge_without_bbox_dedupes_only_between_touching_tiles():
+    item = {"type": "flatness", "value": "0.05", "reference": None}
+    far = _tile(2, 5000, 0)
+
+    touching = merge_tile_items("tolerances", [(LEFT, {"tolerances": [item]}), (RIGHT, {"tolerances": [item]})], 0.02)
+    apart = merge_tile_items("tolerances", [(LEFT, {"tolerances": [item]}), (far, {"tolerances": [item]})], 0.02)
+
+    assert touching == [item]
+    assert apart == [item, item]
+
+
+def test_merge_does_not_match_across_pages():
+    item = {"value": 25, "unit": "mm", "tolerance": None, "bbox": [0.5, 0.5, 0.52, 0.52]}
+    other_page = dict(LEFT, index=3, page=2)
+
+    merged = merge_tile_items(
+        "dimensions", [(LEFT, {"dimensions": [item]}), (other_page, {"dimensions": [item]})], 0.02
+    )
+
+    assert len(merged) == 2
+
+
+def test_merge_skips_malformed_items():
+    merged = merge_tile_items("dimensions", [(LEFT, {"dimensions": ["25 mm", None, {"value": 1}]})], 0.02)
+
+    assert merged == [{"value": 1}]
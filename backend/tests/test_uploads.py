@@ -0,0 +1,101 @@
+"""Yükleme spool'u: imza doğrulama, boyut sınırı, artımlı hash ve spool dosyası ömrü"""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.exceptions import FileProcessingError
+from app.services.uploads import spool_upload
+
+PDF = b"%PDF-1.7\n" + bytes(range(256)) * 40
+
+
+@pytest.fixture
+def spool_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "upload_chunk_size", 1024)
+    monkeypatch.setattr(settings, "upload_spool_threshold", 4096)
+    monkeypatch.setattr(settings, "upload_max_bytes", 64 * 1024)
+    monkeypatch.setattr(settings, "upload_spool_dir", str(tmp_path))
+    return tmp_path
+
+
+def _spool(data: bytes, filename: str):
+    return asyncio.run(spool_upload(UploadFile(io.BytesIO(data), filename=filename)))
+
+
+def test_small_upload_stays_in_memory_with_incremental_hash(spool_dir):
+    data = PDF[:3000]
+
+    source = _spool(data, "part.pdf")
+
+    assert source.data == data and source.path is None
+    assert source.sha256 == hashlib.sha256(data).hexdigest()
+    assert os.listdir(spool_dir) == []
+
+
+def test_large_upload_is_spooled_with_incremental_hash(spool_dir):
+    source = _spool(PDF, "part.pdf")
+
+    assert source.data is None and source.owned
+    assert os.path.dirname(source.path) == str(spool_dir)
+    assert source.read_bytes() == PDF
+    assert source.sha256 == hashlib.sha256(PDF).hexdigest()
+    assert source.size == len(PDF)
+
+    source.cleanup()
+    assert os.listdir(spool_dir) == []
+
+
+@pytest.mark.parametrize("data,filename", [
+    (b"\x89PNG\r\n\x1a\n" + b"\x00" * 32, "part.pdf"),
+    (b"%PDF-1.7\n" + b"\x00" * 32, "part.png"),
+    (b"GIF89a" + b"\x00" * 32, "part.jpg"),
+], ids=["png-as-pdf", "pdf-as-png", "gif-as-jpg"])
+def test_magic_byte_mismatch_is_rejected(spool_dir, data, filename):
+    with pytest.raises(FileProcessingError):
+        _spool(data, filename)
+
+
+def test_unsupported_extension_and_empty_file_are_rejected(spool_dir):
+    with pytest.raises(FileProcessingError):
+        _spool(PDF, "part.gif")
+    with pytest.raises(FileProcessingError):
+        _spool(b"", "part.pdf")
+
+
+def test_size_limit_enforced_mid_stream(spool_dir, monkeypatch):
+    monkeypatch.setattr(settings, "upload_max_bytes", 6000)
+    stream = io.BytesIO(PDF)
+
+    with pytest.raises(FileProcessingError):
+        asyncio.run(spool_upload(UploadFile(stream, filename="part.pdf")))
+
+    # Sınır aşılınca okuma durur, kısmi spool dosyası silinir
+    assert stream.tell() <= 6000 + settings.upload_chunk_size
+    assert os.listdir(spool_dir) == []
+
+
+def test_shared_spool_file_removed_after_all_holders_release(spool_dir):
+    source = _spool(PDF, "part.pdf")
+
+    shared = source.share()
+    assert shared.path != source.path
+    assert shared.sha256 == source.sha256
+
+    # İstek biter: arka plandaki iş kendi hard link'inden okumaya devam eder
+    source.cleanup()
+    assert shared.read_bytes() == PDF
+    assert os.listdir(spool_dir) == [os.path.basename(shared.path)]
+
+    shared.cleanup()
+    assert os.listdir(spool_dir) == []
+
+
+def test_share_of_memory_source_is_itself(spool_dir):
+    source = _spool(PDF[:100], "part.pdf")
+
+    assert source.share() is source
@@ -6,30 +6,28 @@ import './DrawingAnalyzer.css'
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8001'
 
+interface ModelComparisonEntry {
+  name: string
+  provider: string
+  status: 'success' | 'error' | 'timeout'
+  error?: string | null
+  processing_time: number
+  confidence: number
+  result: any
+}
+
 interface ComparisonResult {
   timestamp: string
-  file_info: any
-  model1: {
-    name: string
-    provider: string
-    processing_time: number
-    confidence: number
-    analysis: any
-    raw_response: string
-  }
-  model2: {
-    name: string
-    provider: string
-    processing_time: number
-    confidence: number
-    analysis: any
-    raw_response: string
-  }
+  model1: ModelComparisonEntry
+  model2: ModelComparisonEntry
   comparison_notes: {
-    time_difference: number
-    confidence_difference: number
-    faster_model: string
-    higher_confidence: string
+    completed: number
+    failed: string[]
+    partial: boolean
+    time_difference?: number
+    confidence_difference?: number
+    faster_model?: string
+    higher_confidence?: string
   }
 }
 
@@ -235,19 +233,19 @@ const ComparisonView = () => {
               <div className="summary-card">
                 <span className="summary-label">Hız Farkı</span>
                 <span className="summary-value">
-                  {comparisonMutation.data.comparison_notes.time_difference.toFixed(2)}s
+                  {comparisonMutation.data.comparison_notes.time_difference?.toFixed(2) ?? '-'}s
                 </span>
                 <span className="summary-winner">
-                  🏃 {getModelDisplayName(comparisonMutation.data.comparison_notes.faster_model)}
+                  🏃 {getModelDisplayName(comparisonMutation.data.comparison_notes.faster_model ?? '')}
                 </span>
               </div>
               <div className="summary-card">
                 <span className="summary-label">Güven Farkı</span>
                 <span className="summary-value">
-                  {(comparisonMutation.data.comparison_notes.confidence_difference * 100).toFixed(1)}%
+                  {((comparisonMutation.data.comparison_notes.confidence_difference ?? 0) * 100).toFixed(1)}%
                 </span>
                 <span className="summary-winner">
-                  💪 {getModelDisplayName(comparisonMutation.data.comparison_notes.higher_confidence)}
+                  💪 {getModelDisplayName(comparisonMutation.data.comparison_notes.higher_confidence ?? '')}
                 </span>
               </div>
             </div>
@@ -279,10 +277,10 @@ const ComparisonView = () => {
               <div className="model-analysis">
                 <h4>Analiz Sonucu</h4>
                 <div className="analysis-content">
-                  {comparisonMutation.data.model1.analysis && Object.keys(comparisonMutation.data.model1.analysis).length > 0 ? (
-                    <pre>{JSON.stringify(comparisonMutation.data.model1.analysis, null, 2)}</pre>
+                  {comparisonMutation.data.model1.status === 'success' ? (
+                    <pre>{JSON.stringify(comparisonMutation.data.model1.result, null, 2)}</pre>
                   ) : (
-                    <p className="raw-response">{comparisonMutation.data.model1.raw_response}</p>
+                    <p className="raw-response">⚠️ {comparisonMutation.data.model1.error}</p>
                   )}
                 </div>
               </div>
@@ -313,10 +311,10 @@ const ComparisonView = () => {
               <div className="model-analysis">
                 <h4>Analiz Sonucu</h4>
                 <div className="analysis-content">
-                  {comparisonMutation.data.model2.analysis && Object.keys(comparisonMutation.data.model2.analysis).length > 0 ? (
-                    <pre>{JSON.stringify(comparisonMutation.data.model2.analysis, null, 2)}</pre>
+                  {comparisonMutation.data.model2.status === 'success' ? (
+                    <pre>{JSON.stringify(comparisonMutation.data.model2.result, null, 2)}</pre>
                   ) : (
-                    <p className="raw-response">{comparisonMutation.data.model2.raw_response}</p>
+                    <p className="raw-response">⚠️ {comparisonMutation.data.model2.error}</p>
                   )}
                 </div>
               </div>
@@ -38,6 +38,7 @@ export interface GeometryAnalysis {
   part_type: string
   shape_type: string
   overall_dimensions: Record<string, DimensionInfo>
+  dimensions?: DimensionInfo[]
   features: FeatureInfo[]
   complexity_score: number
 }
@@ -58,13 +59,48 @@ export interface QualityRequirements {
   critical_dimensions: string[]
 }
 
+export interface ImageTransfer {
+  page: number
+  tile?: number
+  width: number
+  height: number
+  encoded_bytes?: number
+  encoder?: string
+  estimated_tokens?: number
+}
+
+export interface AnalysisBreakdown {
+  stages: Record<string, number>
+  preprocess_cached: boolean
+  images: ImageTransfer[]
+  provider_calls: number
+  input_tokens?: number
+  output_tokens?: number
+  reasoning_tokens?: number
+  cached_tokens?: number
+  preprocess_cpu_time?: number
+  cpu_time?: number
+}
+
 export interface AnalysisMetadata {
   model_used: string
   processing_time: number
   confidence_score: number
   tokens_used?: number
+  cached_tokens?: number
+  queue_wait?: number
   warnings: string[]
   timestamp: string
+  cache_hit?: boolean
+  coalesced?: boolean
+  hedged?: boolean
+  image_width?: number
+  image_height?: number
+  estimated_image_tokens?: number
+  image_encoder?: string
+  image_bytes?: number
+  encode_time?: number
+  breakdown?: AnalysisBreakdown
 }
 
 export interface DrawingAnalysisResult {